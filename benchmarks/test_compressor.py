@@ -0,0 +1,62 @@
+# ---------------------------------------------------------------------
+# Gufo Err: Compressor benchmarks
+# ---------------------------------------------------------------------
+# Copyright (C) 2022-26, Gufo Labs
+# ---------------------------------------------------------------------
+
+# Third-party modules
+import pytest
+
+# Gufo Err modules
+from gufo.err.compressor import Compressor
+
+from .util import get_sample
+
+FORMATS = sorted(Compressor.FORMATS, key=lambda x: x or "")
+DEPTHS = [1, 10, 50]
+
+
+@pytest.mark.parametrize("depth", DEPTHS)
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_write(benchmark, tmp_path, fmt: str | None, depth: int) -> None:
+    data = get_sample(depth)
+    compressor = Compressor(format=fmt)
+    path = tmp_path / f"sample.json{compressor.suffix}"
+
+    def write() -> None:
+        with open(path, "wb") as f:
+            f.write(compressor.encode(data))
+
+    benchmark(write)
+    benchmark.extra_info["size"] = len(data)
+    benchmark.extra_info["ratio"] = round(len(data) / path.stat().st_size, 2)
+
+
+@pytest.mark.parametrize("depth", DEPTHS)
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_read(benchmark, fmt: str | None, depth: int) -> None:
+    compressor = Compressor(format=fmt)
+    data = compressor.encode(get_sample(depth))
+    benchmark(compressor.decode, data)
+
+
+LEVELS = {
+    "gz": [1, 3, 6, 9],
+    "bz2": [1, 5, 9],
+    "xz": [0, 3, 6, 9],
+    "zst": [-5, 1, 3, 9, 19],
+}
+LEVEL_MATRIX = [
+    (fmt, level)
+    for fmt, levels in LEVELS.items()
+    if fmt in Compressor.FORMATS
+    for level in levels
+]
+
+
+@pytest.mark.parametrize(("fmt", "level"), LEVEL_MATRIX)
+def test_level(benchmark, fmt: str, level: int) -> None:
+    data = get_sample(10)
+    compressor = Compressor(format=fmt, level=level)
+    c_data = benchmark(compressor.encode, data)
+    benchmark.extra_info["ratio"] = round(len(data) / len(c_data), 2)
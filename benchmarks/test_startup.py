@@ -0,0 +1,63 @@
+# ---------------------------------------------------------------------
+# Gufo Err: CLI startup benchmarks
+# ---------------------------------------------------------------------
+# Copyright (C) 2022-26, Gufo Labs
+# ---------------------------------------------------------------------
+
+# Python modules
+import subprocess
+import sys
+
+# Third-party modules
+import pytest
+
+CLI = "import sys; from gufo.err.cli import main; sys.exit(main())"
+# Maximal import time of `gufo.err.cli` on top of `gufo.err`, in microseconds
+STARTUP_THRESHOLD = 25_000
+RUNS = 10
+# Modules, imported by the command handlers only
+LAZY_MODULES = ("gufo.err.grep", "gufo.err.storage.directory", "json")
+
+
+def run(*args: str) -> str:
+    return subprocess.run(  # noqa: S603
+        [sys.executable, *args], check=True, capture_output=True, text=True
+    ).stderr
+
+
+def get_import_times(module: str) -> dict[str, int]:
+    """Get cumulative import times of the modules, in microseconds."""
+    r: dict[str, int] = {}
+    for line in run("-X", "importtime", "-c", f"import {module}").splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                r[name.strip()] = int(cumulative)
+    return r
+
+
+@pytest.mark.parametrize("cmd", [["version"], ["list"]])
+def test_startup(benchmark, tmp_path, cmd: list[str]) -> None:
+    benchmark(run, "-c", CLI, "-p", str(tmp_path), *cmd)
+
+
+def test_startup_threshold() -> None:
+    overhead = min(
+        times["gufo.err.cli"] - times["gufo.err"]
+        for times in (get_import_times("gufo.err.cli") for _ in range(RUNS))
+    )
+    assert overhead <= STARTUP_THRESHOLD
+
+
+def test_startup_lazy() -> None:
+    code = (
+        "import sys, gufo.err.cli; "
+        f"print([m for m in {LAZY_MODULES} if m in sys.modules])"
+    )
+    out = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", code],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    assert out == "[]\n"
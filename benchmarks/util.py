@@ -0,0 +1,46 @@
+# ---------------------------------------------------------------------
+# Gufo Err: benchmarking utilities
+# ---------------------------------------------------------------------
+# Copyright (C) 2022-26, Gufo Labs
+# ---------------------------------------------------------------------
+
+# Python modules
+import uuid
+from functools import cache
+
+# Gufo Err modules
+from gufo.err import ErrorInfo, exc_traceback, iter_frames
+from gufo.err.codec import to_json
+
+
+def recurse(depth: int, payload: dict[str, int]) -> None:
+    if depth:
+        recurse(depth - 1, payload)
+    msg = f"Depth exhausted: {len(payload)}"
+    raise RuntimeError(msg)
+
+
+@cache
+def get_sample(depth: int) -> bytes:
+    """Get serialized ErrorInfo with the stack of given depth.
+
+    Args:
+        depth: Recursion depth.
+
+    Returns:
+        JSON-encoded ErrorInfo as bytes.
+    """
+    payload = {f"key{i}": i for i in range(20)}
+    try:
+        recurse(depth, payload)
+    except RuntimeError as e:
+        info = ErrorInfo(
+            name="benchmark",
+            version="1.0",
+            fingerprint=uuid.uuid4(),
+            stack=list(iter_frames(exc_traceback())),
+            exception=e,
+        )
+        return to_json(info).encode()
+    msg = "Not raised"
+    raise AssertionError(msg)
@@ -11,4 +11,6 @@
   Traceback formatters.
 * [Middleware][gufo.err.abc.middleware.BaseMiddleware]:
   Error-processing middleware.
+* [Storage][gufo.err.abc.storage.BaseStorage]:
+  Error info storages.
 """
@@ -0,0 +1,969 @@
+# ---------------------------------------------------------------------
+# Gufo Err: BaseStorage class
+# ---------------------------------------------------------------------
+# Copyright (C) 2022-26, Gufo Labs
+# ---------------------------------------------------------------------
+"""BaseStorage.
+
+Attributes:
+    FSYNC_POLICIES: Valid durability policies.
+    DECODE_CHUNK: Maximal number of records per parallel decoding task.
+"""
+
+# Python modules
+import datetime
+import os
+from abc import ABC, abstractmethod
+from collections import deque
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from fnmatch import fnmatchcase
+from functools import partial
+from itertools import islice
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, TypeVar, cast
+
+# Gufo Err modules
+from ..types import ErrorInfo, ExceptionStub
+
+if TYPE_CHECKING:
+    from ..compressor import Compressor
+
+FSYNC_POLICIES = ("never", "file", "directory")
+DECODE_CHUNK = 64
+
+# Decoding result: (fingerprint, error info, error message)
+DecodeResult = tuple[str, ErrorInfo | None, str | None]
+
+T = TypeVar("T")
+
+
+@dataclass
+class Summary:
+    """Error info summary.
+
+    Attributes:
+        fingerprint: Stringified fingerprint.
+        name: Application name.
+        version: Application version.
+        exception: Exception string.
+        exception_class: Exception class name.
+        ts: Error timestamp, the time of the first occurrence.
+        place: Error location.
+        count: Number of occurrences.
+        last_seen: Time of the last occurrence.
+        module: Module of the application top frame.
+        hosts: Occurrences by the source hosts of the merged records.
+    """
+
+    fingerprint: str
+    name: str
+    version: str
+    exception: str
+    exception_class: str
+    ts: datetime.datetime | None
+    place: str
+    count: int = 1
+    last_seen: datetime.datetime | None = None
+    module: str = ""
+    hosts: dict[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def from_info(cls: type["Summary"], info: ErrorInfo) -> "Summary":
+        """Build summary from error info.
+
+        Args:
+            info: ErrorInfo instance.
+
+        Returns:
+            Summary instance.
+        """
+        top = info.get_app_top_frame()
+        if top and top.source:
+            place = f"{top.source.file_name}:{top.source.current_line}"
+        else:
+            place = "unknown"
+        exc = info.exception
+        if isinstance(exc, ExceptionStub):
+            exc_class = exc.kls
+        else:
+            if exc.__class__.__module__ == "builtins":
+                exc_class = exc.__class__.__name__
+            else:
+                mod = exc.__class__.__module__
+                exc_class = f"{mod}.{exc.__class__.__name__}"
+            # Same as deserialized exception
+            exc = ExceptionStub(kls=exc_class, args=exc.args)
+        return Summary(
+            fingerprint=str(info.fingerprint),
+            name=info.name,
+            version=info.version,
+            exception=str(exc),
+            exception_class=exc_class,
+            ts=info.timestamp,
+            place=place,
+            last_seen=info.timestamp,
+            module=(top.module or "") if top else "",
+        )
+
+    def get_mtime(self) -> datetime.datetime | None:
+        """Get time of the last occurrence.
+
+        Returns:
+            * Naive local time of the last occurrence.
+            * None, if not known.
+        """
+        ts = self.last_seen or self.ts
+        return _local(ts) if ts else None
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert summary to the JSON-serializable dict.
+
+        Returns:
+            Dict of summary fields, timestamps in ISO 8601 format.
+        """
+        return {
+            "fingerprint": self.fingerprint,
+            "name": self.name,
+            "version": self.version,
+            "exception": self.exception,
+            "exception_class": self.exception_class,
+            "ts": self.ts.isoformat() if self.ts else None,
+            "place": self.place,
+            "count": self.count,
+            "last_seen": self.last_seen.isoformat()
+            if self.last_seen
+            else None,
+            "module": self.module,
+            "hosts": dict(self.hosts),
+        }
+
+
+def _local(ts: datetime.datetime) -> datetime.datetime:
+    """Convert timestamp to the naive local time.
+
+    Args:
+        ts: Timestamp.
+
+    Returns:
+        Naive timestamp.
+    """
+    if ts.tzinfo is None:
+        return ts
+    return ts.astimezone().replace(tzinfo=None)
+
+
+@dataclass
+class SummaryFilter:
+    """Summary filter.
+
+    Storages apply the filter to the summaries before decoding
+    the records, when possible. Unset conditions match any
+    summary. Naive timestamps are treated as the local time,
+    aware ones are converted to the naive local time.
+
+    Attributes:
+        since: Match errors, occurred since the time.
+        until: Match errors, first occurred until the time.
+        name: Application name glob pattern.
+        exception: Exception class glob pattern.
+        module: Module of the application top frame,
+            including submodules.
+    """
+
+    since: datetime.datetime | None = None
+    until: datetime.datetime | None = None
+    name: str | None = None
+    exception: str | None = None
+    module: str | None = None
+
+    def __post_init__(self) -> None:
+        """Normalize the time bounds."""
+        if self.since:
+            self.since = _local(self.since)
+        if self.until:
+            self.until = _local(self.until)
+
+    def match(self, summary: Summary) -> bool:
+        """Check the summary matches the filter.
+
+        Args:
+            summary: Record summary.
+
+        Returns:
+            True, if the summary matches all conditions.
+        """
+        if self.name is not None and not fnmatchcase(summary.name, self.name):
+            return False
+        if self.exception is not None and not fnmatchcase(
+            summary.exception_class, self.exception
+        ):
+            return False
+        if self.module is not None and not (
+            summary.module == self.module
+            or summary.module.startswith(f"{self.module}.")
+        ):
+            return False
+        last_seen = summary.get_mtime()
+        if self.since and last_seen and last_seen < self.since:
+            return False
+        return not (
+            self.until and summary.ts and _local(summary.ts) > self.until
+        )
+
+
+class BaseStorage(ABC):
+    """Abstract base class for error info storages.
+
+    Storage keeps serialized [ErrorInfo][gufo.err.ErrorInfo]
+    records, addressed by the stringified fingerprint.
+    Records are passed to and returned from the storage
+    uncompressed, the compression is up to the storage.
+
+    Storages must implement `iter_fingerprints`, `read`,
+    `write`, and `delete` methods.
+
+    Durability of the writes is controlled by `fsync` policy:
+
+    * `never` - leave flushing to the operating system.
+    * `file` - sync written files.
+    * `directory` - sync written files and their directories.
+
+    Attributes:
+        path: Storage location.
+        fsync: Durability policy.
+        counts_occurrences: Storage counts the repeated occurrences
+            and reports the changed records by `iter_new`.
+    """
+
+    path: Path
+    fsync: str = "never"
+    counts_occurrences: bool = False
+
+    @staticmethod
+    def check_fsync(fsync: str) -> str:
+        """Check durability policy.
+
+        Args:
+            fsync: Durability policy.
+
+        Returns:
+            Durability policy.
+
+        Raises:
+            ValueError: On invalid policy.
+        """
+        if fsync not in FSYNC_POLICIES:
+            msg = f"Invalid fsync policy: {fsync}"
+            raise ValueError(msg)
+        return fsync
+
+    def sync_file(self, fd: int) -> None:
+        """Sync written file according to the policy.
+
+        Args:
+            fd: File descriptor.
+        """
+        if self.fsync != "never":
+            os.fsync(fd)
+
+    def sync_dir(self, path: Path) -> None:
+        """Sync directory entries according to the policy.
+
+        Directories are not synced on platforms which
+        cannot open directories.
+
+        Args:
+            path: Directory path.
+        """
+        if self.fsync != "directory" or not hasattr(os, "O_DIRECTORY"):
+            return
+        fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    @abstractmethod
+    def iter_fingerprints(self) -> Iterable[str]:
+        """Iterate over all stored fingerprints.
+
+        Returns:
+            Iterable of stringified fingerprints.
+        """
+
+    @abstractmethod
+    def read(self, fingerprint: str) -> bytes | None:
+        """Read the record.
+
+        Args:
+            fingerprint: Stringified fingerprint.
+
+        Returns:
+            * Uncompressed JSON record, if found.
+            * None, if the record is not found.
+
+        Raises:
+            ValueError: If the record is corrupted.
+            OSError: On read errors.
+        """
+
+    @abstractmethod
+    def write(self, fingerprint: str, data: bytes) -> bool:
+        """Write the record, if not exists.
+
+        Args:
+            fingerprint: Stringified fingerprint.
+            data: Uncompressed JSON record.
+
+        Returns:
+            * True, if the record has been written.
+            * False, if the record is already exists.
+
+        Raises:
+            OSError: On write errors.
+        """
+
+    def write_info(self, info: ErrorInfo, data: bytes) -> bool:
+        """Write the record, if not exists.
+
+        Storages may override the method to use
+        [ErrorInfo][gufo.err.ErrorInfo] fields without
+        decoding the record, and to count the occurrences
+        of the existing record.
+
+        Args:
+            info: ErrorInfo instance.
+            data: Uncompressed JSON record.
+
+        Returns:
+            * True, if the record has been written.
+            * False, if the record is already exists.
+
+        Raises:
+            OSError: On write errors.
+        """
+        return self.write(str(info.fingerprint), data)
+
+    def hit(self, info: ErrorInfo) -> bool:
+        """Count the occurrence of the existing record.
+
+        Allows to skip the serialization of the repeated errors.
+        Storages, which count the occurrences, should override
+        the method.
+
+        Args:
+            info: ErrorInfo instance.
+
+        Returns:
+            * True, if the record exists and the occurrence is counted.
+            * False, if the record must be written by `write_info`.
+        """
+        return False
+
+    def write_many(
+        self, records: Iterable[tuple[str, bytes]], jobs: int = 1
+    ) -> int:
+        """Write multiple records, if not exist.
+
+        Storages may override the method to compress
+        the records in parallel.
+
+        Args:
+            records: Iterable of (`fingerprint`, `data`), where
+                `data` is the uncompressed JSON record.
+            jobs: Number of compressing threads.
+
+        Returns:
+            Number of written records.
+
+        Raises:
+            OSError: On write errors.
+        """
+        return sum(self.write(fp, data) for fp, data in records)
+
+    def write_occurrence(self, fingerprint: str, data: bytes) -> bool:
+        """Store the repeated occurrence of the existing record.
+
+        Storages, which keep the recent occurrences,
+        must override the method.
+
+        Args:
+            fingerprint: Stringified fingerprint.
+            data: Uncompressed JSON record.
+
+        Returns:
+            * True, if the occurrence has been written.
+            * False, if the occurrences are not stored.
+        """
+        return False
+
+    def read_occurrence(self, fingerprint: str, n: int) -> bytes | None:
+        """Read the stored occurrence.
+
+        Occurrences are indexed in chronological order.
+        `0` is the first occurrence, i.e. the record itself,
+        negative values count from the latest one. Storages,
+        which do not keep the occurrences, have only the record.
+
+        Args:
+            fingerprint: Stringified fingerprint.
+            n: Occurrence index.
+
+        Returns:
+            * Uncompressed JSON record, if found.
+            * None, if the record or the occurrence is not found.
+
+        Raises:
+            ValueError: If the occurrence cannot be decompressed.
+        """
+        if n not in (0, -1):
+            return None
+        return self.read(fingerprint)
+
+    def flush(self) -> None:
+        """Flush pending occurrence counters.
+
+        Storages, which aggregate the counters in memory,
+        must override the method.
+        """
+        return
+
+    @abstractmethod
+    def delete(self, fingerprint: str) -> bool:
+        """Delete the record.
+
+        Args:
+            fingerprint: Stringified fingerprint.
+
+        Returns:
+            * True, if the record has been deleted.
+            * False, if the record is not found.
+
+        Raises:
+            OSError: On write errors.
+        """
+
+    def delete_many(
+        self,
+        fingerprints: Iterable[str],
+        on_error: Callable[[str, Exception], None] | None = None,
+        jobs: int = 1,
+    ) -> int:
+        """Delete multiple records.
+
+        Storages may override the method to optimize
+        the bulk deletes.
+
+        Args:
+            fingerprints: Iterable of stringified fingerprints.
+            on_error: Optional callable, accepting fingerprint and
+                exception for the records, which cannot be removed.
+                Errors are raised if not set.
+            jobs: Number of parallel deletes.
+
+        Returns:
+            Number of deleted records.
+
+        Raises:
+            OSError: On write errors and `on_error` is not set.
+        """
+        n = 0
+        for fp in fingerprints:
+            try:
+                if self.delete(fp):
+                    n += 1
+            except OSError as e:
+                if on_error is None:
+                    raise
+                on_error(fp, e)
+        return n
+
+    def move(
+        self,
+        target: "BaseStorage",
+        fingerprints: Iterable[str],
+        on_error: Callable[[str, Exception], None] | None = None,
+        jobs: int = 1,
+    ) -> int:
+        """Move the records to the other storage.
+
+        Records are written to the target first, then the ones,
+        found in the target, are deleted. So the interrupted move
+        leaves the records in both storages, and the next move
+        completes it. Occurrence counters and stored occurrences
+        are not moved.
+
+        Args:
+            target: Target storage.
+            fingerprints: Iterable of stringified fingerprints.
+            on_error: Optional callable, accepting fingerprint and
+                exception for the records, which cannot be read
+                or removed. Errors are raised if not set.
+            jobs: Number of parallel writes and deletes.
+
+        Returns:
+            Number of moved records.
+
+        Raises:
+            ValueError: If the record is corrupted and `on_error`
+                is not set.
+            OSError: On read or write errors.
+        """
+        fps = list(fingerprints)
+        target.write_many(self.iter_read(fps, on_error), jobs)
+        return self.delete_many(sorted(target.find(fps)), on_error, jobs)
+
+    def recompress(
+        self,
+        fingerprints: Iterable[str],
+        compressor: "Compressor",
+        on_error: Callable[[str, Exception], None] | None = None,
+        jobs: int = 1,
+    ) -> int:
+        """Recompress the records.
+
+        Storages, keeping the records in the separate files,
+        must override the method.
+
+        Args:
+            fingerprints: Iterable of stringified fingerprints.
+            compressor: Target compressor.
+            on_error: Optional callable, accepting fingerprint and
+                exception for the records, which cannot be
+                recompressed. Errors are raised if not set.
+            jobs: Number of compressing threads.
+
+        Returns:
+            Number of recompressed records.
+        """
+        return 0
+
+    def iter_modified(
+        self,
+        fingerprints: Iterable[str],
+        on_error: Callable[[str, Exception], None] | None = None,
+        jobs: int = 1,
+    ) -> Iterable[tuple[str, datetime.datetime]]:
+        """Get the last modification times of the records.
+
+        Time of the last occurrence is used by default.
+        Storages may override the method to avoid
+        decoding of the records.
+
+        Args:
+            fingerprints: Iterable of stringified fingerprints.
+            on_error: Optional callable, accepting fingerprint and
+                exception for unreadable records. Errors are raised
+                if not set.
+            jobs: Number of decoding processes.
+
+        Returns:
+            Iterable of (`fingerprint`, `mtime`) for existing records
+            with known time.
+        """
+        for s in self.iter_summary(fingerprints, on_error, jobs):
+            mtime = s.get_mtime()
+            if mtime is not None:
+                yield s.fingerprint, mtime
+
+    def find(self, fingerprints: Iterable[str]) -> set[str]:
+        """Find stored fingerprints.
+
+        Storages may override the method to use indexed lookups.
+
+        Args:
+            fingerprints: Iterable of stringified fingerprints.
+
+        Returns:
+            Set of the stored fingerprints.
+        """
+        return set(fingerprints).intersection(self.iter_fingerprints())
+
+    def iter_read(
+        self,
+        fingerprints: Iterable[str],
+        on_error: Callable[[str, Exception], None] | None = None,
+    ) -> Iterable[tuple[str, bytes]]:
+        """Read multiple records.
+
+        Storages may override the method to optimize
+        the bulk reads.
+
+        Args:
+            fingerprints: Iterable of stringified fingerprints.
+            on_error: Optional callable, accepting fingerprint and
+                exception for unreadable records. Errors are raised
+                if not set.
+
+        Returns:
+            Iterable of (`fingerprint`, `data`) for existing and
+            readable records. Order of the records is up to the storage.
+
+        Raises:
+            ValueError: If the record is corrupted and `on_error`
+                is not set.
+            OSError: On read errors and `on_error` is not set.
+        """
+        for fp in fingerprints:
+            try:
+                data = self.read(fp)
+            except (ValueError, OSError) as e:
+                if on_error is None:
+                    raise
+                on_error(fp, e)
+                continue
+            if data is not None:
+                yield fp, data
+
+    def iter_info(
+        self,
+        fingerprints: Iterable[str],
+        on_error: Callable[[str, Exception], None] | None = None,
+        jobs: int = 1,
+    ) -> Iterable[tuple[str, ErrorInfo]]:
+        """Read and decode multiple records.
+
+        Records are decoded by the pool of `jobs` processes, when
+        `jobs` is greater than 1. Each process opens the storage
+        by itself, and the records are processed by chunks with
+        the bounded number of chunks in flight.
+
+        Args:
+            fingerprints: Iterable of stringified fingerprints.
+            on_error: Optional callable, accepting fingerprint and
+                exception for unreadable records. Errors are raised
+                if not set.
+            jobs: Number of decoding processes.
+
+        Returns:
+            Iterable of (`fingerprint`, `info`) for existing and
+            readable records. Parallel decoding preserves the order
+            of the fingerprints.
+
+        Raises:
+            ValueError: If the record is corrupted and `on_error`
+                is not set.
+            OSError: On read errors and `on_error` is not set.
+        """
+        if jobs <= 1:
+            from ..codec import from_json
+
+            for fp, data in self.iter_read(fingerprints, on_error):
+                try:
+                    info = from_json(data.decode())
+                except ValueError as e:
+                    if on_error is None:
+                        raise
+                    on_error(fp, e)
+                    continue
+                yield fp, info
+            return
+        for fp, decoded, error in self._iter_pool(
+            fingerprints, _decode_chunk, jobs
+        ):
+            if decoded is not None:
+                yield fp, decoded
+                continue
+            exc = ValueError(error)
+            if on_error is None:
+                raise exc
+            on_error(fp, exc)
+
+    def iter_match(
+        self,
+        fingerprints: Iterable[str],
+        match: Callable[[bytes], T | None],
+        on_error: Callable[[str, Exception], None] | None = None,
+        jobs: int = 1,
+    ) -> Iterable[tuple[str, T]]:
+        """Match the uncompressed records.
+
+        `match` is applied to the uncompressed records
+        by the pool of `jobs` processes, like in `iter_info`.
+        `match` must be picklable for the parallel processing.
+
+        Args:
+            fingerprints: Iterable of stringified fingerprints.
+            match: Callable, accepting uncompressed record and
+                returning the match result or None, if not matched.
+                May raise ValueError for invalid records.
+            on_error: Optional callable, accepting fingerprint and
+                exception for unreadable records. Errors are raised
+                if not set.
+            jobs: Number of matching processes.
+
+        Returns:
+            Iterable of (`fingerprint`, `result`) for matched records,
+            in order of the fingerprints.
+
+        Raises:
+            ValueError: If the record is corrupted and `on_error`
+                is not set.
+            OSError: On read errors and `on_error` is not set.
+        """
+        if jobs <= 1:
+            for fp, data in self.iter_read(fingerprints, on_error):
+                try:
+                    r = match(data)
+                except ValueError as e:
+                    if on_error is None:
+                        raise
+                    on_error(fp, e)
+                    continue
+                if r is not None:
+                    yield fp, r
+            return
+        for fp, result, error in self._iter_pool(
+            fingerprints, partial(_match_chunk, match), jobs
+        ):
+            if error is None:
+                if result is not None:
+                    yield fp, result
+                continue
+            exc = ValueError(error)
+            if on_error is None:
+                raise exc
+            on_error(fp, exc)
+
+    def _iter_pool(
+        self,
+        fingerprints: Iterable[str],
+        task: Callable[[list[str]], list[tuple[str, T | None, str | None]]],
+        jobs: int,
+    ) -> Iterable[tuple[str, T | None, str | None]]:
+        """Process the records by the pool of processes.
+
+        Each process opens the storage by itself, and the records
+        are processed by chunks with the bounded number of chunks
+        in flight.
+
+        Args:
+            fingerprints: Iterable of stringified fingerprints.
+            task: Picklable callable, processing the chunk
+                of fingerprints in the worker process.
+            jobs: Number of processes.
+
+        Returns:
+            Iterable of the task results, in order of the chunks.
+        """
+        from concurrent.futures import Future, ProcessPoolExecutor
+
+        fps = list(fingerprints)
+        size = max(1, min(DECODE_CHUNK, -(-len(fps) // jobs)))
+        chunks = (fps[i : i + size] for i in range(0, len(fps), size))
+        opener = cast(Callable[..., BaseStorage], type(self))
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_worker,
+            initargs=(opener, self.path, self.get_worker_args()),
+        ) as pool:
+            pending: deque[Future[list[tuple[str, T | None, str | None]]]] = (
+                deque(
+                    pool.submit(task, chunk)
+                    for chunk in islice(chunks, jobs * 2)
+                )
+            )
+            while pending:
+                results = pending.popleft().result()
+                for chunk in islice(chunks, 1):
+                    pending.append(pool.submit(task, chunk))
+                yield from results
+
+    def get_worker_args(self) -> dict[str, Any]:
+        """Get constructor arguments to open the storage in the workers.
+
+        Workers only read the records, so the storages may open
+        themselves in the read-only mode.
+
+        Returns:
+            Dict of picklable keyword arguments, passed to the storage
+            class along with the `path`.
+        """
+        return {}
+
+    def iter_new(
+        self, known: set[str], updated: set[str] | None = None
+    ) -> Iterable[str]:
+        """Iterate the records, which are not known yet.
+
+        Found fingerprints are added to `known`. Records, written
+        by the other processes, must be found as well.
+        Storages may override the method to avoid
+        the full listing of the records, and to track
+        the changes of the known records.
+
+        Args:
+            known: Set of the known fingerprints.
+            updated: Optional set, collecting the known fingerprints
+                with the changed records, if the storage tracks them.
+
+        Returns:
+            Iterable of the stringified fingerprints.
+        """
+        for fp in self.iter_fingerprints():
+            if fp not in known:
+                known.add(fp)
+                yield fp
+
+    def reindex(self) -> int:
+        """Rebuild the storage indexes.
+
+        Storages, maintaining the indexes, must override the method.
+
+        Returns:
+            Number of indexed records.
+
+        Raises:
+            OSError: On read or write errors.
+        """
+        return sum(1 for _ in self.iter_fingerprints())
+
+    def iter_summary(
+        self,
+        fingerprints: Iterable[str],
+        on_error: Callable[[str, Exception], None] | None = None,
+        jobs: int = 1,
+        where: SummaryFilter | None = None,
+    ) -> Iterable[Summary]:
+        """Get summaries of multiple records.
+
+        Storages may override the method to avoid
+        decoding the records.
+
+        Args:
+            fingerprints: Iterable of stringified fingerprints.
+            on_error: Optional callable, accepting fingerprint and
+                exception for unreadable records. Errors are raised
+                if not set.
+            jobs: Number of decoding processes.
+            where: Optional filter.
+
+        Returns:
+            Iterable of summaries for existing and readable records,
+            matching the filter.
+        """
+        for _, info in self.iter_info(fingerprints, on_error, jobs):
+            summary = Summary.from_info(info)
+            if where is None or where.match(summary):
+                yield summary
+
+    def select_summary(
+        self,
+        where: SummaryFilter | None = None,
+        order: str | None = None,
+        reverse: bool = False,
+        limit: int | None = None,
+        on_error: Callable[[str, Exception], None] | None = None,
+        jobs: int = 1,
+    ) -> Iterable[Summary]:
+        """Get summaries of all records, matching the filter.
+
+        Storages may override the method to filter, sort,
+        and limit the summaries by the indexed query.
+        Missed times are sorted as the current time.
+
+        Args:
+            where: Optional filter.
+            order: Optional summary field to sort by.
+            reverse: Sort in descending order.
+            limit: Maximal number of summaries.
+            on_error: Optional callable, accepting fingerprint and
+                exception for unreadable records. Errors are raised
+                if not set.
+            jobs: Number of decoding processes.
+
+        Returns:
+            Iterable of summaries for readable records,
+            matching the filter.
+        """
+        summaries = self.iter_summary(
+            self.iter_fingerprints(), on_error, jobs, where
+        )
+        if order is None:
+            if limit is None:
+                return summaries
+            from itertools import islice
+
+            return list(islice(summaries, limit))
+        now = datetime.datetime.now()
+
+        def sort_key(s: Summary) -> Any:  # noqa: ANN401
+            if order == "last_seen":
+                return s.last_seen or s.ts or now
+            v = getattr(s, order)
+            return now if v is None else v
+
+        if limit is None:
+            return sorted(summaries, key=sort_key, reverse=reverse)
+        import heapq
+
+        pick = heapq.nlargest if reverse else heapq.nsmallest
+        return pick(limit, summaries, key=sort_key)
+
+
+# Storage, opened by the decoding process
+_worker: dict[str, BaseStorage] = {}
+
+
+def _init_worker(
+    opener: Callable[..., BaseStorage], path: Path, kwargs: dict[str, Any]
+) -> None:
+    """Open the storage in the decoding process.
+
+    Args:
+        opener: Storage class.
+        path: Storage location.
+        kwargs: Storage constructor arguments, see `get_worker_args`.
+    """
+    _worker["storage"] = opener(path, **kwargs)
+
+
+def _decode_chunk(fingerprints: list[str]) -> list[DecodeResult]:
+    """Read and decode the chunk of records in the decoding process.
+
+    Args:
+        fingerprints: List of stringified fingerprints.
+
+    Returns:
+        List of (`fingerprint`, `info`, `error`) in order
+        of fingerprints. Either `info` or `error` is set,
+        missed records are skipped.
+    """
+    storage = _worker["storage"]
+    r: dict[str, DecodeResult] = {}
+
+    def on_error(fp: str, e: Exception) -> None:
+        r[fp] = (fp, None, str(e))
+
+    for fp, info in storage.iter_info(fingerprints, on_error):
+        r[fp] = (fp, info, None)
+    return [r[fp] for fp in fingerprints if fp in r]
+
+
+def _match_chunk(
+    match: Callable[[bytes], T | None], fingerprints: list[str]
+) -> list[tuple[str, T | None, str | None]]:
+    """Read and match the chunk of records in the worker process.
+
+    Args:
+        match: Matching callable.
+        fingerprints: List of stringified fingerprints.
+
+    Returns:
+        List of (`fingerprint`, `result`, `error`) in order
+        of fingerprints. Unmatched records have neither `result`
+        nor `error`, missed records are skipped.
+    """
+    storage = _worker["storage"]
+    r: dict[str, tuple[str, T | None, str | None]] = {}
+
+    def on_error(fp: str, e: Exception) -> None:
+        r[fp] = (fp, None, str(e))
+
+    for fp, data in storage.iter_read(fingerprints, on_error):
+        try:
+            r[fp] = (fp, match(data), None)
+        except ValueError as e:
+            on_error(fp, e)
+    return [r[fp] for fp in fingerprints if fp in r]
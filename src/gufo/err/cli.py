@@ -7,23 +7,38 @@
 
 # Python module
 import argparse
+import contextlib
 import datetime
+import math
 import os
 import re
 import sys
+import time
 import uuid
+from bisect import bisect_left
 from collections.abc import Callable, Iterable
 from dataclasses import dataclass
 from enum import IntEnum
+from functools import lru_cache
+from itertools import islice
 from operator import attrgetter
+from typing import TYPE_CHECKING
 
 # Gufo Err modules
 from . import __version__
-from .codec import from_json
-from .compressor import Compressor
-from .formatter.loader import get_formatter
+from .abc.storage import BaseStorage, Summary, SummaryFilter
+from .compressor import (
+    DEFAULT_DICT_SIZE,
+    HAS_ZSTD,
+    Compressor,
+    get_dict_path,
+    train_dict,
+)
 from .types import ErrorInfo
 
+if TYPE_CHECKING:
+    from .stats import Stats
+
 
 @dataclass
 class ListItem:
@@ -33,8 +48,10 @@ class ListItem:
         fingerprint: Stringified fingerprint.
         exception: Exception string.
         name: Application name.
-        ts: Error timestamp.
+        ts: Error timestamp, the time of the first occurrence.
         place: Error location.
+        count: Number of occurrences.
+        last_seen: Time of the last occurrence.
     """
 
     fingerprint: str
@@ -42,6 +59,8 @@ class ListItem:
     name: str
     ts: datetime.datetime
     place: str
+    count: int
+    last_seen: datetime.datetime
 
 
 class ExitCode(IntEnum):
@@ -54,6 +73,7 @@ class ExitCode(IntEnum):
         CANNOT_READ: Cannot read Error Info file
         INVALID_ARGS: Invalid arguments
         SYNTAX: Invalid expression
+        CANNOT_WRITE: Cannot write output file
     """
 
     OK = 0
@@ -62,20 +82,52 @@ class ExitCode(IntEnum):
     CANNOT_READ = 3
     INVALID_ARGS = 4
     SYNTAX = 5
+    CANNOT_WRITE = 6
 
 
 ELLIPSIS = "..."
 L_ELLIPSIS = len(ELLIPSIS)
 
+# `err list --sort` choices -> ListItem attributes
+SORT_KEYS = {
+    "ts": "ts",
+    "last": "last_seen",
+    "count": "count",
+    "name": "name",
+    "exception": "exception",
+    "place": "place",
+}
+
+# Size of the uncompressed `err export` chunk, compressed as a separate frame
+EXPORT_CHUNK = 1 << 20
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+# Minimal length of the fingerprint prefix
+MIN_PREFIX = 4
+PREFIX_CHARS = frozenset("0123456789abcdef-")
+# Maximal number of candidates, shown for the ambiguous prefix
+MAX_CANDIDATES = 5
+
+# `err serve` defaults: number of the cached decoded records
+# and the minimal index refresh interval, in seconds
+SERVE_CACHE_SIZE = 256
+SERVE_INTERVAL = 1.0
+
+
+@lru_cache(maxsize=1)
+def get_rx_host() -> re.Pattern[str]:
+    """Get host name expression, compiled on the first use.
+
+    Returns:
+        Compiled regular expression.
+    """
+    return re.compile(r"^[\w.-]+$")
+
 
 class Cli:
     """`err` utility class."""
 
-    rx_fn = re.compile(
-        "^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}.json"
-        "(|.gz|.bz2|.xz)$"
-    )
-
     def handle_version(self, _ns: argparse.Namespace) -> ExitCode:
         """Print Gufo Err version.
 
@@ -152,10 +204,10 @@ class Cli:
 
     @staticmethod
     def __check_dir(path: str) -> ExitCode:
-        """Check if directory exists and accessible.
+        """Check if directory or database exists and accessible.
 
         Args:
-            path: Directory path
+            path: Directory or database path
 
         Returns:
             * OK - on success
@@ -172,6 +224,26 @@ class Cli:
             return ExitCode.EACCESS
         return ExitCode.OK
 
+    def __open_storages(
+        self, ns: argparse.Namespace
+    ) -> tuple[ExitCode, list[BaseStorage]]:
+        """Check and open the storages.
+
+        Args:
+            ns: argsparse.Namespace with `prefix` and `db` fields.
+
+        Returns:
+            Tuple of (exit code, list of storages).
+        """
+        code = self.__check_dir(ns.db or ns.prefix)
+        if code != ExitCode.OK:
+            return code, []
+        try:
+            return ExitCode.OK, self.get_storages(ns.prefix, ns.db)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            return ExitCode.CANNOT_READ, []
+
     def handle_list(self, ns: argparse.Namespace) -> ExitCode:
         """Show the list of the registered errors.
 
@@ -179,62 +251,70 @@ class Cli:
             ns: argsparse.Namespace with fields:
 
                 * `prefix` - directory of errorinfo files.
+                * `db` - SQLite database path, overrides `prefix`.
                 * `fingerprints` - list of fingerprint expressions.
+                * `sort` - sort key.
+                * `reverse` - reverse sort order.
+                * `limit` - maximal number of errors to show.
+                * `since` - show errors, occurred since the time.
+                * `until` - show errors, first occurred until the time.
+                * `name` - application name glob pattern.
+                * `exception` - exception class glob pattern.
+                * `module` - module of the application top frame.
+                * `jobs` - number of decoding processes.
 
         Returns:
             Exit code.
         """
-        prefix = ns.prefix
-        # Check if the directory exists
-        code = self.__check_dir(prefix)
+        jobs = self.get_jobs(ns.jobs)
+        where = self.get_filter(ns)
+        if jobs is None or where is None or not self.check_limit(ns.limit):
+            return ExitCode.INVALID_ARGS
+        code, storages = self.__open_storages(ns)
         if code != ExitCode.OK:
             return code
-        # Resolve expressions
-        fp_expr = ns.fingerprints if ns.fingerprints else ["*"]
-        try:
-            fingerprints = list(self.iter_fingerprints(fp_expr, prefix))
-        except SyntaxError as e:
-            print(f"ERROR: Invalid expression {e!s}")
-            return ExitCode.SYNTAX
-        # Build index
-        index = self.get_index(prefix)
-        # Read files
-        r: list[ListItem] = []
-        faults = 0
-        default_ts = datetime.datetime.now()
-        for fp in fingerprints:
-            fn = index.get(fp)
-            if not fn:
-                print(f"ERROR: {fp} is not found")
-                faults += 1
-                continue
-            info = self.read_info(os.path.join(prefix, fn))
-            if not info:
-                faults += 1
-                continue
-            # Get place
-            top = info.get_app_top_frame()
-            if top and top.source:
-                place = f"{top.source.file_name}:{top.source.current_line}"
-            else:
-                place = "unknown"
-            r.append(
-                ListItem(
-                    fingerprint=str(info.fingerprint),
-                    exception=str(info.exception),
-                    name=info.name,
-                    ts=info.timestamp or default_ts,
-                    place=place,
+        faults: list[str] = []
+        if not ns.fingerprints and len(storages) == 1:
+            # Filter, sort, and limit by the storage
+            r = list(
+                self.iter_items(
+                    self.select_summary(
+                        storages[0],
+                        where,
+                        jobs,
+                        faults,
+                        SORT_KEYS[ns.sort],
+                        ns.reverse,
+                        ns.limit,
+                    )
+                )
+            )
+        else:
+            # Resolve expressions
+            try:
+                fingerprints = list(
+                    self.iter_fingerprints(ns.fingerprints or ["*"], storages)
                 )
+            except SyntaxError as e:
+                print(f"ERROR: Invalid expression {e!s}")
+                return ExitCode.SYNTAX
+            # Read, filter, and sort summaries
+            r = self.sort_items(
+                self.iter_items(
+                    self.iter_summary(
+                        storages, fingerprints, where, jobs, faults
+                    )
+                ),
+                ns.sort,
+                ns.reverse,
+                ns.limit,
             )
-        # Get sort key
-        # @todo: Make configurable
-        sort_key = attrgetter("ts")
         # Print
         W_FINGER = 36
         W_EXCEPTION = 20
         W_SERVICE = 29
-        W_TS = 30
+        W_COUNT = 6
+        W_TS = 26
         W_PLACE = 50
         print(
             " ".join(
@@ -242,7 +322,9 @@ class Cli:
                     self.col("Fingerprint", W_FINGER),
                     self.col("Exception", W_EXCEPTION),
                     self.col("Service", W_SERVICE),
-                    self.col("Time", W_TS),
+                    self.col("Count", W_COUNT),
+                    self.col("First Seen", W_TS),
+                    self.col("Last Seen", W_TS),
                     self.col("Place", W_PLACE),
                 ]
             )
@@ -253,19 +335,23 @@ class Cli:
                     "-" * W_FINGER,
                     "-" * W_EXCEPTION,
                     "-" * W_SERVICE,
+                    "-" * W_COUNT,
+                    "-" * W_TS,
                     "-" * W_TS,
                     "-" * W_PLACE,
                 ]
             )
         )
-        for item in sorted(r, key=sort_key, reverse=False):
+        for item in r:
             print(
                 " ".join(
                     [
                         self.col(str(item.fingerprint), W_FINGER),
                         self.col(item.exception, W_EXCEPTION),
                         self.col(item.name, W_SERVICE),
+                        self.col(str(item.count), W_COUNT),
                         self.col(item.ts.isoformat(), W_TS),
+                        self.col(item.last_seen.isoformat(), W_TS),
                         self.rcol(item.place, W_PLACE),
                     ]
                 )
@@ -273,22 +359,207 @@ class Cli:
         return ExitCode.OK if not faults else ExitCode.CANNOT_READ
 
     @staticmethod
-    def iter_fingerprints(items: list[str], prefix: str) -> Iterable[str]:
+    def iter_items(summaries: Iterable[Summary]) -> Iterable[ListItem]:
+        """Convert summaries to the list items.
+
+        Missed timestamps are replaced with the current time.
+
+        Args:
+            summaries: Iterable of summaries.
+
+        Returns:
+            Yields ListItem instances.
+        """
+        default_ts = datetime.datetime.now()
+        for s in summaries:
+            yield ListItem(
+                fingerprint=s.fingerprint,
+                exception=s.exception,
+                name=s.name,
+                ts=s.ts or default_ts,
+                place=s.place,
+                count=s.count,
+                last_seen=s.last_seen or s.ts or default_ts,
+            )
+
+    @staticmethod
+    def sort_items(
+        items: Iterable[ListItem],
+        sort: str,
+        reverse: bool = False,
+        limit: int | None = None,
+    ) -> list[ListItem]:
+        """Sort the list items.
+
+        The bounded heap is used for the top-N.
+
+        Args:
+            items: Iterable of list items.
+            sort: Sort key, one of `SORT_KEYS`.
+            reverse: Reverse sort order.
+            limit: Maximal number of items.
+
+        Returns:
+            Sorted list of items.
+        """
+        sort_key = attrgetter(SORT_KEYS[sort])
+        if limit is None:
+            return sorted(items, key=sort_key, reverse=reverse)
+        import heapq
+
+        pick = heapq.nlargest if reverse else heapq.nsmallest
+        return pick(limit, items, key=sort_key)
+
+    @classmethod
+    def iter_summary(
+        cls: type["Cli"],
+        storages: list[BaseStorage],
+        fingerprints: list[str],
+        where: SummaryFilter,
+        jobs: int,
+        faults: list[str],
+    ) -> Iterable[Summary]:
+        """Iterate the summaries, matching the filter.
+
+        Errors are printed.
+
+        Args:
+            storages: List of storages.
+            fingerprints: List of fingerprints.
+            where: Summary filter.
+            jobs: Number of decoding processes.
+            faults: List, collecting missed and unreadable fingerprints.
+
+        Returns:
+            Yields Summary instances.
+        """
+
+        def on_error(fp: str, e: Exception) -> None:
+            faults.append(fp)
+            cls.on_read_error(fp, e)
+
+        rest = set(fingerprints)
+        for storage, found in cls.iter_found(storages, fingerprints):
+            rest.difference_update(found)
+            yield from storage.iter_summary(found, on_error, jobs, where)
+        faults.extend(rest)
+
+    @classmethod
+    def select_summary(
+        cls: type["Cli"],
+        storage: BaseStorage,
+        where: SummaryFilter,
+        jobs: int,
+        faults: list[str],
+        order: str | None = None,
+        reverse: bool = False,
+        limit: int | None = None,
+    ) -> Iterable[Summary]:
+        """Get summaries of all records, matching the filter.
+
+        Errors are printed.
+
+        Args:
+            storage: Storage.
+            where: Summary filter.
+            jobs: Number of decoding processes.
+            faults: List, collecting unreadable fingerprints.
+            order: Optional summary field to sort by.
+            reverse: Sort in descending order.
+            limit: Maximal number of summaries.
+
+        Returns:
+            Iterable of Summary instances.
+        """
+
+        def on_error(fp: str, e: Exception) -> None:
+            faults.append(fp)
+            cls.on_read_error(fp, e)
+
+        return storage.select_summary(
+            where, order, reverse, limit, on_error, jobs
+        )
+
+    @classmethod
+    def get_filter(
+        cls: type["Cli"], ns: argparse.Namespace
+    ) -> SummaryFilter | None:
+        """Build summary filter from the options.
+
+        Errors are printed.
+
+        Args:
+            ns: argsparse.Namespace with fields:
+
+                * `since` - errors, occurred since the time.
+                * `until` - errors, first occurred until the time.
+                * `name` - application name glob pattern.
+                * `exception` - exception class glob pattern.
+                * `module` - module of the application top frame.
+
+        Returns:
+            * Summary filter.
+            * None, if the options are invalid.
+        """
+        try:
+            return SummaryFilter(
+                since=cls.parse_time(ns.since) if ns.since else None,
+                until=cls.parse_time(ns.until) if ns.until else None,
+                name=ns.name,
+                exception=ns.exception,
+                module=ns.module,
+            )
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            return None
+
+    @staticmethod
+    def check_limit(limit: int | None) -> bool:
+        """Check the number of shown items.
+
+        Errors are printed.
+
+        Args:
+            limit: Maximal number of items, if set.
+
+        Returns:
+            True, if the limit is valid.
+        """
+        if limit is not None and limit < 0:
+            print(f"ERROR: Invalid limit: {limit}")
+            return False
+        return True
+
+    @staticmethod
+    def iter_fingerprints(
+        items: list[str], storages: list[BaseStorage]
+    ) -> Iterable[str]:
         """Resolve fingerprint expressions and iterate result.
 
         Fingerprint expressions is a list user-defined expressions
         passed via command line. Each item may be:
 
         * `<UUID>` - single fingerprint
+        * `<prefix>` - single fingerprint, starting with at least
+          `MIN_PREFIX` characters, like `3f2a9c`.
         * `all` or `*` - all errors
 
+        Stored fingerprints are collected into the sorted index once,
+        on the first prefix or `all` expression, and prefixes are looked
+        up by the binary search. Prefixes, matching no fingerprints,
+        are yielded as is to be reported as missed.
+
         Args:
             items: List of expressions.
-            prefix: Error info directory
+            storages: Error info storages.
 
         Returns:
             Yields all resolved fingerprints.
+
+        Raises:
+            SyntaxError: On invalid expression or ambiguous prefix.
         """
+        cache: list[list[str]] = []
 
         def is_uuid(fp: str) -> bool:
             """Check string is uuid."""
@@ -298,12 +569,19 @@ class Cli:
             except ValueError:
                 return False
 
-        def resolve_all() -> Iterable[str]:
-            """Resolve all fingerprints."""
-            for n in os.listdir(prefix):
-                fp = n.split(".")[0]
-                if is_uuid(fp):
-                    yield fp
+        def get_index() -> list[str]:
+            """Get sorted fingerprint index."""
+            if not cache:
+                cache.append(
+                    sorted(
+                        {
+                            fp
+                            for storage in storages
+                            for fp in storage.iter_fingerprints()
+                        }
+                    )
+                )
+            return cache[0]
 
         def iter_resolve(expr: str) -> Iterable[str]:
             """Resolve single expression.
@@ -315,10 +593,14 @@ class Cli:
                 Yield all resolved fingerprints.
             """
             if expr in ("all", "*"):
-                yield from resolve_all()
+                yield from get_index()
             elif is_uuid(expr):
                 # Single fingerprint
                 yield expr
+            elif len(expr) >= MIN_PREFIX and PREFIX_CHARS.issuperset(
+                expr.lower()
+            ):
+                yield Cli.resolve_prefix(expr.lower(), get_index())
             else:
                 # Invalid fingerprint
                 raise SyntaxError(expr)
@@ -328,6 +610,36 @@ class Cli:
             seen.update(iter_resolve(expr))
         yield from seen
 
+    @staticmethod
+    def resolve_prefix(prefix: str, index: list[str]) -> str:
+        """Resolve fingerprint prefix.
+
+        Args:
+            prefix: Lowercase fingerprint prefix.
+            index: Sorted list of fingerprints.
+
+        Returns:
+            * Matched fingerprint.
+            * The prefix, if no fingerprints are matched.
+
+        Raises:
+            SyntaxError: If the prefix is ambiguous.
+        """
+        pos = bisect_left(index, prefix)
+        matched = [
+            fp
+            for fp in islice(index, pos, pos + MAX_CANDIDATES)
+            if fp.startswith(prefix)
+        ]
+        if not matched:
+            return prefix
+        if len(matched) > 1:
+            msg = f"{prefix}: ambiguous prefix of {', '.join(matched)}"
+            if len(matched) == MAX_CANDIDATES:
+                msg += ", ..."
+            raise SyntaxError(msg)
+        return matched[0]
+
     @staticmethod
     def get_index(prefix: str) -> dict[str, str]:
         """Get fingerprint index.
@@ -338,7 +650,464 @@ class Cli:
         Returns:
             Dict of fingerprint -> file name
         """
-        return {fn.split(".")[0]: fn for fn in os.listdir(prefix)}
+        from .storage.directory import DirectoryStorage
+
+        return DirectoryStorage(prefix).get_index()
+
+    @staticmethod
+    def get_storages(
+        prefix: str | None, db: str | None = None
+    ) -> list[BaseStorage]:
+        """Get error info storages.
+
+        Args:
+            prefix: Error Info directory prefix
+            db: SQLite database path. Overrides `prefix`, if set.
+
+        Returns:
+            List of storages.
+
+        Raises:
+            ValueError: If the database cannot be opened.
+        """
+        if db:
+            from .storage.sqlite import SqliteStorage
+
+            return [SqliteStorage(db)]
+        if not prefix:
+            return []
+        from .storage.directory import DirectoryStorage
+        from .storage.segment import SegmentStorage
+
+        storage = DirectoryStorage(prefix)
+        r: list[BaseStorage] = [storage]
+        # Reuse the directory scan
+        if SegmentStorage.exists(prefix, storage.get_names()):
+            r.append(SegmentStorage(prefix))
+        return r
+
+    @staticmethod
+    def iter_found(
+        storages: list[BaseStorage], fingerprints: Iterable[str]
+    ) -> Iterable[tuple[BaseStorage, list[str]]]:
+        """Find fingerprints in the storages.
+
+        Missed fingerprints are printed.
+
+        Args:
+            storages: List of storages.
+            fingerprints: Iterable of fingerprints.
+
+        Returns:
+            Yields (`storage`, `fingerprints`) for each storage
+            containing any of the fingerprints.
+        """
+        rest = set(fingerprints)
+        for storage in storages:
+            if not rest:
+                break
+            found = storage.find(rest)
+            if found:
+                rest -= found
+                yield storage, sorted(found)
+        for fp in sorted(rest):
+            print(f"ERROR: {fp} is not found")
+
+    @staticmethod
+    def on_read_error(fp: str, e: Exception) -> None:
+        """Print record read error.
+
+        Args:
+            fp: Stringified fingerprint.
+            e: Exception.
+        """
+        print(f"ERROR: Cannot read {fp}: {e}")
+
+    @classmethod
+    def iter_data(
+        cls: type["Cli"],
+        storages: list[BaseStorage],
+        fingerprints: Iterable[str],
+        occurrence: int = 0,
+    ) -> Iterable[tuple[str, bytes]]:
+        """Read records from the storages.
+
+        Errors are printed.
+
+        Args:
+            storages: List of storages.
+            fingerprints: Iterable of fingerprints.
+            occurrence: Stored occurrence index, `0` - the first one,
+                negative values count from the latest one.
+
+        Returns:
+            Yields (`fingerprint`, `data`) for readable records.
+        """
+        for storage, found in cls.iter_found(storages, fingerprints):
+            if not occurrence:
+                yield from storage.iter_read(found, cls.on_read_error)
+                continue
+            for fp in found:
+                try:
+                    data = storage.read_occurrence(fp, occurrence)
+                except ValueError as e:
+                    cls.on_read_error(fp, e)
+                    continue
+                if data is None:
+                    print(f"ERROR: {fp} has no occurrence {occurrence}")
+                    continue
+                yield fp, data
+
+    @classmethod
+    def iter_info(
+        cls: type["Cli"],
+        storages: list[BaseStorage],
+        fingerprints: Iterable[str],
+        occurrence: int = 0,
+        jobs: int = 1,
+    ) -> Iterable[ErrorInfo]:
+        """Read error info from the storages.
+
+        Errors are printed.
+
+        Args:
+            storages: List of storages.
+            fingerprints: Iterable of fingerprints.
+            occurrence: Stored occurrence index, `0` - the first one,
+                negative values count from the latest one.
+            jobs: Number of decoding processes. Occurrences
+                are decoded sequentially.
+
+        Returns:
+            Yields [ErrorInfo][gufo.err.ErrorInfo] instances
+            for readable records.
+        """
+        if occurrence:
+            from .codec import from_json
+
+            for _, data in cls.iter_data(storages, fingerprints, occurrence):
+                yield from_json(data.decode())
+            return
+        for storage, found in cls.iter_found(storages, fingerprints):
+            for _, info in storage.iter_info(found, cls.on_read_error, jobs):
+                yield info
+
+    @staticmethod
+    def get_jobs(jobs: int) -> int | None:
+        """Resolve the number of decoding processes.
+
+        Errors are printed.
+
+        Args:
+            jobs: Requested number of processes, `0` - number of CPUs.
+
+        Returns:
+            * Number of processes.
+            * None, if the number is invalid.
+        """
+        if jobs < 0:
+            print(f"ERROR: Invalid number of jobs: {jobs}")
+            return None
+        return jobs or os.cpu_count() or 1
+
+    def handle_stats(self, ns: argparse.Namespace) -> ExitCode:
+        """Show the statistics of the registered errors.
+
+        Args:
+            ns: argsparse.Namespace with fields:
+
+                * `prefix` - directory of errorinfo files.
+                * `db` - SQLite database path, overrides `prefix`.
+                * `fingerprints` - list of fingerprint expressions.
+                * `format` - output format: `text` or `json`.
+                * `limit` - maximal number of keys per group.
+                * `since`, `until`, `name`, `exception`, `module` -
+                  summary filter, same as for `list`.
+                * `jobs` - number of decoding processes.
+
+        Returns:
+            Exit code.
+        """
+        jobs = self.get_jobs(ns.jobs)
+        where = self.get_filter(ns)
+        if jobs is None or where is None or not self.check_limit(ns.limit):
+            return ExitCode.INVALID_ARGS
+        code, storages = self.__open_storages(ns)
+        if code != ExitCode.OK:
+            return code
+        faults: list[str] = []
+        summaries: Iterable[Summary]
+        if not ns.fingerprints and len(storages) == 1:
+            summaries = self.select_summary(storages[0], where, jobs, faults)
+        else:
+            fp_expr = ns.fingerprints or ["*"]
+            try:
+                fingerprints = list(self.iter_fingerprints(fp_expr, storages))
+            except SyntaxError as e:
+                print(f"ERROR: Invalid expression {e!s}")
+                return ExitCode.SYNTAX
+            summaries = self.iter_summary(
+                storages, fingerprints, where, jobs, faults
+            )
+        import json
+
+        from .stats import Stats
+
+        stats = Stats().update(summaries)
+        if ns.format == "json":
+            print(json.dumps(stats.to_dict(ns.limit)))
+        else:
+            self.print_stats(stats, ns.limit)
+        return ExitCode.OK if not faults else ExitCode.CANNOT_READ
+
+    def print_stats(self, stats: "Stats", limit: int | None) -> None:
+        """Print statistics tables.
+
+        Args:
+            stats: Statistics.
+            limit: Maximal number of keys per group.
+        """
+        W_KEY = 50
+        W_RECORDS = 7
+        W_OCCURRENCES = 11
+        print(f"Records: {stats.records}, occurrences: {stats.occurrences}")
+        for group in stats.groups:
+            print()
+            print(
+                " ".join(
+                    [
+                        self.col(group.capitalize(), W_KEY),
+                        self.col("Records", W_RECORDS),
+                        self.col("Occurrences", W_OCCURRENCES),
+                    ]
+                )
+            )
+            print(
+                " ".join(["-" * W_KEY, "-" * W_RECORDS, "-" * W_OCCURRENCES])
+            )
+            for key, records, occurrences in stats.top(group, limit):
+                print(
+                    " ".join(
+                        [
+                            self.rcol(key, W_KEY),
+                            self.col(str(records), W_RECORDS),
+                            self.col(str(occurrences), W_OCCURRENCES),
+                        ]
+                    )
+                )
+
+    def handle_export(self, ns: argparse.Namespace) -> ExitCode:
+        """Export the records as newline-delimited JSON.
+
+        Errors are printed to stderr, so the output may be piped.
+
+        Args:
+            ns: argsparse.Namespace with fields:
+
+                * `prefix` - directory of errorinfo files.
+                * `db` - SQLite database path, overrides `prefix`.
+                * `fingerprints` - list of fingerprint expressions.
+                * `output` - output file, stdout if not set.
+                * `compress` - output compression format. Detected
+                  by the output file extension, if not set.
+                * `summary` - export summaries instead of the full records.
+                * `since`, `until`, `name`, `exception`, `module` -
+                  summary filter, same as for `list`.
+                * `jobs` - number of decoding processes.
+
+        Returns:
+            Exit code.
+        """
+        jobs = self.get_jobs(ns.jobs)
+        where = self.get_filter(ns)
+        if jobs is None or where is None:
+            return ExitCode.INVALID_ARGS
+        fmt = ns.compress
+        if fmt is None and ns.output:
+            fmt = Compressor.get_format(ns.output)
+        try:
+            compressor = Compressor(format=fmt)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            return ExitCode.INVALID_ARGS
+        code, storages = self.__open_storages(ns)
+        if code != ExitCode.OK:
+            return code
+        fp_expr = ns.fingerprints if ns.fingerprints else ["*"]
+        try:
+            fingerprints = list(self.iter_fingerprints(fp_expr, storages))
+        except SyntaxError as e:
+            print(f"ERROR: Invalid expression {e!s}")
+            return ExitCode.SYNTAX
+        faults: list[str] = []
+        lines = self.iter_export(
+            storages, fingerprints, where, jobs, faults, ns.summary
+        )
+        stdout = sys.stdout
+        try:
+            with contextlib.redirect_stdout(sys.stderr):
+                if ns.output:
+                    with open(ns.output, "wb") as f:
+                        self.write_lines(f.write, lines, compressor)
+                else:
+                    stdout.flush()
+                    self.write_lines(stdout.buffer.write, lines, compressor)
+                    stdout.buffer.flush()
+        except OSError as e:
+            print(f"ERROR: Cannot write {ns.output}: {e}")
+            return ExitCode.CANNOT_WRITE
+        return ExitCode.OK if not faults else ExitCode.CANNOT_READ
+
+    @classmethod
+    def iter_export(
+        cls: type["Cli"],
+        storages: list[BaseStorage],
+        fingerprints: list[str],
+        where: SummaryFilter,
+        jobs: int,
+        faults: list[str],
+        summary: bool = False,
+    ) -> Iterable[str]:
+        """Iterate JSON-encoded records, matching the filter.
+
+        Full records are selected by their summaries,
+        if the filter is set.
+
+        Errors are printed.
+
+        Args:
+            storages: List of storages.
+            fingerprints: List of fingerprints.
+            where: Summary filter.
+            jobs: Number of decoding processes.
+            faults: List, collecting missed and unreadable fingerprints.
+            summary: Encode summaries instead of the full records.
+
+        Returns:
+            Yields JSON strings.
+        """
+        import json
+
+        if summary:
+            for s in cls.iter_summary(
+                storages, fingerprints, where, jobs, faults
+            ):
+                yield json.dumps(s.to_dict())
+            return
+        if where != SummaryFilter():
+            fingerprints = [
+                s.fingerprint
+                for s in cls.iter_summary(
+                    storages, fingerprints, where, jobs, faults
+                )
+            ]
+
+        def on_error(fp: str, e: Exception) -> None:
+            faults.append(fp)
+            cls.on_read_error(fp, e)
+
+        from .codec import to_dict
+
+        rest = set(fingerprints)
+        for storage, found in cls.iter_found(storages, fingerprints):
+            rest.difference_update(found)
+            for _, info in storage.iter_info(found, on_error, jobs):
+                yield json.dumps(to_dict(info))
+        faults.extend(rest)
+
+    @staticmethod
+    def write_lines(
+        write: Callable[[bytes], object],
+        lines: Iterable[str],
+        compressor: Compressor,
+    ) -> None:
+        """Write lines by the compressed chunks.
+
+        Lines are grouped into the chunks of about `EXPORT_CHUNK`
+        bytes and each chunk is compressed separately.
+        Concatenated compressed streams are valid for all
+        supported formats, so memory usage does not depend
+        on the number of lines.
+
+        Args:
+            write: Output write function.
+            lines: Iterable of lines without the line feeds.
+            compressor: Output compressor.
+        """
+        chunk: list[bytes] = []
+        size = 0
+        for line in lines:
+            data = line.encode() + b"\n"
+            chunk.append(data)
+            size += len(data)
+            if size >= EXPORT_CHUNK:
+                write(compressor.encode(b"".join(chunk)))
+                chunk = []
+                size = 0
+        if chunk:
+            write(compressor.encode(b"".join(chunk)))
+
+    def handle_grep(self, ns: argparse.Namespace) -> ExitCode:
+        """Search the pattern in the stored errors.
+
+        Args:
+            ns: argsparse.Namespace with fields:
+
+                * `prefix` - directory of errorinfo files.
+                * `db` - SQLite database path, overrides `prefix`.
+                * `pattern` - searched pattern.
+                * `scope` - list of searched scopes, all if not set.
+                * `fixed_strings` - treat pattern as the plain string.
+                * `ignore_case` - case-insensitive search.
+                * `files_with_matches` - show only fingerprints.
+                * `jobs` - number of searching processes.
+                * `fingerprints` - list of fingerprint expressions.
+
+        Returns:
+            Exit code.
+        """
+        jobs = self.get_jobs(ns.jobs)
+        if jobs is None:
+            return ExitCode.INVALID_ARGS
+        from .grep import Grep
+
+        try:
+            grep = Grep(
+                ns.pattern,
+                scopes=ns.scope,
+                fixed=ns.fixed_strings,
+                ignore_case=ns.ignore_case,
+            )
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            return ExitCode.INVALID_ARGS
+        code, storages = self.__open_storages(ns)
+        if code != ExitCode.OK:
+            return code
+        fp_expr = ns.fingerprints if ns.fingerprints else ["*"]
+        try:
+            fingerprints = list(self.iter_fingerprints(fp_expr, storages))
+        except SyntaxError as e:
+            print(f"ERROR: Invalid expression {e!s}")
+            return ExitCode.SYNTAX
+        faults: list[str] = []
+
+        def on_error(fp: str, e: Exception) -> None:
+            faults.append(fp)
+            self.on_read_error(fp, e)
+
+        rest = set(fingerprints)
+        for storage, found in self.iter_found(storages, sorted(fingerprints)):
+            rest.difference_update(found)
+            for fp, (scope, text) in storage.iter_match(
+                found, grep, on_error, jobs
+            ):
+                if ns.files_with_matches:
+                    print(fp)
+                else:
+                    print(f"{fp} {scope}: {text.strip()}")
+        faults.extend(rest)
+        return ExitCode.OK if not faults else ExitCode.CANNOT_READ
 
     def handle_view(self, ns: argparse.Namespace) -> ExitCode:
         """Show the details of the selected errors.
@@ -347,17 +1116,25 @@ class Cli:
             ns: argsparse.Namespace with fields:
 
                 * `prefix` - directory of errorinfo files.
+                * `db` - SQLite database path, overrides `prefix`.
                 * `format` - output format:
 
                     * `terse`
                     * `extend`
 
+                * `occurrence` - stored occurrence index.
+                * `jobs` - number of decoding processes.
                 * `fingerprints` - List of fingerprint expressions.
 
         Returns:
             Exit code.
         """
+        jobs = self.get_jobs(ns.jobs)
+        if jobs is None:
+            return ExitCode.INVALID_ARGS
         # Get formatter
+        from .formatter.loader import get_formatter
+
         try:
             formatter = get_formatter(ns.format)
         except ValueError:
@@ -366,98 +1143,713 @@ class Cli:
                 "Must be one of: terse, extend"
             )
             return ExitCode.INVALID_ARGS
-        prefix = ns.prefix
-        # Check if the directory exists
-        code = self.__check_dir(prefix)
+        code, storages = self.__open_storages(ns)
         if code != ExitCode.OK:
             return code
         # Resolve expressions
         try:
             fingerprints = list(
-                self.iter_fingerprints(ns.fingerprints, prefix)
+                self.iter_fingerprints(ns.fingerprints, storages)
             )
         except SyntaxError as e:
             print(f"ERROR: Invalid expression {e!s}")
             return ExitCode.SYNTAX
-        # List all files
-        index = self.get_index(prefix)
-        faults = 0
-        for fp in fingerprints:
-            path = index.get(fp)
-            if not path:
-                print(f"{fp} is not found")
-                faults += 1
-                continue
-            info = self.read_info(os.path.join(prefix, path))
-            if info is None:
-                faults += 1
-                continue
+        n = 0
+        for info in self.iter_info(
+            storages, fingerprints, ns.occurrence, jobs
+        ):
             # Format output through middleware
             print(formatter.format(info))
+            n += 1
+        faults = len(fingerprints) - n
         return ExitCode.OK if not faults else ExitCode.CANNOT_READ
 
-    def handle_clear(self, ns: argparse.Namespace) -> ExitCode:
-        """Clear selected errors.
+    def handle_watch(self, ns: argparse.Namespace) -> ExitCode:
+        """Show the new and the repeated errors as they arrive.
+
+        Stored fingerprints and their occurrence counters are
+        remembered on start, then the storages are polled for
+        the new records, which are decoded and printed, and
+        for the increased counters of the known records.
+        Runs until interrupted.
 
         Args:
             ns: argsparse.Namespace with fields:
 
                 * `prefix` - directory of errorinfo files.
-                * `fingerprints` - List of fingerprint expressions.
+                * `db` - SQLite database path, overrides `prefix`.
+                * `format` - output format: `terse`, `extend`.
+                * `interval` - polling interval, in seconds.
 
         Returns:
             Exit code.
         """
-        prefix = ns.prefix
-        # Check if the directory exists
-        code = self.__check_dir(prefix)
+        if ns.interval <= 0:
+            print(f"ERROR: Invalid interval: {ns.interval}")
+            return ExitCode.INVALID_ARGS
+        from .formatter.loader import get_formatter
+
+        try:
+            formatter = get_formatter(ns.format)
+        except ValueError:
+            print(
+                f"ERROR: Invalid format {ns.format}. "
+                "Must be one of: terse, extend"
+            )
+            return ExitCode.INVALID_ARGS
+        code, storages = self.__open_storages(ns)
+        if code != ExitCode.OK:
+            return code
+        # Remember the stored records and their counters
+        known: set[str] = set()
+        counts: dict[str, int] = {}
+        for storage in storages:
+            self.report_repeated(
+                storage, list(storage.iter_new(known)), counts
+            )
+        try:
+            while True:
+                time.sleep(ns.interval)
+                for storage in storages:
+                    updated: set[str] = set()
+                    new = list(storage.iter_new(known, updated))
+                    for _, info in storage.iter_info(new, self.on_read_error):
+                        print(formatter.format(info), flush=True)
+                    self.report_repeated(storage, [*new, *updated], counts)
+        except KeyboardInterrupt:
+            pass
+        return ExitCode.OK
+
+    @staticmethod
+    def report_repeated(
+        storage: BaseStorage, fingerprints: list[str], counts: dict[str, int]
+    ) -> None:
+        """Print the errors with the increased occurrence counters.
+
+        Storages, which do not count the occurrences, are skipped.
+
+        Args:
+            storage: Storage.
+            fingerprints: List of the new or changed fingerprints.
+            counts: Remembered occurrence counters, updated in place.
+                Fingerprints, which are not remembered yet, are
+                not printed.
+        """
+        if not storage.counts_occurrences:
+            return
+        for s in storage.iter_summary(fingerprints, on_error=lambda *_: None):
+            prev = counts.get(s.fingerprint)
+            counts[s.fingerprint] = s.count
+            if prev is not None and s.count > prev:
+                last_seen = s.last_seen or s.ts
+                print(
+                    f"{s.fingerprint} {s.exception}: repeated "
+                    f"{s.count - prev} times, {s.count} total, last seen "
+                    f"{last_seen.isoformat() if last_seen else 'unknown'}",
+                    flush=True,
+                )
+
+    def handle_serve(self, ns: argparse.Namespace) -> ExitCode:
+        """Serve the read-only HTTP viewer.
+
+        Runs until interrupted.
+
+        Args:
+            ns: argsparse.Namespace with fields:
+
+                * `prefix` - directory of errorinfo files.
+                * `db` - SQLite database path, overrides `prefix`.
+                * `host` - listened address.
+                * `port` - listened port.
+                * `interval` - minimal index refresh interval, in seconds.
+                * `cache_size` - number of the cached decoded records.
+
+        Returns:
+            Exit code.
+        """
+        code, storages = self.__open_storages(ns)
+        if code != ExitCode.OK:
+            return code
+        from .server import ErrorIndex, ErrorServer
+
+        try:
+            index = ErrorIndex(
+                storages, cache_size=ns.cache_size, interval=ns.interval
+            )
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            return ExitCode.INVALID_ARGS
+        index.refresh()
+        try:
+            server = ErrorServer((ns.host, ns.port), index)
+        except OSError as e:
+            print(f"ERROR: Cannot listen {ns.host}:{ns.port}: {e}")
+            return ExitCode.INVALID_ARGS
+        host, port = server.server_address[:2]
+        print(f"Serving on http://{host!s}:{port}/", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return ExitCode.OK
+
+    def handle_clear(self, ns: argparse.Namespace) -> ExitCode:
+        """Clear selected errors.
+
+        Errors, selected by the fingerprint expressions, are narrowed
+        by the age and the summary filter. All errors are selected
+        by the age or the filter, when no expressions are given.
+
+        Args:
+            ns: argsparse.Namespace with fields:
+
+                * `prefix` - directory of errorinfo files.
+                * `db` - SQLite database path, overrides `prefix`.
+                * `fingerprints` - List of fingerprint expressions.
+                * `older_than` - errors, last occurred before the duration.
+                * `since` - errors, occurred since the time.
+                * `until` - errors, first occurred until the time.
+                * `name` - application name glob pattern.
+                * `exception` - exception class glob pattern.
+                * `module` - module of the application top frame.
+                * `dry_run` - show selected errors without removing.
+                * `jobs` - number of parallel deletes.
+
+        Returns:
+            Exit code.
+        """
+        jobs = self.get_jobs(ns.jobs)
+        where = self.get_filter(ns)
+        if jobs is None or where is None:
+            return ExitCode.INVALID_ARGS
+        try:
+            cutoff = self.get_cutoff(ns.older_than)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            return ExitCode.INVALID_ARGS
+        code, storages = self.__open_storages(ns)
         if code != ExitCode.OK:
             return code
         # Resolve expressions
+        fp_expr = ns.fingerprints
+        if not fp_expr and (where != SummaryFilter() or cutoff):
+            fp_expr = ["*"]
+        try:
+            fingerprints = list(self.iter_fingerprints(fp_expr, storages))
+        except SyntaxError as e:
+            print(f"ERROR: Invalid expression {e!s}")
+            return ExitCode.SYNTAX
+        # Select
+        faults: list[str] = []
+        selected = list(
+            self.iter_selected(
+                storages, fingerprints, where, cutoff, jobs, faults
+            )
+        )
+        if ns.dry_run:
+            self.print_selected(selected)
+            return ExitCode.OK if not faults else ExitCode.CANNOT_READ
+
+        # Remove
+        def on_error(fp: str, e: Exception) -> None:
+            faults.append(fp)
+            print(f"ERROR: Cannot remove {fp}: {e}")
+
+        for storage, found in selected:
+            storage.delete_many(found, on_error, jobs)
+        return ExitCode.OK if not faults else ExitCode.CANNOT_READ
+
+    @staticmethod
+    def print_selected(selected: list[tuple[BaseStorage, list[str]]]) -> None:
+        """Print the records, which would be removed.
+
+        Args:
+            selected: List of (`storage`, `fingerprints`).
+        """
+        for _, found in selected:
+            for fp in found:
+                print(fp)
+        n = sum(len(found) for _, found in selected)
+        print(f"{n} records would be removed")
+
+    @classmethod
+    def iter_selected(
+        cls: type["Cli"],
+        storages: list[BaseStorage],
+        fingerprints: list[str],
+        where: SummaryFilter,
+        cutoff: datetime.datetime | None,
+        jobs: int,
+        faults: list[str],
+    ) -> Iterable[tuple[BaseStorage, list[str]]]:
+        """Select the stored records by the filter and the age.
+
+        Records are selected without decoding, when
+        the storage allows. Errors are printed.
+
+        Args:
+            storages: List of storages.
+            fingerprints: List of fingerprints.
+            where: Summary filter.
+            cutoff: Select records, last modified before the time.
+            jobs: Number of decoding processes.
+            faults: List, collecting missed and unreadable fingerprints.
+
+        Returns:
+            Yields (`storage`, `fingerprints`) of the selected records.
+        """
+
+        def on_error(fp: str, e: Exception) -> None:
+            faults.append(fp)
+            cls.on_read_error(fp, e)
+
+        is_filtered = where != SummaryFilter()
+        rest = set(fingerprints)
+        for storage, found in cls.iter_found(storages, fingerprints):
+            rest.difference_update(found)
+            selected = found
+            if is_filtered:
+                selected = [
+                    s.fingerprint
+                    for s in storage.iter_summary(
+                        selected, on_error, jobs, where
+                    )
+                ]
+            if cutoff:
+                selected = [
+                    fp
+                    for fp, mtime in storage.iter_modified(
+                        selected, on_error, jobs
+                    )
+                    if mtime < cutoff
+                ]
+            yield storage, selected
+        faults.extend(rest)
+
+    @classmethod
+    def get_cutoff(
+        cls: type["Cli"], older_than: str | None
+    ) -> datetime.datetime | None:
+        """Get the time, selecting the records by age.
+
+        Args:
+            older_than: Age, like `7d`.
+
+        Returns:
+            * Current time minus the age.
+            * None, if the age is not set.
+
+        Raises:
+            ValueError: On invalid age.
+        """
+        if not older_than:
+            return None
+        try:
+            return datetime.datetime.now() - cls.parse_duration(older_than)
+        except OverflowError as e:
+            msg = f"Invalid duration: {older_than}"
+            raise ValueError(msg) from e
+
+    def handle_compact(self, ns: argparse.Namespace) -> ExitCode:
+        """Recompress or archive the selected errors.
+
+        Errors, selected by the fingerprint expressions, are narrowed
+        by the age and the summary filter. All errors are selected,
+        when no expressions are given.
+
+        Args:
+            ns: argsparse.Namespace with fields:
+
+                * `prefix` - directory of errorinfo files.
+                * `db` - SQLite database path, overrides `prefix`.
+                * `fingerprints` - List of fingerprint expressions.
+                * `older_than` - errors, last occurred before the duration.
+                * `since`, `until`, `name`, `exception`, `module` -
+                  summary filter, same as for `list`.
+                * `compress` - target compression format.
+                * `level` - compression level.
+                * `archive` - move the records to the segment log.
+                * `jobs` - number of compressing threads.
+
+        Returns:
+            Exit code.
+        """
+        jobs = self.get_jobs(ns.jobs)
+        where = self.get_filter(ns)
+        if jobs is None or where is None:
+            return ExitCode.INVALID_ARGS
+        if ns.archive and ns.db:
+            print("ERROR: Records in the database cannot be archived")
+            return ExitCode.INVALID_ARGS
+        try:
+            cutoff = self.get_cutoff(ns.older_than)
+            compressor = Compressor(ns.compress, ns.level)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            return ExitCode.INVALID_ARGS
+        code, storages = self.__open_storages(ns)
+        if code != ExitCode.OK:
+            return code
         try:
             fingerprints = list(
-                self.iter_fingerprints(ns.fingerprints, prefix)
+                self.iter_fingerprints(ns.fingerprints or ["*"], storages)
             )
         except SyntaxError as e:
             print(f"ERROR: Invalid expression {e!s}")
             return ExitCode.SYNTAX
-        # List all files
-        index = self.get_index(prefix)
-        faults = 0
-        for fp in fingerprints:
-            path = index.get(fp)
-            if not path:
-                print(f"{fp} is not found")
-                faults += 1
+        faults: list[str] = []
+        selected = list(
+            self.iter_selected(
+                storages, fingerprints, where, cutoff, jobs, faults
+            )
+        )
+
+        def on_error(fp: str, e: Exception) -> None:
+            faults.append(fp)
+            print(f"ERROR: Cannot compact {fp}: {e}")
+
+        if ns.archive:
+            n = self.archive(ns.prefix, selected, compressor, on_error, jobs)
+            print(f"{n} records are archived")
+        else:
+            n = sum(
+                storage.recompress(found, compressor, on_error, jobs)
+                for storage, found in selected
+            )
+            print(f"{n} records are recompressed")
+        return ExitCode.OK if not faults else ExitCode.CANNOT_READ
+
+    @staticmethod
+    def archive(
+        prefix: str,
+        selected: list[tuple[BaseStorage, list[str]]],
+        compressor: Compressor,
+        on_error: Callable[[str, Exception], None],
+        jobs: int,
+    ) -> int:
+        """Move the selected records to the segment log.
+
+        Args:
+            prefix: Error Info directory prefix.
+            selected: List of (`storage`, `fingerprints`).
+            compressor: Compressor of the archived records.
+            on_error: Callable, accepting fingerprint and exception.
+            jobs: Number of compressing threads.
+
+        Returns:
+            Number of archived records.
+        """
+        from .storage.segment import SegmentStorage
+
+        archive = SegmentStorage(prefix, compressor=compressor)
+        return sum(
+            storage.move(archive, found, on_error, jobs)
+            for storage, found in selected
+            # Segment log records are already archived
+            if not isinstance(storage, SegmentStorage)
+        )
+
+    def handle_reindex(self, ns: argparse.Namespace) -> ExitCode:
+        """Rebuild the storage indexes.
+
+        Args:
+            ns: argsparse.Namespace with fields:
+
+                * `prefix` - directory of errorinfo files.
+                * `db` - SQLite database path, overrides `prefix`.
+
+        Returns:
+            Exit code.
+        """
+        code, storages = self.__open_storages(ns)
+        if code != ExitCode.OK:
+            return code
+        for storage in storages:
+            try:
+                n = storage.reindex()
+            except OSError as e:
+                print(f"ERROR: Cannot reindex {storage.path}: {e}")
+                return ExitCode.CANNOT_WRITE
+            print(f"{n} records are indexed in {storage.path}")
+        return ExitCode.OK
+
+    def handle_migrate(self, ns: argparse.Namespace) -> ExitCode:
+        """Convert error info files to the given layout in place.
+
+        Args:
+            ns: argsparse.Namespace with fields:
+
+                * `prefix` - directory of errorinfo files.
+                * `shard_depth` - target number of shard levels.
+
+        Returns:
+            Exit code.
+        """
+        prefix = ns.prefix
+        # Check if the directory exists
+        code = self.__check_dir(prefix)
+        if code != ExitCode.OK:
+            return code
+        from .storage.directory import DirectoryStorage
+
+        try:
+            n = DirectoryStorage(prefix).migrate(ns.shard_depth)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            return ExitCode.INVALID_ARGS
+        except OSError as e:
+            print(f"ERROR: Cannot migrate {prefix}: {e}")
+            return ExitCode.CANNOT_WRITE
+        print(f"{n} records are migrated in {prefix}")
+        return ExitCode.OK
+
+    @staticmethod
+    def parse_source(source: str) -> tuple[str, str]:
+        """Parse merge source.
+
+        Args:
+            source: Source as `[<host>=]<path>`. Host is the
+                directory name, if omitted. The source is split
+                only if the host is the valid host name, so the
+                paths may contain `=`.
+
+        Returns:
+            Tuple of (host, path).
+        """
+        host, sep, path = source.partition("=")
+        if not sep or not get_rx_host().match(host):
+            path = source
+            host = os.path.basename(os.path.abspath(path))
+        return host, path
+
+    @classmethod
+    def get_sources(
+        cls: type["Cli"], sources: list[str]
+    ) -> list[tuple[str, str]] | None:
+        """Parse merge sources.
+
+        Errors are printed.
+
+        Args:
+            sources: Sources as `[<host>=]<path>`.
+
+        Returns:
+            * List of (host, path).
+            * None, if the host names are not unique.
+        """
+        r = [cls.parse_source(source) for source in sources]
+        hosts = [host for host, _ in r]
+        duplicated = sorted({host for host in hosts if hosts.count(host) > 1})
+        if duplicated:
+            print(
+                f"ERROR: Duplicated host names: {', '.join(duplicated)}. "
+                "Use <host>=<path> to set unique names"
+            )
+            return None
+        return r
+
+    def handle_merge(self, ns: argparse.Namespace) -> ExitCode:
+        """Merge error info directories of the other hosts.
+
+        Args:
+            ns: argsparse.Namespace with fields:
+
+                * `paths` - source directories as `[<host>=]<path>`,
+                  followed by the target directory.
+                * `policy` - record selection policy.
+                * `jobs` - number of copying threads.
+
+        Returns:
+            Exit code.
+        """
+        jobs = self.get_jobs(ns.jobs)
+        if jobs is None:
+            return ExitCode.INVALID_ARGS
+        if len(ns.paths) < 2:  # noqa: PLR2004
+            print("ERROR: Source and target directories must be set")
+            return ExitCode.INVALID_ARGS
+        *paths, target = ns.paths
+        sources = self.get_sources(paths)
+        if sources is None:
+            return ExitCode.INVALID_ARGS
+        from .storage.directory import DirectoryStorage
+
+        try:
+            os.makedirs(target, exist_ok=True)
+            dst = DirectoryStorage(target)
+        except OSError as e:
+            print(f"ERROR: Cannot create {target}: {e}")
+            return ExitCode.CANNOT_WRITE
+        code = ExitCode.OK
+        for host, path in sources:
+            src_code = self.__check_dir(path)
+            if src_code != ExitCode.OK:
+                code = src_code
                 continue
-            full_path = os.path.join(prefix, path)
             try:
-                os.unlink(full_path)
+                n = dst.merge(
+                    host,
+                    self.get_storages(path),
+                    DirectoryStorage.get_stamp(path),
+                    policy=ns.policy,
+                    jobs=jobs,
+                )
             except OSError as e:
-                print(f"ERROR: Cannot remove file {full_path}: {e}")
-                faults += 1
-        return ExitCode.OK if not faults else ExitCode.CANNOT_READ
+                print(f"ERROR: Cannot merge {path}: {e}")
+                return ExitCode.CANNOT_WRITE
+            if n is None:
+                print(f"{host} is already merged")
+            else:
+                print(f"{n} records are merged from {host}")
+        return code
 
     @staticmethod
-    def read_info(path: str) -> ErrorInfo | None:
-        """Read error info file.
+    def parse_duration(s: str) -> datetime.timedelta:
+        """Parse duration.
 
         Args:
-            path: JSON file path
+            s: Duration as `<number>[s|m|h|d|w]`. Seconds if unit is omitted.
 
         Returns:
-          * [ErrorInfo][gufo.err.ErrorInfo] instance,
-              if file has been read correctly.
-          * `None` otherwise.
+            Parsed duration.
+
+        Raises:
+            ValueError: On invalid, negative, or infinite duration.
         """
-        compressor = Compressor.autodetect(path)
+        mult = DURATION_UNITS.get(s[-1:], 1)
+        num = s[:-1] if s[-1:] in DURATION_UNITS else s
+        msg = f"Invalid duration: {s}"
         try:
-            with open(path, "rb") as f:
-                data = compressor.decode(f.read())
-        except FileNotFoundError:
-            print(f"ERROR: File {path} is not found")
-            return None
-        return from_json(data.decode())
+            value = float(num)
+        except ValueError as e:
+            raise ValueError(msg) from e
+        if not math.isfinite(value) or value < 0:
+            raise ValueError(msg)
+        try:
+            return datetime.timedelta(seconds=value * mult)
+        except OverflowError as e:
+            raise ValueError(msg) from e
+
+    @classmethod
+    def parse_time(cls: type["Cli"], s: str) -> datetime.datetime:
+        """Parse point in time.
+
+        Args:
+            s: ISO 8601 timestamp or the duration, counted back
+                from the current time, like `15m`.
+
+        Returns:
+            Parsed time.
+
+        Raises:
+            ValueError: On invalid time.
+        """
+        try:
+            return datetime.datetime.now() - cls.parse_duration(s)
+        except (ValueError, OverflowError):
+            pass
+        try:
+            return datetime.datetime.fromisoformat(s)
+        except ValueError as e:
+            msg = f"Invalid time: {s}"
+            raise ValueError(msg) from e
+
+    def handle_prune(self, ns: argparse.Namespace) -> ExitCode:
+        """Remove the oldest error info files, exceeding the limits.
+
+        Args:
+            ns: argsparse.Namespace with fields:
+
+                * `prefix` - directory of errorinfo files.
+                * `max_files` - maximal number of files.
+                * `max_bytes` - maximal total size of files.
+                * `max_age` - maximal age of files.
+
+        Returns:
+            Exit code.
+        """
+        if ns.max_files is None and ns.max_bytes is None and not ns.max_age:
+            print("ERROR: At least one limit must be set")
+            return ExitCode.INVALID_ARGS
+        prefix = ns.prefix
+        # Check if the directory exists
+        code = self.__check_dir(prefix)
+        if code != ExitCode.OK:
+            return code
+        from .storage.directory import DirectoryStorage
+
+        try:
+            max_age = self.parse_duration(ns.max_age) if ns.max_age else None
+            n = DirectoryStorage(prefix).prune(
+                max_files=ns.max_files, max_bytes=ns.max_bytes, max_age=max_age
+            )
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            return ExitCode.INVALID_ARGS
+        except OSError as e:
+            print(f"ERROR: Cannot prune {prefix}: {e}")
+            return ExitCode.CANNOT_WRITE
+        print(f"{n} records are pruned in {prefix}")
+        return ExitCode.OK
+
+    def handle_train_dict(self, ns: argparse.Namespace) -> ExitCode:
+        """Train compression dictionary from the collected errors.
+
+        Args:
+            ns: argsparse.Namespace with fields:
+
+                * `prefix` - directory of errorinfo files.
+                * `db` - SQLite database path, overrides `prefix`.
+                * `size` - maximal dictionary size.
+                * `fingerprints` - List of fingerprint expressions.
+
+        Returns:
+            Exit code.
+        """
+        if not HAS_ZSTD:
+            print("ERROR: Zstandard compression is not available")
+            return ExitCode.INVALID_ARGS
+        code, storages = self.__open_storages(ns)
+        if code != ExitCode.OK:
+            return code
+        # Resolve expressions
+        fp_expr = ns.fingerprints if ns.fingerprints else ["*"]
+        try:
+            fingerprints = list(self.iter_fingerprints(fp_expr, storages))
+        except SyntaxError as e:
+            print(f"ERROR: Invalid expression {e!s}")
+            return ExitCode.SYNTAX
+        # Collect samples
+        samples = [
+            data for _, data in self.iter_data(storages, fingerprints) if data
+        ]
+        if not samples:
+            print("ERROR: No samples to train the dictionary")
+            return ExitCode.CANNOT_READ
+        # Train
+        try:
+            dict_id, content = train_dict(samples, ns.size)
+        except ValueError as e:
+            print(f"ERROR: Cannot train dictionary: {e}")
+            return ExitCode.CANNOT_WRITE
+        # Write
+        dict_dir = (
+            (os.path.dirname(ns.db) or os.curdir) if ns.db else ns.prefix
+        )
+        path = get_dict_path(dict_dir, dict_id)
+        try:
+            with open(path, "wb") as f:
+                f.write(content)
+        except OSError as e:
+            print(f"ERROR: Cannot write file {path}: {e}")
+            return ExitCode.CANNOT_WRITE
+        print(
+            f"Dictionary {dict_id} is trained on {len(samples)} samples "
+            f"and written into {path}"
+        )
+        return ExitCode.OK
 
     def get_handler(
         self, name: str
@@ -474,10 +1866,195 @@ class Cli:
             and returning ExitCode.
         """
         h: Callable[[argparse.Namespace], ExitCode] = getattr(
-            self, f"handle_{name}"
+            self, f"handle_{name.replace('-', '_')}"
         )
         return h
 
+    @staticmethod
+    def add_jobs_argument(
+        parser: argparse.ArgumentParser,
+        help: str = "Number of decoding processes",
+    ) -> None:
+        """Add `-j/--jobs` option.
+
+        Args:
+            parser: Subcommand parser.
+            help: Option description.
+        """
+        parser.add_argument(
+            "-j",
+            "--jobs",
+            type=int,
+            default=1,
+            help=f"{help}, 0 - number of CPUs",
+        )
+
+    @staticmethod
+    def add_filter_arguments(parser: argparse.ArgumentParser) -> None:
+        """Add summary filter options.
+
+        Args:
+            parser: Subcommand parser.
+        """
+        parser.add_argument(
+            "--since", help="Errors, occurred since the time or like 12h"
+        )
+        parser.add_argument(
+            "--until", help="Errors, first occurred until the time or like 1d"
+        )
+        parser.add_argument("--name", help="Application name pattern")
+        parser.add_argument("--exception", help="Exception class pattern")
+        parser.add_argument(
+            "--module", help="Module of the application top frame"
+        )
+
+    def add_grep_parser(
+        self, subparsers: "argparse._SubParsersAction[argparse.ArgumentParser]"
+    ) -> None:
+        """Add `grep` subcommand.
+
+        Args:
+            subparsers: Subcommands.
+        """
+        from .grep import GREP_SCOPES
+
+        grep_parser = subparsers.add_parser(
+            "grep", help="Search the pattern in error reports"
+        )
+        grep_parser.add_argument(
+            "--in",
+            dest="scope",
+            action="append",
+            choices=GREP_SCOPES,
+            help="Searched part of the report, may be repeated",
+        )
+        grep_parser.add_argument(
+            "-F",
+            "--fixed-strings",
+            action="store_true",
+            help="Treat pattern as the plain string",
+        )
+        grep_parser.add_argument(
+            "-i",
+            "--ignore-case",
+            action="store_true",
+            help="Case-insensitive search",
+        )
+        grep_parser.add_argument(
+            "-l",
+            "--files-with-matches",
+            action="store_true",
+            help="Show only fingerprints of the matched reports",
+        )
+        self.add_jobs_argument(grep_parser, "Number of searching processes")
+        grep_parser.add_argument("pattern", help="Searched pattern")
+        grep_parser.add_argument(
+            "fingerprints",
+            nargs=argparse.REMAINDER,
+            help="Error Info fingerprint expressions",
+        )
+
+    def add_maintenance_parsers(
+        self, subparsers: "argparse._SubParsersAction[argparse.ArgumentParser]"
+    ) -> None:
+        """Add storage maintenance subcommands.
+
+        Args:
+            subparsers: Subcommands.
+        """
+        from .storage.directory import DEFAULT_SHARD_DEPTH, MERGE_POLICIES
+
+        # clear
+        clear_parser = subparsers.add_parser("clear", help="Remove error info")
+        clear_parser.add_argument(
+            "--older-than",
+            help="Errors, last occurred before the duration, like 7d",
+        )
+        self.add_filter_arguments(clear_parser)
+        clear_parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Show selected errors without removing",
+        )
+        self.add_jobs_argument(clear_parser, "Number of parallel deletes")
+        clear_parser.add_argument(
+            "fingerprints",
+            nargs=argparse.REMAINDER,
+            help="Error Info fingerprint expressions",
+        )
+        # compact
+        compact_parser = subparsers.add_parser(
+            "compact", help="Recompress or archive error info"
+        )
+        compact_parser.add_argument(
+            "--older-than",
+            help="Errors, last occurred before the duration, like 7d",
+        )
+        self.add_filter_arguments(compact_parser)
+        compact_parser.add_argument(
+            "-c",
+            "--compress",
+            default="xz",
+            help="Target compression: gz, bz2, xz, zst",
+        )
+        compact_parser.add_argument(
+            "-l", "--level", type=int, help="Compression level"
+        )
+        compact_parser.add_argument(
+            "--archive",
+            action="store_true",
+            help="Move the records to the segment log",
+        )
+        self.add_jobs_argument(compact_parser, "Number of compressing threads")
+        compact_parser.add_argument(
+            "fingerprints",
+            nargs=argparse.REMAINDER,
+            help="Error Info fingerprint expressions",
+        )
+        # reindex
+        subparsers.add_parser("reindex", help="Rebuild storage indexes")
+        # migrate
+        migrate_parser = subparsers.add_parser(
+            "migrate", help="Convert error info files layout"
+        )
+        migrate_parser.add_argument(
+            "-d",
+            "--shard-depth",
+            type=int,
+            default=DEFAULT_SHARD_DEPTH,
+            help="Number of shard directory levels, 0 - flat layout",
+        )
+        # merge
+        merge_parser = subparsers.add_parser(
+            "merge", help="Merge error info directories of the other hosts"
+        )
+        merge_parser.add_argument(
+            "--policy",
+            choices=MERGE_POLICIES,
+            default="oldest",
+            help="Record to keep: the oldest or the newest one",
+        )
+        self.add_jobs_argument(merge_parser, "Number of copying threads")
+        merge_parser.add_argument(
+            "paths",
+            nargs="+",
+            metavar="PATH",
+            help="Source directories as [<host>=]<path> and the target one",
+        )
+        # prune
+        prune_parser = subparsers.add_parser(
+            "prune", help="Remove the oldest error info files"
+        )
+        prune_parser.add_argument(
+            "--max-files", type=int, help="Maximal number of files"
+        )
+        prune_parser.add_argument(
+            "--max-bytes", type=int, help="Maximal total size of files"
+        )
+        prune_parser.add_argument(
+            "--max-age", help="Maximal age of files, like 30s, 15m, 12h, 7d"
+        )
+
     def run(self, args: list[str]) -> ExitCode:
         """Main dispatcher function.
 
@@ -493,6 +2070,11 @@ class Cli:
             default=os.environ.get("GUFO_ERR_PREFIX"),
             help="JSON directory path",
         )
+        parser.add_argument(
+            "--db",
+            default=os.environ.get("GUFO_ERR_DB"),
+            help="SQLite database path",
+        )
         subparsers = parser.add_subparsers(dest="cmd", required=True)
         # version
         subparsers.add_parser("version", help="Show Gufo Err version")
@@ -501,6 +2083,75 @@ class Cli:
             "list", help="Show the list of the registered errors"
         )
         list_parser.add_argument(
+            "-s",
+            "--sort",
+            choices=list(SORT_KEYS),
+            default="ts",
+            help="Sort key, the first occurrence by default",
+        )
+        list_parser.add_argument(
+            "-r",
+            "--reverse",
+            action="store_true",
+            help="Reverse sort order",
+        )
+        list_parser.add_argument(
+            "-n", "--limit", type=int, help="Show only the first N errors"
+        )
+        self.add_filter_arguments(list_parser)
+        self.add_jobs_argument(list_parser)
+        list_parser.add_argument(
+            "fingerprints",
+            nargs=argparse.REMAINDER,
+            help="Error Info fingerprint expressions",
+        )
+        # stats
+        stats_parser = subparsers.add_parser(
+            "stats", help="Show the statistics of the registered errors"
+        )
+        stats_parser.add_argument(
+            "-f",
+            "--format",
+            choices=["text", "json"],
+            default="text",
+            help="Output format",
+        )
+        stats_parser.add_argument(
+            "-n",
+            "--limit",
+            type=int,
+            default=10,
+            help="Maximal number of rows per table",
+        )
+        self.add_filter_arguments(stats_parser)
+        self.add_jobs_argument(stats_parser)
+        stats_parser.add_argument(
+            "fingerprints",
+            nargs=argparse.REMAINDER,
+            help="Error Info fingerprint expressions",
+        )
+        # export
+        export_parser = subparsers.add_parser(
+            "export", help="Export error info as newline-delimited JSON"
+        )
+        export_parser.add_argument(
+            "-o", "--output", help="Output file, stdout if not set"
+        )
+        export_parser.add_argument(
+            "-c",
+            "--compress",
+            help="Output compression: gz, bz2, xz, zst. "
+            "Detected by the output file extension, if not set",
+        )
+        export_parser.add_argument(
+            "-s",
+            "--summary",
+            action="store_true",
+            help="Export summaries instead of the full records",
+        )
+        self.add_filter_arguments(export_parser)
+        self.add_jobs_argument(export_parser)
+        export_parser.add_argument(
             "fingerprints",
             nargs=argparse.REMAINDER,
             help="Error Info fingerprint expressions",
@@ -513,14 +2164,73 @@ class Cli:
             default="extend",
             help="Output format: terse, extend",
         )
+        view_parser.add_argument(
+            "-o",
+            "--occurrence",
+            type=int,
+            default=0,
+            help="Stored occurrence: 0 - the first, -1 - the latest",
+        )
+        self.add_jobs_argument(view_parser)
         view_parser.add_argument(
             "fingerprints",
             nargs=argparse.REMAINDER,
             help="Error Info fingerprint expressions",
         )
-        # clear
-        clear_parser = subparsers.add_parser("clear", help="Remove error info")
-        clear_parser.add_argument(
+        # watch
+        watch_parser = subparsers.add_parser(
+            "watch", help="Show the new errors as they arrive"
+        )
+        watch_parser.add_argument(
+            "-f",
+            "--format",
+            default="terse",
+            help="Output format: terse, extend",
+        )
+        watch_parser.add_argument(
+            "-i",
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Polling interval, in seconds",
+        )
+        # serve
+        serve_parser = subparsers.add_parser(
+            "serve", help="Serve the read-only HTTP viewer"
+        )
+        serve_parser.add_argument(
+            "--host", default="127.0.0.1", help="Listened address"
+        )
+        serve_parser.add_argument(
+            "--port", type=int, default=8080, help="Listened port"
+        )
+        serve_parser.add_argument(
+            "-i",
+            "--interval",
+            type=float,
+            default=SERVE_INTERVAL,
+            help="Minimal index refresh interval, in seconds",
+        )
+        serve_parser.add_argument(
+            "--cache-size",
+            type=int,
+            default=SERVE_CACHE_SIZE,
+            help="Number of the cached decoded records",
+        )
+        self.add_grep_parser(subparsers)
+        self.add_maintenance_parsers(subparsers)
+        # train-dict
+        train_dict_parser = subparsers.add_parser(
+            "train-dict", help="Train compression dictionary"
+        )
+        train_dict_parser.add_argument(
+            "-s",
+            "--size",
+            type=int,
+            default=DEFAULT_DICT_SIZE,
+            help="Maximal dictionary size",
+        )
+        train_dict_parser.add_argument(
             "fingerprints",
             nargs=argparse.REMAINDER,
             help="Error Info fingerprint expressions",
@@ -9,13 +9,16 @@
 import datetime
 import json
 import uuid
+from bisect import bisect_right
 from typing import Any
 
 # Gufo Labs modules
+from .summarizer import summarizer
 from .types import ErrorInfo, ExceptionStub, FrameInfo, SourceInfo
 
 CODEC_TYPE = "errorinfo"
-CURRENT_VERSION = "1.0"
+CURRENT_VERSION = "1.1"
+SUPPORTED_VERSIONS = {"1.0", CURRENT_VERSION}
 
 
 def __q_x_class(e: BaseException) -> str:
@@ -45,6 +48,9 @@ def __q_var(x: Any) -> str | int | float:  # noqa: ANN401
     """
     if isinstance(x, (int, float, str)):
         return x
+    summary = summarizer.summarize(x)
+    if summary is not None:
+        return summary
     return str(x)
 
 
@@ -70,6 +76,9 @@ def __q_frame_info(fi: FrameInfo) -> dict[str, Any]:
 def __q_source(si: SourceInfo) -> dict[str, Any]:
     """Convert SourceInfo into JSON-serializeable form.
 
+    Source lines are not included, but referenced
+    from the record's `sources` table.
+
     Args:
         si: SourceInfo instance
 
@@ -80,10 +89,48 @@ def __q_source(si: SourceInfo) -> dict[str, Any]:
         "file_name": si.file_name,
         "first_line": si.first_line,
         "current_line": si.current_line,
-        "lines": si.lines,
+        "last_line": si.first_line + len(si.lines) - 1,
     }
 
 
+def __q_sources(stack: list[FrameInfo]) -> dict[str, list[dict[str, Any]]]:
+    """Build per-file table of source line ranges.
+
+    Overlapping and adjacent source windows of the same file
+    are merged into the single range.
+
+    Args:
+        stack: List of FrameInfo
+
+    Returns:
+        Dict of file name -> list of ranges, sorted by `first_line`.
+    """
+    by_file: dict[str, list[SourceInfo]] = {}
+    for fi in stack:
+        if fi.source and fi.source.lines:
+            by_file.setdefault(fi.source.file_name, []).append(fi.source)
+    r: dict[str, list[dict[str, Any]]] = {}
+    for file_name, sources in by_file.items():
+        ranges: list[dict[str, Any]] = []
+        last_line = 0
+        for si in sorted(sources, key=lambda x: x.first_line):
+            if ranges and si.first_line <= last_line + 1:
+                # Merge with the previous range
+                si_last = si.first_line + len(si.lines) - 1
+                if si_last > last_line:
+                    ranges[-1]["lines"] += si.lines[
+                        last_line + 1 - si.first_line :
+                    ]
+                    last_line = si_last
+            else:
+                ranges.append(
+                    {"first_line": si.first_line, "lines": list(si.lines)}
+                )
+                last_line = si.first_line + len(si.lines) - 1
+        r[file_name] = ranges
+    return r
+
+
 def __q_exception(e: BaseException) -> dict[str, Any]:
     """
     Convert exception into JSON-serializeable form.
@@ -117,6 +164,7 @@ def to_dict(info: ErrorInfo) -> dict[str, Any]:
         "fingerprint": str(info.fingerprint),
         "exception": __q_exception(info.exception),
         "stack": [__q_frame_info(x) for x in info.stack],
+        "sources": __q_sources(info.stack),
     }
     if info.timestamp:
         r["timestamp"] = info.timestamp.isoformat()
@@ -137,6 +185,57 @@ def to_json(info: ErrorInfo) -> str:
     return json.dumps(to_dict(info))
 
 
+SourcesTable = dict[str, tuple[list[int], list[tuple[int, list[str]]]]]
+
+
+def __get_sources(data: dict[str, list[dict[str, Any]]]) -> SourcesTable:
+    """Prepare serialized `sources` table for lookups.
+
+    Args:
+        data: Serialized `sources` table.
+
+    Returns:
+        Dict of file name -> (list of first lines, list of ranges).
+    """
+    r: SourcesTable = {}
+    for file_name, ranges in data.items():
+        items = [(x["first_line"], x["lines"]) for x in ranges]
+        r[file_name] = ([x[0] for x in items], items)
+    return r
+
+
+def __get_lines(
+    sources: SourcesTable, file_name: str, first_line: int, last_line: int
+) -> list[str]:
+    """Get source lines from the `sources` table.
+
+    Args:
+        sources: Result of `__get_sources`.
+        file_name: File name.
+        first_line: First line of the range.
+        last_line: Last line of the range.
+
+    Returns:
+        List of lines.
+
+    Raises:
+        ValueError: if the range is missed in the table.
+    """
+    if last_line < first_line:
+        return []
+    ranges = sources.get(file_name)
+    if ranges:
+        firsts, items = ranges
+        idx = bisect_right(firsts, first_line) - 1
+        if idx >= 0:
+            r_first, r_lines = items[idx]
+            lines = r_lines[first_line - r_first : last_line - r_first + 1]
+            if len(lines) == last_line - first_line + 1:
+                return lines
+    msg = f"{file_name}:{first_line}-{last_line} is missed in sources"
+    raise ValueError(msg)
+
+
 def from_dict(data: dict[str, Any]) -> ErrorInfo:
     """Deserialize Dict to ErrorInfo.
 
@@ -179,11 +278,20 @@ def from_dict(data: dict[str, Any]) -> ErrorInfo:
         )
 
     def get_si(d: dict[str, Any]) -> SourceInfo:
+        file_name = get(d, "file_name")
+        first_line = get(d, "first_line")
+        if "lines" in d:
+            # Version 1.0, inline lines
+            lines = get(d, "lines")
+        else:
+            lines = __get_lines(
+                sources, file_name, first_line, get(d, "last_line")
+            )
         return SourceInfo(
-            file_name=get(d, "file_name"),
-            first_line=get(d, "first_line"),
+            file_name=file_name,
+            first_line=first_line,
             current_line=get(d, "current_line"),
-            lines=get(d, "lines"),
+            lines=lines,
         )
 
     # Check incoming data is dict
@@ -197,9 +305,11 @@ def from_dict(data: dict[str, Any]) -> ErrorInfo:
         raise ValueError(msg)
     # Check version
     ci_version = get(data, "$version")
-    if ci_version != CURRENT_VERSION:
+    if ci_version not in SUPPORTED_VERSIONS:
         msg = "Unknown $version"
         raise ValueError(msg)
+    # Source lines table
+    sources = __get_sources(data.get("sources") or {})
     # Process timestamp
     src_ts = data.get("timestamp")
     ts = datetime.datetime.fromisoformat(src_ts) if src_ts else None
@@ -3,17 +3,150 @@
 # ---------------------------------------------------------------------
 # Copyright (C) 2022-26, Gufo Labs
 # ---------------------------------------------------------------------
-"""Compressor."""
+"""Compressor.
+
+Attributes:
+    DICT_PREFIX: Compression dictionary file name prefix.
+    DICT_SUFFIX: Compression dictionary file name suffix.
+    DEFAULT_DICT_SIZE: Default maximal size of the trained dictionary.
+    ZSTD_MODULE: Name of the Zstandard module, if available.
+    HAS_ZSTD: True, if Zstandard compression is available
+        (Python 3.14+ or `backports.zstd` is installed).
+"""
 
 # Python modules
 import os
 from collections.abc import Callable
+from functools import lru_cache
+from importlib import import_module
+from importlib.util import find_spec
+from pathlib import Path
+from types import ModuleType
+from typing import Any, ClassVar
+
+
+def __find_zstd() -> str | None:
+    """Find Zstandard module.
+
+    Returns:
+        * `compression.zstd` on Python 3.14+.
+        * `backports.zstd`, if installed.
+        * None otherwise.
+    """
+    for name in ("compression.zstd", "backports.zstd"):
+        try:
+            if find_spec(name):
+                return name
+        except ImportError:
+            pass
+    return None
+
+
+DICT_PREFIX = "zstd-"
+DICT_SUFFIX = ".dict"
+DEFAULT_DICT_SIZE = 65536
+
+ZSTD_MODULE = __find_zstd()
+HAS_ZSTD = ZSTD_MODULE is not None
+
+
+def _get_zstd() -> ModuleType:
+    """Import Zstandard module.
+
+    Returns:
+        Zstandard module.
+
+    Raises:
+        ImportError: If Zstandard is not available.
+    """
+    if ZSTD_MODULE is None:
+        msg = "Zstandard is not available"
+        raise ImportError(msg)
+    return import_module(ZSTD_MODULE)
+
+
+def get_dict_path(prefix: str, dict_id: int) -> str:
+    """Get path to the compression dictionary file.
+
+    Args:
+        prefix: Directory path.
+        dict_id: Dictionary id.
+
+    Returns:
+        Dictionary file path.
+    """
+    return os.path.join(prefix, f"{DICT_PREFIX}{dict_id}{DICT_SUFFIX}")
+
+
+def read_dict(path: Path | str) -> bytes:
+    """Read compression dictionary file.
+
+    Args:
+        path: Dictionary file path.
+
+    Returns:
+        Dictionary content.
+
+    Raises:
+        ValueError: If dictionary cannot be read.
+    """
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError as e:
+        msg = f"Cannot read dictionary {path}: {e}"
+        raise ValueError(msg) from e
+
+
+@lru_cache(maxsize=16)
+def _load_dict(path: str) -> Any:  # noqa: ANN401
+    """Load Zstandard dictionary from file.
+
+    Args:
+        path: Dictionary file path.
+
+    Returns:
+        ZstdDict instance.
+
+    Raises:
+        ValueError: If dictionary cannot be read.
+    """
+    try:
+        with open(path, "rb") as f:
+            return _get_zstd().ZstdDict(f.read())
+    except OSError as e:
+        msg = f"Cannot read dictionary {path}: {e}"
+        raise ValueError(msg) from e
+
+
+def train_dict(
+    samples: list[bytes], size: int = DEFAULT_DICT_SIZE
+) -> tuple[int, bytes]:
+    """Train Zstandard dictionary.
+
+    Args:
+        samples: List of uncompressed samples.
+        size: Maximal dictionary size.
+
+    Returns:
+        Tuple of (dictionary id, dictionary content).
+
+    Raises:
+        ValueError: If dictionary cannot be trained.
+    """
+    zstd = _get_zstd()
+    try:
+        zstd_dict = zstd.train_dict(samples, size)
+    except zstd.ZstdError as e:
+        raise ValueError(str(e)) from e
+    return zstd_dict.dict_id, zstd_dict.dict_content
 
 
 class Compressor:
     """Compressor/decompressor class.
 
     Use .encode() to compress data and .decode() to decompress.
+    Decoders raise ValueError on corrupted or truncated data.
 
     Args:
         format: Compression algorithm. One of:
@@ -22,38 +155,171 @@ class Compressor:
             * `gz` - GZip
             * `bz2` - BZip2
             * `xz` - LZMA/xz
+            * `zst` - Zstandard, if `HAS_ZSTD` is set.
+
+        level: Compression level (preset for `xz`), if supported
+            by format. Use format's default, if not set. Levels are:
+
+            * `gz` - 0 (no compression) - 9 (best compression)
+            * `bz2` - 1 (fastest) - 9 (best compression)
+            * `xz` - 0 (fastest) - 9 (best compression)
+            * `zst` - -131072 (fastest) - 22 (best compression)
+
+        dictionary: Trained compression dictionary content (`zst` only).
+            Used to compress and to decompress.
+        dict_dir: Directory to look up the dictionaries,
+            referred by compressed data (`zst` only).
 
     Raises:
-        ValueError: If format is not supported.
+        ValueError: If format is not supported or format does not
+            support compression level or dictionaries, or level is
+            out of range.
     """
 
     FORMATS: dict[
         str | None,
         tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]],
     ]
-
-    def __init__(self, format: str | None = None) -> None:
+    LEVELS: dict[str | None, tuple[Callable[[bytes, int], bytes], int, int]]
+    MAGIC: ClassVar[dict[bytes, str]] = {
+        b"\x1f\x8b": "gz",
+        b"BZh": "bz2",
+        b"\xfd7zXZ\x00": "xz",
+        b"\x28\xb5\x2f\xfd": "zst",
+    }
+
+    def __init__(
+        self,
+        format: str | None = None,
+        level: int | None = None,
+        dictionary: bytes | None = None,
+        dict_dir: str | None = None,
+    ) -> None:
+        self._args = (format, level, dictionary, dict_dir)
         try:
             self.encode, self.decode = self.FORMATS[format]
         except KeyError as e:
             msg = f"Unsupported format: {format}"
             raise ValueError(msg) from e
+        if level is not None:
+            try:
+                encode, min_level, max_level = self.LEVELS[format]
+            except KeyError as e:
+                msg = f"Format {format} does not support compression level"
+                raise ValueError(msg) from e
+            if not min_level <= level <= max_level:
+                msg = (
+                    f"Invalid {format} compression level {level}: "
+                    f"must be in range {min_level}..{max_level}"
+                )
+                raise ValueError(msg)
+
+            def encode_level(data: bytes) -> bytes:
+                return encode(data, level)
+
+            self.encode = encode_level
+        if dictionary is not None or dict_dir is not None:
+            if format != "zst":
+                msg = f"Format {format} does not support dictionaries"
+                raise ValueError(msg)
+            self.encode, self.decode = self.__zst_dict_codec(
+                level, dictionary, dict_dir
+            )
         if format is None:
             self.suffix = ""
         else:
             self.suffix = f".{format}"
 
+    def __reduce__(self) -> tuple[type["Compressor"], tuple[Any, ...]]:
+        """Support pickling, used to pass the compressor to the workers.
+
+        Returns:
+            Tuple of (class, constructor arguments).
+        """
+        return self.__class__, self._args
+
+    @staticmethod
+    def __zst_dict_codec(
+        level: int | None, dictionary: bytes | None, dict_dir: str | None
+    ) -> tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]:
+        """Get `zst` encoder and decoder using dictionaries.
+
+        Args:
+            level: Compression level.
+            dictionary: Dictionary content.
+            dict_dir: Directory to look up the dictionaries.
+
+        Returns:
+            Tuple of (encoder, decoder).
+        """
+        zstd = _get_zstd()
+        zstd_dict = zstd.ZstdDict(dictionary) if dictionary else None
+
+        def encode(data: bytes) -> bytes:
+            r: bytes = zstd.compress(data, level=level, zstd_dict=zstd_dict)
+            return r
+
+        def decode(data: bytes) -> bytes:
+            try:
+                dict_id = zstd.get_frame_info(data).dictionary_id
+                if not dict_id:
+                    d = None
+                elif zstd_dict and zstd_dict.dict_id == dict_id:
+                    d = zstd_dict
+                elif dict_dir is not None:
+                    d = _load_dict(get_dict_path(dict_dir, dict_id))
+                else:
+                    msg = f"Dictionary {dict_id} is required"
+                    raise ValueError(msg)
+                r: bytes = zstd.decompress(data, zstd_dict=d)
+            except (zstd.ZstdError, EOFError) as e:
+                msg = f"Corrupted zst data: {e}"
+                raise ValueError(msg) from e
+            return r
+
+        return encode, decode
+
     @classmethod
-    def autodetect(cls: type["Compressor"], path: str) -> "Compressor":
+    def autodetect(
+        cls: type["Compressor"], path: str, data: bytes | None = None
+    ) -> "Compressor":
         """Returns Compressor instance for given format.
 
         Args:
             path: File path
+            data: Optional file content. If set, detect format by
+                magic bytes first, then fall back to file extension.
 
         Returns:
             Compressor instance
         """
-        return Compressor(format=cls.get_format(path))
+        fmt = cls.get_data_format(data) if data else None
+        if fmt is None:
+            if data and data.startswith(b"{"):
+                return Compressor()  # Uncompressed JSON
+            fmt = cls.get_format(path)
+        if fmt == "zst":
+            # Look up dictionaries along with the file
+            return Compressor(
+                format=fmt, dict_dir=os.path.dirname(path) or os.curdir
+            )
+        return Compressor(format=fmt)
+
+    @classmethod
+    def get_data_format(cls: type["Compressor"], data: bytes) -> str | None:
+        """Auto-detect format from data magic bytes.
+
+        Args:
+            data: Compressed data.
+
+        Returns:
+            * `format` parameter, if format is detected and supported.
+            * None otherwise.
+        """
+        for magic, fmt in cls.MAGIC.items():
+            if data.startswith(magic) and fmt in cls.FORMATS:
+                return fmt
+        return None
 
     @classmethod
     def get_format(cls: type["Compressor"], path: str) -> str | None:
@@ -97,18 +363,19 @@ class Compressor:
         return data
 
     @staticmethod
-    def encode_gz(data: bytes) -> bytes:
+    def encode_gz(data: bytes, level: int | None = None) -> bytes:
         """Encoder for `gz` format.
 
         Args:
             data: Input bytes
+            level: Compression level.
 
         Returns:
             gzipped stream as bytes.
         """
         import gzip
 
-        return gzip.compress(data)
+        return gzip.compress(data, compresslevel=9 if level is None else level)
 
     @staticmethod
     def decode_gz(data: bytes) -> bytes:
@@ -119,24 +386,33 @@ class Compressor:
 
         Returns:
             Uncompressed bytes.
+
+        Raises:
+            ValueError: If data is corrupted or truncated.
         """
         import gzip
+        import zlib
 
-        return gzip.decompress(data)
+        try:
+            return gzip.decompress(data)
+        except (OSError, EOFError, zlib.error) as e:
+            msg = f"Corrupted gz data: {e}"
+            raise ValueError(msg) from e
 
     @staticmethod
-    def encode_bz2(data: bytes) -> bytes:
+    def encode_bz2(data: bytes, level: int | None = None) -> bytes:
         """Encoder for `bz2` format.
 
         Args:
             data: Input bytes
+            level: Compression level.
 
         Returns:
             bzipped stream as bytes.
         """
         import bz2
 
-        return bz2.compress(data)
+        return bz2.compress(data, compresslevel=9 if level is None else level)
 
     @staticmethod
     def decode_bz2(data: bytes) -> bytes:
@@ -147,24 +423,32 @@ class Compressor:
 
         Returns:
             Uncompressed bytes.
+
+        Raises:
+            ValueError: If data is corrupted or truncated.
         """
         import bz2
 
-        return bz2.decompress(data)
+        try:
+            return bz2.decompress(data)
+        except (OSError, EOFError) as e:
+            msg = f"Corrupted bz2 data: {e}"
+            raise ValueError(msg) from e
 
     @staticmethod
-    def encode_xz(data: bytes) -> bytes:
+    def encode_xz(data: bytes, level: int | None = None) -> bytes:
         """Encoder for `xz` format.
 
         Args:
             data: Input bytes
+            level: Compression preset.
 
         Returns:
             xz-compressed stream as bytes.
         """
         import lzma
 
-        return lzma.compress(data)
+        return lzma.compress(data, preset=level)
 
     @staticmethod
     def decode_xz(data: bytes) -> bytes:
@@ -175,10 +459,57 @@ class Compressor:
 
         Returns:
             Uncompressed bytes.
+
+        Raises:
+            ValueError: If data is corrupted or truncated.
         """
         import lzma
 
-        return lzma.decompress(data)
+        try:
+            return lzma.decompress(data)
+        except (lzma.LZMAError, EOFError) as e:
+            msg = f"Corrupted xz data: {e}"
+            raise ValueError(msg) from e
+
+    @staticmethod
+    def encode_zst(data: bytes, level: int | None = None) -> bytes:
+        """Encoder for `zst` format.
+
+        Args:
+            data: Input bytes
+            level: Compression level.
+
+        Returns:
+            zstd-compressed stream as bytes.
+        """
+        r: bytes = _get_zstd().compress(data, level=level)
+        return r
+
+    @staticmethod
+    def decode_zst(data: bytes) -> bytes:
+        """Decoder for `zst` format.
+
+        Args:
+            data: zstd-compressed data as bytes.
+
+        Returns:
+            Uncompressed bytes.
+
+        Raises:
+            ValueError: If data is compressed using dictionary,
+                corrupted, or truncated.
+        """
+        zstd = _get_zstd()
+        try:
+            dict_id = zstd.get_frame_info(data).dictionary_id
+            if dict_id:
+                msg = f"Dictionary {dict_id} is required"
+                raise ValueError(msg)
+            r: bytes = zstd.decompress(data)
+        except (zstd.ZstdError, EOFError) as e:
+            msg = f"Corrupted zst data: {e}"
+            raise ValueError(msg) from e
+        return r
 
 
 Compressor.FORMATS = {
@@ -187,3 +518,11 @@ Compressor.FORMATS = {
     "bz2": (Compressor.encode_bz2, Compressor.decode_bz2),
     "xz": (Compressor.encode_xz, Compressor.decode_xz),
 }
+Compressor.LEVELS = {
+    "gz": (Compressor.encode_gz, 0, 9),
+    "bz2": (Compressor.encode_bz2, 1, 9),
+    "xz": (Compressor.encode_xz, 0, 9),
+}
+if HAS_ZSTD:
+    Compressor.FORMATS["zst"] = (Compressor.encode_zst, Compressor.decode_zst)
+    Compressor.LEVELS["zst"] = (Compressor.encode_zst, -(1 << 17), 22)
@@ -10,6 +10,7 @@ Attributes:
 """
 
 # Python modules
+import datetime
 import hashlib
 import os
 import sys
@@ -144,6 +145,16 @@ class Err:
         format: str | None = "terse",
         error_info_path: str | None = None,
         error_info_compress: str | None = None,
+        error_info_compress_level: int | None = None,
+        error_info_compress_dict: str | None = None,
+        error_info_storage: str = "directory",
+        error_info_shard_depth: int = 0,
+        error_info_fsync: str = "never",
+        error_info_max_files: int | None = None,
+        error_info_max_bytes: int | None = None,
+        error_info_max_age: datetime.timedelta | None = None,
+        error_info_occurrences: int = 0,
+        error_info_occurrence_rate: float = 1.0,
     ) -> "Err":
         """Setup error handling singleton.
 
@@ -181,6 +192,46 @@ class Err:
                 * `gz` - GZip
                 * `bz2` - BZip2
                 * `xz` - LZMA/xz
+                * `zst` - Zstandard (Python 3.14+ or `backports.zstd`)
+
+            error_info_compress_level: Used only with `error_info_path`
+                and `error_info_compress`. Compression level (preset for
+                `xz`). Lower levels trade compression ratio for speed.
+                See [Compressor][gufo.err.compressor.Compressor]
+                for details.
+            error_info_compress_dict: Used only with `error_info_path`
+                and `zst` compression. Path to the trained compression
+                dictionary. Use `err train-dict` to train the dictionary.
+            error_info_storage: Used only with `error_info_path`.
+                Storage layout. One of:
+
+                * `directory` - one file per fingerprint.
+                * `segment` - append-only segment log.
+
+            error_info_shard_depth: Used only with `error_info_path`
+                and `directory` storage. Number of shard directory levels,
+                like `ab/cd/<fingerprint>.json` for `2`. Flat layout if `0`.
+            error_info_fsync: Used only with `error_info_path`.
+                Durability policy:
+
+                * `never` - leave flushing to the operating system.
+                * `file` - sync written files.
+                * `directory` - sync written files and their directories.
+
+            error_info_max_files: Used only with `error_info_path`
+                and `directory` storage. Maximal number of stored errors.
+            error_info_max_bytes: Used only with `error_info_path`
+                and `directory` storage. Maximal total size of stored
+                errors, in bytes.
+            error_info_max_age: Used only with `error_info_path`
+                and `directory` storage. Maximal age of stored errors.
+                The oldest errors are evicted when any limit is exceeded.
+            error_info_occurrences: Used only with `error_info_path`
+                and `directory` storage. Number of the recent repeated
+                occurrences to keep along with the first one.
+            error_info_occurrence_rate: Used only with
+                `error_info_occurrences`. Sampling rate of the stored
+                occurrences, from `0` (exclusive) to `1`.
 
         Returns:
             Err instance.
@@ -219,6 +270,16 @@ class Err:
                 format=format,
                 error_info_path=error_info_path,
                 error_info_compress=error_info_compress,
+                error_info_compress_level=error_info_compress_level,
+                error_info_compress_dict=error_info_compress_dict,
+                error_info_storage=error_info_storage,
+                error_info_shard_depth=error_info_shard_depth,
+                error_info_fsync=error_info_fsync,
+                error_info_max_files=error_info_max_files,
+                error_info_max_bytes=error_info_max_bytes,
+                error_info_max_age=error_info_max_age,
+                error_info_occurrences=error_info_occurrences,
+                error_info_occurrence_rate=error_info_occurrence_rate,
             )
             for resp in middleware:
                 self.add_middleware(resp)
@@ -227,6 +288,16 @@ class Err:
                 format=format,
                 error_info_path=error_info_path,
                 error_info_compress=error_info_compress,
+                error_info_compress_level=error_info_compress_level,
+                error_info_compress_dict=error_info_compress_dict,
+                error_info_storage=error_info_storage,
+                error_info_shard_depth=error_info_shard_depth,
+                error_info_fsync=error_info_fsync,
+                error_info_max_files=error_info_max_files,
+                error_info_max_bytes=error_info_max_bytes,
+                error_info_max_age=error_info_max_age,
+                error_info_occurrences=error_info_occurrences,
+                error_info_occurrence_rate=error_info_occurrence_rate,
             )
         # Mark as initialized
         self.__initialized = True
@@ -368,6 +439,16 @@ class Err:
         format: str | None = None,
         error_info_path: str | None = None,
         error_info_compress: str | None = None,
+        error_info_compress_level: int | None = None,
+        error_info_compress_dict: str | None = None,
+        error_info_storage: str = "directory",
+        error_info_shard_depth: int = 0,
+        error_info_fsync: str = "never",
+        error_info_max_files: int | None = None,
+        error_info_max_bytes: int | None = None,
+        error_info_max_age: datetime.timedelta | None = None,
+        error_info_occurrences: int = 0,
+        error_info_occurrence_rate: float = 1.0,
     ) -> list[BaseMiddleware]:
         """Get default middleware chain.
 
@@ -379,6 +460,26 @@ class Err:
                 Do not configure middleware if None.
             error_info_compress: Error info compression algorithm. Used along
                 with `error_info_path`.
+            error_info_compress_level: Compression level. Used along
+                with `error_info_path`.
+            error_info_compress_dict: Compression dictionary path. Used along
+                with `error_info_path`.
+            error_info_storage: Storage layout. Used along
+                with `error_info_path`.
+            error_info_shard_depth: Number of shard directory levels.
+                Used along with `error_info_path`.
+            error_info_fsync: Durability policy. Used along
+                with `error_info_path`.
+            error_info_max_files: Maximal number of stored errors.
+                Used along with `error_info_path`.
+            error_info_max_bytes: Maximal total size of stored errors.
+                Used along with `error_info_path`.
+            error_info_max_age: Maximal age of stored errors.
+                Used along with `error_info_path`.
+            error_info_occurrences: Number of the recent occurrences
+                to keep. Used along with `error_info_path`.
+            error_info_occurrence_rate: Sampling rate of the stored
+                occurrences. Used along with `error_info_path`.
         """
         r: list[BaseMiddleware] = []
         if format is not None:
@@ -390,7 +491,18 @@ class Err:
 
             r.append(
                 ErrorInfoMiddleware(
-                    path=error_info_path, compress=error_info_compress
+                    path=error_info_path,
+                    compress=error_info_compress,
+                    compress_level=error_info_compress_level,
+                    compress_dict=error_info_compress_dict,
+                    storage=error_info_storage,
+                    shard_depth=error_info_shard_depth,
+                    fsync=error_info_fsync,
+                    max_files=error_info_max_files,
+                    max_bytes=error_info_max_bytes,
+                    max_age=error_info_max_age,
+                    occurrences=error_info_occurrences,
+                    occurrence_rate=error_info_occurrence_rate,
                 )
             )
         return r
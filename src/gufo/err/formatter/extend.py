@@ -11,6 +11,7 @@ from pprint import pformat
 
 # Gufo Err modules
 from ..abc.formatter import BaseFormatter
+from ..summarizer import summarizer
 from ..types import ErrorInfo, FrameInfo
 
 
@@ -79,6 +80,10 @@ class ExtendFormatter(BaseFormatter):
             Iterable of (`var name`, `var value`).
         """
         for k, v in fi.locals.items():
+            summary = summarizer.summarize(v)
+            if summary is not None:
+                yield k, summary
+                continue
             try:
                 rv = repr(v)
                 if len(rv) > self.MAX_VAR_LEN:
@@ -0,0 +1,246 @@
+# ---------------------------------------------------------------------
+# Gufo Err: Content search
+# ---------------------------------------------------------------------
+# Copyright (C) 2022-26, Gufo Labs
+# ---------------------------------------------------------------------
+"""Content search over the stored records."""
+
+# Python modules
+import json
+import re
+from collections.abc import Callable, Iterable
+from typing import Any
+
+# Searched parts of the record
+GREP_SCOPES = ("exception", "module", "file", "source", "locals")
+# Characters, making the pattern a regular expression
+REGEX_CHARS = frozenset(".^$*+?{}[]\\|()")
+
+
+def _text(value: Any) -> str:  # noqa: ANN401
+    """Convert JSON value to the searched text.
+
+    Args:
+        value: Decoded JSON value.
+
+    Returns:
+        Strings as is, other values in JSON notation.
+    """
+    if isinstance(value, str):
+        return value
+    return json.dumps(value)
+
+
+class Grep:
+    """Search the pattern in the uncompressed records.
+
+    Records are searched in order of the scopes:
+
+    * `exception` - exception class and arguments.
+    * `module` - modules of the stack frames.
+    * `file` - file names of the stack frames.
+    * `source` - source lines.
+    * `locals` - local variables of the stack frames, as `name=value`.
+
+    The pattern is a regular expression, unless it is a plain
+    string or `fixed` is set. Plain strings are looked up
+    in the raw JSON before decoding the record, so the most
+    of the records are rejected without decoding. Search stops
+    on the first match. Instances are picklable, so they may
+    be passed to the matching processes.
+
+    Args:
+        pattern: Searched pattern.
+        scopes: Searched scopes, all by default.
+        fixed: Treat pattern as the plain string.
+        ignore_case: Case-insensitive search.
+
+    Raises:
+        ValueError: On invalid scope or regular expression.
+    """
+
+    def __init__(
+        self,
+        pattern: str,
+        scopes: Iterable[str] | None = None,
+        fixed: bool = False,
+        ignore_case: bool = False,
+    ) -> None:
+        self.scopes = tuple(scopes) if scopes else GREP_SCOPES
+        for scope in self.scopes:
+            if scope not in GREP_SCOPES:
+                msg = f"Invalid scope: {scope}"
+                raise ValueError(msg)
+        self.ignore_case = ignore_case
+        self.rx: re.Pattern[str] | None = None
+        self.needles: list[bytes] = []
+        if fixed or REGEX_CHARS.isdisjoint(pattern):
+            self.pattern = pattern.lower() if ignore_case else pattern
+            self.needles = self.get_needles(self.pattern)
+        else:
+            self.pattern = pattern
+            try:
+                self.rx = re.compile(
+                    pattern, re.IGNORECASE if ignore_case else 0
+                )
+            except re.error as e:
+                msg = f"Invalid pattern: {e}"
+                raise ValueError(msg) from e
+
+    def get_needles(self, pattern: str) -> list[bytes]:
+        """Get substrings of the raw record, required for the match.
+
+        JSON escapes are applied character by character, so
+        a substring of the value is escaped into the substring
+        of the raw value. Locals are matched as `name=value`,
+        so the parts around `=` are looked up separately.
+        Non-ASCII parts are skipped for the case-insensitive
+        search, as the escaped upper case differs.
+
+        Args:
+            pattern: Plain pattern, lowercased for
+                the case-insensitive search.
+
+        Returns:
+            List of required substrings.
+        """
+        return [
+            json.dumps(part)[1:-1].encode()
+            for part in pattern.split("=")
+            if part and (part.isascii() or not self.ignore_case)
+        ]
+
+    def match_text(self, text: str) -> bool:
+        """Check the text matches the pattern.
+
+        Args:
+            text: Searched text.
+
+        Returns:
+            True, if the text matches.
+        """
+        if self.rx is not None:
+            return self.rx.search(text) is not None
+        if self.ignore_case:
+            text = text.lower()
+        return self.pattern in text
+
+    def iter_texts(self, doc: dict[str, Any]) -> Iterable[tuple[str, str]]:
+        """Iterate the searched parts of the decoded record.
+
+        Args:
+            doc: Decoded JSON record.
+
+        Returns:
+            Yields (`scope`, `text`).
+        """
+        for scope in self.scopes:
+            texts: Callable[[dict[str, Any]], Iterable[str]] = getattr(
+                self, f"iter_{scope}"
+            )
+            for text in texts(doc):
+                yield scope, text
+
+    @staticmethod
+    def iter_exception(doc: dict[str, Any]) -> Iterable[str]:
+        """Iterate exception class and arguments.
+
+        Args:
+            doc: Decoded JSON record.
+
+        Returns:
+            Yields searched texts.
+        """
+        exc = doc.get("exception") or {}
+        yield _text(exc.get("class", ""))
+        for arg in exc.get("args") or []:
+            yield _text(arg)
+
+    @staticmethod
+    def iter_module(doc: dict[str, Any]) -> Iterable[str]:
+        """Iterate modules of the stack frames.
+
+        Args:
+            doc: Decoded JSON record.
+
+        Returns:
+            Yields searched texts.
+        """
+        for frame in doc.get("stack") or []:
+            if frame.get("module"):
+                yield frame["module"]
+
+    @staticmethod
+    def iter_file(doc: dict[str, Any]) -> Iterable[str]:
+        """Iterate file names of the stack frames.
+
+        Args:
+            doc: Decoded JSON record.
+
+        Returns:
+            Yields searched texts.
+        """
+        for frame in doc.get("stack") or []:
+            source = frame.get("source") or {}
+            if source.get("file_name"):
+                yield source["file_name"]
+
+    @staticmethod
+    def iter_source(doc: dict[str, Any]) -> Iterable[str]:
+        """Iterate the source lines.
+
+        Args:
+            doc: Decoded JSON record.
+
+        Returns:
+            Yields searched texts.
+        """
+        sources: dict[str, list[dict[str, Any]]] | None = doc.get("sources")
+        if sources is not None:
+            for ranges in sources.values():
+                for r in ranges:
+                    yield from r.get("lines") or []
+            return
+        # Format 1.0, lines are stored along with the frames
+        for frame in doc.get("stack") or []:
+            yield from (frame.get("source") or {}).get("lines") or []
+
+    @staticmethod
+    def iter_locals(doc: dict[str, Any]) -> Iterable[str]:
+        """Iterate local variables of the stack frames.
+
+        Args:
+            doc: Decoded JSON record.
+
+        Returns:
+            Yields searched texts as `name=value`.
+        """
+        for frame in doc.get("stack") or []:
+            for name, value in (frame.get("locals") or {}).items():
+                yield f"{name}={_text(value)}"
+
+    def __call__(self, data: bytes) -> tuple[str, str] | None:
+        """Search the uncompressed record.
+
+        Args:
+            data: Uncompressed JSON record.
+
+        Returns:
+            * (`scope`, `text`) of the first match.
+            * None, if not matched.
+
+        Raises:
+            ValueError: If the record cannot be decoded.
+        """
+        if self.needles:
+            raw = data.lower() if self.ignore_case else data
+            if not all(needle in raw for needle in self.needles):
+                return None
+        doc = json.loads(data)
+        if not isinstance(doc, dict):
+            msg = "Invalid record"
+            raise ValueError(msg)
+        for scope, text in self.iter_texts(doc):
+            if self.match_text(text):
+                return scope, text
+        return None
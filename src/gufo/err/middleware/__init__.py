@@ -13,6 +13,9 @@ Available out-of-box:
 
 * [ErrorInfoMiddleware][gufo.err.middleware.errorinfo.ErrorInfoMiddleware]:
   Dump errors to JSON files.
+*
+  [SqliteErrorInfoMiddleware][gufo.err.middleware.sqlite.SqliteErrorInfoMiddleware]:
+  Dump errors to SQLite database.
 * [SentryMiddleware][gufo.err.middleware.sentry.SentryMiddleware]:
   Sentry integration.
 * [TracebackMiddleware][gufo.err.middleware.traceback.TracebackMiddleware]:
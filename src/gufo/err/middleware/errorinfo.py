@@ -6,20 +6,41 @@
 """ErrorInfo middleware."""
 
 # Python modules
+import atexit
+import datetime
 import os
+import random
+import weakref
 from pathlib import Path
 
 # Gufo Labs modules
 from ..abc.middleware import BaseMiddleware
+from ..abc.storage import BaseStorage
 from ..codec import to_json
-from ..compressor import Compressor
+from ..compressor import Compressor, read_dict
 from ..logger import logger
+from ..storage.directory import DirectoryStorage
+from ..storage.segment import DEFAULT_SEGMENT_SIZE, SegmentStorage
 from ..types import ErrorInfo
 
+# Storages to flush on exit
+_storages: "weakref.WeakSet[BaseStorage]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_storages() -> None:
+    """Flush pending occurrence counters of the alive storages."""
+    for storage in list(_storages):
+        storage.flush()
+
 
 class ErrorInfoMiddleware(BaseMiddleware):
     """
-    Dump error to JSON file.
+    Dump error to JSON file or to the segment log.
+
+    Repeated occurrences of the stored errors are counted
+    by `directory` storage. Counters are aggregated in memory
+    and flushed to the summary index periodically and on exit.
 
     Use `err` tool to manipulate collected files.
 
@@ -31,9 +52,40 @@ class ErrorInfoMiddleware(BaseMiddleware):
             * `gz` - GZip
             * `bz2` - BZip2
             * `xz` - LZMA/xz
+            * `zst` - Zstandard (Python 3.14+ or `backports.zstd`)
+
+        compress_level: Compression level, if supported by `compress`.
+        compress_dict: Path to the trained compression dictionary
+            (`zst` only). Use `err train-dict` to train the dictionary.
+        storage: Storage layout. One of:
+
+            * `directory` - one file per fingerprint.
+            * `segment` - append-only segment log.
+
+        segment_size: Segment rotation threshold (`segment` only).
+        shard_depth: Number of shard directory levels (`directory` only).
+            Set to split the large directories into the fan-out
+            layout, like `ab/cd/<fingerprint>.json.gz` for `2`.
+        fsync: Durability policy. One of:
+
+            * `never` - leave flushing to the operating system.
+            * `file` - sync written files.
+            * `directory` - sync written files and their directories.
+
+        max_files: Maximal number of stored errors (`directory` only).
+        max_bytes: Maximal total size of stored errors, in bytes
+            (`directory` only).
+        max_age: Maximal age of stored errors (`directory` only).
+            The oldest errors are evicted when any limit is exceeded.
+        occurrences: Number of the recent repeated occurrences
+            to keep along with the first one (`directory` only).
+        occurrence_rate: Sampling rate of the stored occurrences,
+            from `0` (exclusive) to `1`. Limits the extra writes
+            during the error storms.
 
     Raises:
-        ValueError: If path is not writable.
+        ValueError: If path is not writable, dictionary
+            cannot be read, or storage settings are invalid.
 
 
     Examples:
@@ -48,6 +100,17 @@ class ErrorInfoMiddleware(BaseMiddleware):
         self,
         path: Path | str,
         compress: str | None = None,
+        compress_level: int | None = None,
+        compress_dict: Path | str | None = None,
+        storage: str = "directory",
+        segment_size: int = DEFAULT_SEGMENT_SIZE,
+        shard_depth: int = 0,
+        fsync: str = "never",
+        max_files: int | None = None,
+        max_bytes: int | None = None,
+        max_age: datetime.timedelta | None = None,
+        occurrences: int = 0,
+        occurrence_rate: float = 1.0,
     ) -> None:
         super().__init__()
         self.path = Path(path)
@@ -55,7 +118,47 @@ class ErrorInfoMiddleware(BaseMiddleware):
         if not os.access(self.path, os.W_OK):
             msg = f"{path} is not writable"
             raise ValueError(msg)
-        self.compressor = Compressor(format=compress)
+        dictionary = (
+            read_dict(compress_dict) if compress_dict is not None else None
+        )
+        self.compressor = Compressor(
+            format=compress, level=compress_level, dictionary=dictionary
+        )
+        if not 0.0 < occurrence_rate <= 1.0:
+            msg = "occurrence_rate must be in range (0, 1]"
+            raise ValueError(msg)
+        self.occurrence_rate = occurrence_rate
+        self.storage: BaseStorage
+        if storage == "directory":
+            self.storage = DirectoryStorage(
+                self.path,
+                self.compressor,
+                shard_depth=shard_depth,
+                fsync=fsync,
+                max_files=max_files,
+                max_bytes=max_bytes,
+                max_age=max_age,
+                occurrences=occurrences,
+            )
+        elif storage == "segment":
+            if max_files is not None or max_bytes is not None or max_age:
+                msg = "Retention limits are not supported by segment storage"
+                raise ValueError(msg)
+            if occurrences:
+                msg = "Occurrences are not supported by segment storage"
+                raise ValueError(msg)
+            self.storage = SegmentStorage(
+                self.path,
+                self.compressor,
+                segment_size=segment_size,
+                fsync=fsync,
+            )
+        else:
+            msg = f"Unknown storage: {storage}"
+            raise ValueError(msg)
+        self.occurrences = occurrences
+        # Flush pending occurrence counters on exit
+        _storages.add(self.storage)
 
     def process(self, info: ErrorInfo) -> None:
         """Middleware entrypoing.
@@ -63,13 +166,17 @@ class ErrorInfoMiddleware(BaseMiddleware):
         Args:
             info: ErrorInfo instance.
         """
-        # ErrorInfo path
-        fn = self.path / f"{info.fingerprint}.json{self.compressor.suffix}"
-        try:
-            with open(fn, "xb") as fp:
-                logger.warning("Writing error info into %s", fn)
-                fp.write(self.compressor.encode(to_json(info).encode()))
-        except FileExistsError:
-            logger.warning(
-                "Error %s is already registered. Skipping.", info.fingerprint
-            )
+        # Serialize only the new records and the stored occurrences
+        data: bytes | None = None
+        if not self.storage.hit(info):
+            data = to_json(info).encode()
+            if self.storage.write_info(info, data):
+                return
+        logger.warning("Error %s is already registered.", info.fingerprint)
+        if self.occurrences and (
+            self.occurrence_rate >= 1.0
+            or random.random() < self.occurrence_rate  # noqa: S311
+        ):
+            if data is None:
+                data = to_json(info).encode()
+            self.storage.write_occurrence(str(info.fingerprint), data)
@@ -0,0 +1,91 @@
+# ---------------------------------------------------------------------
+# Gufo Err: SqliteErrorInfoMiddleware
+# ---------------------------------------------------------------------
+# Copyright (C) 2022-26, Gufo Labs
+# ---------------------------------------------------------------------
+"""SqliteErrorInfo middleware."""
+
+# Python modules
+import os
+import sqlite3
+from pathlib import Path
+
+# Gufo Labs modules
+from ..abc.middleware import BaseMiddleware
+from ..codec import to_json
+from ..compressor import Compressor, read_dict
+from ..logger import logger
+from ..storage.sqlite import SqliteStorage
+from ..types import ErrorInfo
+
+
+class SqliteErrorInfoMiddleware(BaseMiddleware):
+    """
+    Dump error to SQLite database.
+
+    Error summary is stored in the indexed columns, so
+    `err --db <path>` lists errors without decoding the
+    records. Repeated errors increase the occurrence counter.
+
+    Args:
+        path: Path to database file. Created if not exists.
+        compress: Record compression algorithm. See
+            [ErrorInfoMiddleware][gufo.err.middleware.errorinfo.ErrorInfoMiddleware]
+            for details.
+        compress_level: Compression level, if supported by `compress`.
+        compress_dict: Path to the trained compression dictionary
+            (`zst` only).
+
+    Raises:
+        ValueError: If database is not writable or dictionary
+            cannot be read.
+
+    Examples:
+        ``` py
+        from gufo.err import err
+        from gufo.err.middleware.sqlite import SqliteErrorInfoMiddleware
+
+        err.setup(middleware=[SqliteErrorInfoMiddleware("/var/err/err.db")])
+        ```
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        compress: str | None = None,
+        compress_level: int | None = None,
+        compress_dict: Path | str | None = None,
+    ) -> None:
+        super().__init__()
+        self.path = Path(path)
+        # Check permissions
+        if not os.access(
+            self.path if self.path.exists() else self.path.parent, os.W_OK
+        ):
+            msg = f"{path} is not writable"
+            raise ValueError(msg)
+        dictionary = (
+            read_dict(compress_dict) if compress_dict is not None else None
+        )
+        self.compressor = Compressor(
+            format=compress, level=compress_level, dictionary=dictionary
+        )
+        self.storage = SqliteStorage(self.path, self.compressor)
+
+    def process(self, info: ErrorInfo) -> None:
+        """Middleware entrypoint.
+
+        Args:
+            info: ErrorInfo instance.
+        """
+        try:
+            if self.storage.hit(info) or not self.storage.write_info(
+                info, to_json(info).encode()
+            ):
+                logger.warning(
+                    "Error %s is already registered. Counting.",
+                    info.fingerprint,
+                )
+        except sqlite3.OperationalError as e:
+            # Database is locked longer than the busy timeout
+            logger.error("Cannot write error %s: %s", info.fingerprint, e)
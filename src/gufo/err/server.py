@@ -0,0 +1,455 @@
+# ---------------------------------------------------------------------
+# Gufo Err: HTTP viewer
+# ---------------------------------------------------------------------
+# Copyright (C) 2022-26, Gufo Labs
+# ---------------------------------------------------------------------
+"""Read-only HTTP viewer of the stored errors."""
+
+# Python modules
+import html
+import json
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+# Gufo Err modules
+from .abc.storage import BaseStorage, Summary, SummaryFilter
+from .cli import SERVE_CACHE_SIZE, SERVE_INTERVAL, SORT_KEYS, Cli, ListItem
+from .formatter.loader import get_formatter
+from .logger import logger
+from .stats import Stats
+from .types import ErrorInfo
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+</head>
+<body>
+<h1>{title}</h1>
+{body}
+</body>
+</html>
+"""
+
+
+class ErrorIndex:
+    """In-memory index of the stored errors.
+
+    Summaries of all records are collected on the first refresh.
+    Then the storages are polled for the new and the changed
+    records via `BaseStorage.iter_new()`, so the cost
+    of the refresh depends on the number of changes. Decoded
+    records are kept in the LRU cache, so repeated views
+    don't decode the records again. The index is shared
+    by the request threads.
+
+    Args:
+        storages: Error info storages.
+        cache_size: Maximal number of the cached decoded records.
+        interval: Minimal interval between refreshes, in seconds.
+
+    Raises:
+        ValueError: On invalid `cache_size` or `interval`.
+    """
+
+    def __init__(
+        self,
+        storages: list[BaseStorage],
+        cache_size: int = SERVE_CACHE_SIZE,
+        interval: float = SERVE_INTERVAL,
+    ) -> None:
+        if cache_size < 1:
+            msg = "cache_size must be positive"
+            raise ValueError(msg)
+        if interval < 0:
+            msg = "interval must not be negative"
+            raise ValueError(msg)
+        self.storages = storages
+        self.cache_size = cache_size
+        self.interval = interval
+        self._known: list[set[str]] = [set() for _ in storages]
+        self._loaded = False
+        self._summaries: dict[str, Summary] = {}
+        self._cache: OrderedDict[str, ErrorInfo] = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshed = time.monotonic()
+
+    @staticmethod
+    def on_error(fp: str, e: Exception) -> None:
+        """Log record read error.
+
+        Args:
+            fp: Stringified fingerprint.
+            e: Exception.
+        """
+        logger.error("Cannot read %s: %s", fp, e)
+
+    def refresh(self, force: bool = False) -> int:
+        """Apply the storage changes to the index.
+
+        Args:
+            force: Refresh, even if the interval is not passed.
+
+        Returns:
+            Number of the new and the changed records.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if not self._loaded:
+                self._refreshed = now
+                return self._load()
+            if not force and now - self._refreshed < self.interval:
+                return 0
+            self._refreshed = now
+            n = 0
+            deleted = False
+            for storage, known in zip(self.storages, self._known, strict=True):
+                size = len(known)
+                updated: set[str] = set()
+                changed = list(storage.iter_new(known, updated))
+                deleted |= len(known) < size + len(changed)
+                changed += updated
+                self._update(storage, changed)
+                n += len(changed)
+            if deleted:
+                self._drop_deleted()
+            return n
+
+    def _load(self) -> int:
+        """Collect the summaries of all records.
+
+        Returns:
+            Number of the loaded records.
+        """
+        for storage, known in zip(self.storages, self._known, strict=True):
+            # Skip the changes, made before the start
+            for _ in storage.iter_new(known):
+                pass
+            # Records, missed in the storage indexes
+            known.update(storage.iter_fingerprints())
+            self._update(storage, known)
+        self._loaded = True
+        return len(self._summaries)
+
+    def _update(
+        self, storage: BaseStorage, fingerprints: Iterable[str]
+    ) -> None:
+        """Reload the summaries of the changed records.
+
+        Args:
+            storage: Storage.
+            fingerprints: Iterable of the changed fingerprints.
+        """
+        fps = list(fingerprints)
+        for fp in fps:
+            self._cache.pop(fp, None)
+        for summary in storage.iter_summary(fps, self.on_error):
+            self._summaries[summary.fingerprint] = summary
+
+    def _drop_deleted(self) -> None:
+        """Remove the deleted records from the index."""
+        for fp in list(self._summaries):
+            if not any(fp in known for known in self._known):
+                del self._summaries[fp]
+                self._cache.pop(fp, None)
+
+    def get_summaries(
+        self, where: SummaryFilter | None = None
+    ) -> list[Summary]:
+        """Get summaries of the stored records.
+
+        Args:
+            where: Optional filter.
+
+        Returns:
+            List of summaries, matching the filter.
+        """
+        self.refresh()
+        with self._lock:
+            return [
+                s
+                for s in self._summaries.values()
+                if where is None or where.match(s)
+            ]
+
+    def get_info(self, fingerprint: str) -> ErrorInfo | None:
+        """Get the decoded record.
+
+        Args:
+            fingerprint: Stringified fingerprint.
+
+        Returns:
+            * ErrorInfo instance.
+            * None, if the record is not found or cannot be read.
+        """
+        self.refresh()
+        with self._lock:
+            info = self._cache.get(fingerprint)
+            if info is not None:
+                self._cache.move_to_end(fingerprint)
+                return info
+            storages = [
+                storage
+                for storage, known in zip(
+                    self.storages, self._known, strict=True
+                )
+                if fingerprint in known
+            ]
+        # Decode without blocking the other requests
+        for storage in storages:
+            for _, info in storage.iter_info([fingerprint], self.on_error):
+                with self._lock:
+                    self._cache[fingerprint] = info
+                    if len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+                return info
+        return None
+
+
+class ErrorServer(ThreadingHTTPServer):
+    """Threaded HTTP server of the error index.
+
+    Args:
+        address: Tuple of (`host`, `port`) to listen.
+        index: Error index.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], index: ErrorIndex) -> None:
+        self.index = index
+        super().__init__(address, RequestHandler)
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """Read-only request handler.
+
+    Endpoints:
+
+    * `/`, `/list` - list of errors in HTML. Accepts `sort`, `reverse`,
+      `limit`, `format` (`html` or `json`) and the `err list`
+      filters: `since`, `until`, `name`, `exception`, `module`.
+    * `/view/<fingerprint>` - error report. Accepts `format`:
+      `extend` or `terse`.
+    * `/stats` - statistics in JSON. Accepts `limit` and the filters.
+    """
+
+    server: ErrorServer
+
+    def do_GET(self) -> None:
+        """Dispatch GET request to the `serve_<name>` method."""
+        url = urlsplit(self.path)
+        name, *args = url.path.strip("/").split("/")
+        handler = getattr(self, f"serve_{name or 'list'}", None)
+        if handler is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        query = {
+            k: v[-1]
+            for k, v in parse_qs(url.query, keep_blank_values=True).items()
+        }
+        try:
+            handler(query, *args)
+        except ValueError as e:
+            self.send_error(HTTPStatus.BAD_REQUEST, str(e))
+
+    def send(self, body: str, content_type: str) -> None:
+        """Send successful response.
+
+        Args:
+            body: Response body.
+            content_type: Content type, without the charset.
+        """
+        data = body.encode()
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    @staticmethod
+    def parse_filter(query: dict[str, str]) -> SummaryFilter:
+        """Build summary filter from the query.
+
+        Args:
+            query: Query parameters.
+
+        Returns:
+            Summary filter.
+
+        Raises:
+            ValueError: On invalid parameters.
+        """
+        since = query.get("since")
+        until = query.get("until")
+        return SummaryFilter(
+            since=Cli.parse_time(since) if since else None,
+            until=Cli.parse_time(until) if until else None,
+            name=query.get("name") or None,
+            exception=query.get("exception") or None,
+            module=query.get("module") or None,
+        )
+
+    @staticmethod
+    def parse_limit(query: dict[str, str], default: int | None) -> int | None:
+        """Get the maximal number of items.
+
+        Args:
+            query: Query parameters.
+            default: Default limit.
+
+        Returns:
+            Maximal number of items, if limited.
+
+        Raises:
+            ValueError: On invalid limit.
+        """
+        limit = query.get("limit")
+        if not limit:
+            return default
+        n = int(limit)
+        if n < 0:
+            msg = f"Invalid limit: {limit}"
+            raise ValueError(msg)
+        return n
+
+    def serve_list(self, query: dict[str, str], *args: str) -> None:
+        """Send list of errors.
+
+        Args:
+            query: Query parameters.
+            args: Path items, ignored.
+
+        Raises:
+            ValueError: On invalid parameters.
+        """
+        fmt = query.get("format", "html")
+        if fmt not in ("html", "json"):
+            msg = f"Invalid format: {fmt}"
+            raise ValueError(msg)
+        sort = query.get("sort", "ts")
+        if sort not in SORT_KEYS:
+            msg = f"Invalid sort key: {sort}"
+            raise ValueError(msg)
+        items = Cli.sort_items(
+            Cli.iter_items(
+                self.server.index.get_summaries(self.parse_filter(query))
+            ),
+            sort,
+            "reverse" in query,
+            self.parse_limit(query, None),
+        )
+        if fmt == "json":
+            self.send(
+                json.dumps([self.item_to_dict(item) for item in items]),
+                "application/json",
+            )
+        else:
+            self.send(self.render_list(items), "text/html")
+
+    @staticmethod
+    def item_to_dict(item: ListItem) -> dict[str, Any]:
+        """Convert list item to the JSON-serializable dict.
+
+        Args:
+            item: List item.
+
+        Returns:
+            Dict of item fields, timestamps in ISO 8601 format.
+        """
+        return {
+            "fingerprint": item.fingerprint,
+            "exception": item.exception,
+            "name": item.name,
+            "count": item.count,
+            "ts": item.ts.isoformat(),
+            "last_seen": item.last_seen.isoformat(),
+            "place": item.place,
+        }
+
+    @staticmethod
+    def render_list(items: list[ListItem]) -> str:
+        """Render list of errors as HTML page.
+
+        Args:
+            items: List items.
+
+        Returns:
+            HTML page.
+        """
+        columns = [
+            "Fingerprint",
+            "Exception",
+            "Service",
+            "Count",
+            "First Seen",
+            "Last Seen",
+            "Place",
+        ]
+        rows = [
+            "<tr>{}</tr>".format("".join(f"<th>{c}</th>" for c in columns))
+        ]
+        for item in items:
+            fp = html.escape(item.fingerprint)
+            cells = [
+                f'<a href="/view/{fp}">{fp}</a>',
+                html.escape(item.exception),
+                html.escape(item.name),
+                str(item.count),
+                item.ts.isoformat(),
+                item.last_seen.isoformat(),
+                html.escape(item.place),
+            ]
+            rows.append(
+                "<tr>{}</tr>".format("".join(f"<td>{c}</td>" for c in cells))
+            )
+        body = '<p><a href="/stats">Statistics</a></p>\n<table>\n{}\n</table>'
+        return PAGE.format(title="Errors", body=body.format("\n".join(rows)))
+
+    def serve_view(self, query: dict[str, str], *args: str) -> None:
+        """Send error report.
+
+        Args:
+            query: Query parameters.
+            args: Path items: stringified fingerprint.
+
+        Raises:
+            ValueError: On invalid format.
+        """
+        if len(args) != 1:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        formatter = get_formatter(query.get("format", "extend"))
+        fingerprint = args[0]
+        info = self.server.index.get_info(fingerprint)
+        if info is None:
+            self.send_error(
+                HTTPStatus.NOT_FOUND, f"{fingerprint} is not found"
+            )
+            return
+        self.send(formatter.format(info), "text/plain")
+
+    def serve_stats(self, query: dict[str, str], *args: str) -> None:
+        """Send statistics in JSON.
+
+        Args:
+            query: Query parameters.
+            args: Path items, ignored.
+
+        Raises:
+            ValueError: On invalid parameters.
+        """
+        stats = Stats().update(
+            self.server.index.get_summaries(self.parse_filter(query))
+        )
+        self.send(
+            json.dumps(stats.to_dict(self.parse_limit(query, 10))),
+            "application/json",
+        )
@@ -0,0 +1,145 @@
+# ---------------------------------------------------------------------
+# Gufo Err: Error statistics
+# ---------------------------------------------------------------------
+# Copyright (C) 2022-26, Gufo Labs
+# ---------------------------------------------------------------------
+"""Error statistics."""
+
+# Python modules
+import heapq
+from collections.abc import Iterable
+from typing import Any
+
+# Gufo Err modules
+from .abc.storage import Summary
+
+# Statistics groups
+STATS_GROUPS = ("exception", "service", "module", "hour")
+UNKNOWN = "unknown"
+
+
+class Stats:
+    """Streaming aggregation of the error summaries.
+
+    Summaries are counted in a single pass, only the counters
+    are kept for each group key. Each group counts the number
+    of records, i.e. distinct fingerprints, and the number
+    of their occurrences.
+
+    Groups:
+
+    * `exception` - exception class.
+    * `service` - application name and version.
+    * `module` - module of the application top frame.
+    * `hour` - hour of the first occurrence.
+
+    Attributes:
+        records: Total number of records.
+        occurrences: Total number of occurrences.
+        groups: Group name -> key -> [records, occurrences].
+    """
+
+    def __init__(self) -> None:
+        self.records = 0
+        self.occurrences = 0
+        self.groups: dict[str, dict[str, list[int]]] = {
+            g: {} for g in STATS_GROUPS
+        }
+
+    @staticmethod
+    def get_keys(summary: Summary) -> tuple[str, ...]:
+        """Get group keys of the summary.
+
+        Args:
+            summary: Record summary.
+
+        Returns:
+            Tuple of keys, in order of `STATS_GROUPS`.
+        """
+        if summary.version:
+            service = f"{summary.name}/{summary.version}"
+        else:
+            service = summary.name
+        hour = summary.ts.strftime("%Y-%m-%dT%H:00") if summary.ts else None
+        return (
+            summary.exception_class,
+            service,
+            summary.module or UNKNOWN,
+            hour or UNKNOWN,
+        )
+
+    def add(self, summary: Summary) -> None:
+        """Count the summary.
+
+        Args:
+            summary: Record summary.
+        """
+        self.records += 1
+        self.occurrences += summary.count
+        for group, key in zip(
+            STATS_GROUPS, self.get_keys(summary), strict=True
+        ):
+            counters = self.groups[group].get(key)
+            if counters is None:
+                self.groups[group][key] = [1, summary.count]
+            else:
+                counters[0] += 1
+                counters[1] += summary.count
+
+    def update(self, summaries: Iterable[Summary]) -> "Stats":
+        """Count the summaries.
+
+        Args:
+            summaries: Iterable of record summaries.
+
+        Returns:
+            Self.
+        """
+        for s in summaries:
+            self.add(s)
+        return self
+
+    def top(
+        self, group: str, n: int | None = None
+    ) -> list[tuple[str, int, int]]:
+        """Get the group keys with the most occurrences.
+
+        Hours are returned in chronological order, the latest
+        `n` ones, if limited.
+
+        Args:
+            group: Group name.
+            n: Maximal number of keys. All keys, if not set.
+
+        Returns:
+            List of (`key`, `records`, `occurrences`).
+        """
+        items = [(k, r, o) for k, (r, o) in self.groups[group].items()]
+        if group == "hour":
+            items.sort()
+            if n is None:
+                return items
+            return items[len(items) - n :]
+        if n is None:
+            return sorted(items, key=lambda x: (-x[2], -x[1], x[0]))
+        return heapq.nsmallest(n, items, key=lambda x: (-x[2], -x[1], x[0]))
+
+    def to_dict(self, n: int | None = None) -> dict[str, Any]:
+        """Convert statistics to the JSON-serializable dict.
+
+        Args:
+            n: Maximal number of keys per group.
+
+        Returns:
+            Dict of totals and the group tables.
+        """
+        r: dict[str, Any] = {
+            "records": self.records,
+            "occurrences": self.occurrences,
+        }
+        for group in STATS_GROUPS:
+            r[group] = [
+                {"key": k, "records": rec, "occurrences": occ}
+                for k, rec, occ in self.top(group, n)
+            ]
+        return r
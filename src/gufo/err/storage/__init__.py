@@ -0,0 +1,20 @@
+# ---------------------------------------------------------------------
+# Gufo Err: storage module
+# ---------------------------------------------------------------------
+# Copyright (C) 2022-26, Gufo Labs
+# ---------------------------------------------------------------------
+"""Error info storages.
+
+Storages keep the serialized [ErrorInfo][gufo.err.ErrorInfo]
+records. See [BaseStorage][gufo.err.abc.storage.BaseStorage]
+for details.
+
+Available out-of-box:
+
+* [DirectoryStorage][gufo.err.storage.directory.DirectoryStorage]:
+  One JSON file per fingerprint.
+* [SegmentStorage][gufo.err.storage.segment.SegmentStorage]:
+  Append-only segment log.
+* [SqliteStorage][gufo.err.storage.sqlite.SqliteStorage]:
+  SQLite database.
+"""
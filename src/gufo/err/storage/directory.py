@@ -0,0 +1,1918 @@
+# ---------------------------------------------------------------------
+# Gufo Err: DirectoryStorage
+# ---------------------------------------------------------------------
+# Copyright (C) 2022-26, Gufo Labs
+# ---------------------------------------------------------------------
+"""DirectoryStorage.
+
+Along with the records, the storage maintains the append-only
+summary index `index.jsonl`. Each line of the index is the JSON
+object with the [Summary][gufo.err.abc.storage.Summary] fields and
+the record's `file` name. Deleted records are marked with
+`{"fingerprint": ..., "deleted": true}` lines. Repeated occurrences
+are counted by `{"fingerprint": ..., "hits": ..., "last_seen": ...}`
+lines. Later lines override earlier ones. The index is compacted
+automatically, when the superseded lines outnumber the live entries,
+see `DirectoryStorage.compact_index`. Use `err reindex`
+to rebuild the index.
+
+Attributes:
+    INDEX_NAME: Summary index file name.
+    MAX_SHARD_DEPTH: Maximal number of shard directory levels.
+    DEFAULT_SHARD_DEPTH: Default number of shard directory levels
+        for `err migrate`.
+    DEFAULT_FLUSH_INTERVAL: Default interval between flushes of
+        the occurrence counters, in seconds.
+    SUFFIXES: Record file name suffixes for the supported compressions.
+    MERGE_STATE_NAME: Merge state file name, see `DirectoryStorage.merge`.
+    MERGE_POLICIES: Record selection policies for `DirectoryStorage.merge`.
+    INDEX_COMPACT_SIZE: Minimal size of the summary index, in bytes,
+        checked for the compaction.
+    INDEX_COMPACT_RATIO: Summary index is compacted, when the number
+        of lines exceeds the number of live entries by the ratio.
+"""
+
+# Python modules
+import contextlib
+import datetime
+import json
+import os
+import re
+import threading
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, BinaryIO
+
+# Gufo Err modules
+from ..abc.storage import BaseStorage, Summary, SummaryFilter
+from ..compressor import Compressor
+from ..logger import logger
+from ..types import ErrorInfo
+
+INDEX_NAME = "index.jsonl"
+MAX_SHARD_DEPTH = 4
+DEFAULT_SHARD_DEPTH = 2
+DEFAULT_FLUSH_INTERVAL = 10.0
+SUFFIXES = ("", ".gz", ".bz2", ".xz", ".zst")
+MERGE_STATE_NAME = "merge.json"
+MERGE_POLICIES = ("oldest", "newest")
+INDEX_COMPACT_SIZE = 1 << 20
+INDEX_COMPACT_RATIO = 2
+
+
+class DirectoryStorage(BaseStorage):
+    """Store each error info record in a separate file.
+
+    Records are written into `<fingerprint>.json[.<compression>]`
+    files in the given directory. Record summaries are appended
+    to the summary index, so listing the errors does not require
+    decoding the records.
+
+    Large directories may be split into the fan-out layout
+    by setting `shard_depth`. Each level of shard directories
+    is named by the next two characters of the fingerprint,
+    i.e. `ab/cd/abcd...json.gz` for `shard_depth=2`.
+    Records are read regardless of their layout.
+
+    Directory growth may be limited by `max_files`, `max_bytes`,
+    and `max_age`. Limits are enforced on each write, evicting
+    the least recently seen records first. Sizes and modification
+    times of the records are accounted in memory, so the directory
+    is scanned only once per instance. Records, written by the
+    other processes after the scan, are evicted by the next
+    `prune` call. `max_bytes` includes the summary index
+    and the merge state.
+
+    Up to `occurrences` recent repeated occurrences may be kept
+    in the ring of `<fingerprint>.<slot>.json[.<compression>]`
+    files next to the record. Occurrences are not accounted
+    by the retention limits and are removed along with the record.
+
+    Args:
+        path: Path to directory.
+        compressor: Compressor for written records. Records are
+            read regardless of their compression.
+        shard_depth: Number of shard directory levels
+            for written records. `0` - flat layout.
+        fsync: Durability policy, one of `never`, `file`, `directory`.
+        max_files: Maximal number of records.
+        max_bytes: Maximal total size of the records, in bytes.
+        max_age: Maximal age of the records.
+        flush_interval: Minimal interval between flushes
+            of the occurrence counters, in seconds.
+        occurrences: Number of the recent occurrences to keep
+            along with the first one. See `write_occurrence`.
+
+    Raises:
+        ValueError: On invalid `shard_depth`, `fsync`, limits,
+            or `occurrences`.
+    """
+
+    rx_fn = re.compile(
+        r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\.json"
+        r"(|\.gz|\.bz2|\.xz|\.zst)$"
+    )
+
+    rx_shard = re.compile(r"^[0-9a-f]{2}$")
+
+    counts_occurrences = True
+
+    def __init__(
+        self,
+        path: Path | str,
+        compressor: Compressor | None = None,
+        shard_depth: int = 0,
+        fsync: str = "never",
+        max_files: int | None = None,
+        max_bytes: int | None = None,
+        max_age: datetime.timedelta | None = None,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        occurrences: int = 0,
+    ) -> None:
+        if not 0 <= shard_depth <= MAX_SHARD_DEPTH:
+            msg = f"shard_depth must be in range 0..{MAX_SHARD_DEPTH}"
+            raise ValueError(msg)
+        self.check_limits(max_files, max_bytes, max_age)
+        if occurrences < 0:
+            msg = "occurrences must not be negative"
+            raise ValueError(msg)
+        self.path = Path(path)
+        self.compressor = compressor or Compressor()
+        self.shard_depth = shard_depth
+        self.fsync = self.check_fsync(fsync)
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._index: dict[str, str] | None = None
+        # Top-level file names, other than records
+        self._names: list[str] | None = None
+        self._summaries: dict[str, tuple[Summary, str]] | None = None
+        # fingerprint -> (mtime, size), ordered by mtime
+        self._usage: dict[str, tuple[float, int]] | None = None
+        self._usage_bytes = 0
+        # fingerprint -> last occurrence, least recently seen first
+        self._last_seen: dict[str, float] | None = None
+        self._usage_lock = threading.Lock()
+        self.flush_interval = flush_interval
+        # fingerprint -> (count, last seen)
+        self._hits: dict[str, tuple[int, datetime.datetime]] = {}
+        self._hits_flushed = time.monotonic()
+        self._hits_lock = threading.Lock()
+        self._flush_timer: threading.Timer | None = None
+        self.occurrences = occurrences
+        # fingerprint -> last written occurrence slot
+        self._slots: dict[str, int] = {}
+        # (inode, position) of the read summary index
+        self._tail = (0, 0)
+        # (inode, position) of the index, applied to the summaries
+        self._summaries_tail = (0, 0)
+        # Directory -> mtime, scanned by `iter_new`
+        self._dirs: dict[str, int] = {}
+        # Index size to check for the compaction
+        self._compact_at: int | None = None
+        # Segment log of the archived records, directory mtime
+        self._archive: BaseStorage | None = None
+        self._archive_mtime = 0
+
+    @staticmethod
+    def check_limits(
+        max_files: int | None = None,
+        max_bytes: int | None = None,
+        max_age: datetime.timedelta | None = None,
+    ) -> None:
+        """Check retention limits.
+
+        Args:
+            max_files: Maximal number of records.
+            max_bytes: Maximal total size of the records, in bytes.
+            max_age: Maximal age of the records.
+
+        Raises:
+            ValueError: On negative limits.
+        """
+        if max_files is not None and max_files < 0:
+            msg = "max_files must not be negative"
+            raise ValueError(msg)
+        if max_bytes is not None and max_bytes < 0:
+            msg = "max_bytes must not be negative"
+            raise ValueError(msg)
+        if max_age is not None and max_age.total_seconds() < 0:
+            msg = "max_age must not be negative"
+            raise ValueError(msg)
+
+    def get_index(self) -> dict[str, str]:
+        """Get fingerprint index.
+
+        Both flat and sharded layouts are scanned.
+        Index is cached and updated by writes and deletes.
+
+        Returns:
+            Dict of fingerprint -> file path, relative to the directory.
+        """
+        if self._index is None:
+            self._index = {}
+            self._names = []
+            self._scan_dir("", 0, self._index, names=self._names)
+        return self._index
+
+    def get_names(self) -> list[str]:
+        """Get top-level file names, other than the records.
+
+        Names, like the summary index or the segment logs,
+        are collected by the index scan, so the directory
+        is not listed again.
+
+        Returns:
+            List of file names.
+        """
+        if self._names is None:
+            self._index = None
+            self.get_index()
+        return self._names or []
+
+    def _scan_dir(
+        self,
+        rel: str,
+        depth: int,
+        index: dict[str, str],
+        usage: list[tuple[float, str, int]] | None = None,
+        names: list[str] | None = None,
+    ) -> None:
+        """Scan directory and its shards.
+
+        Args:
+            rel: Directory path, relative to the storage.
+            depth: Current shard depth.
+            index: Resulting index to fill.
+            usage: Optional list of (`mtime`, `fingerprint`, `size`)
+                to fill from the cached stat results of the directory
+                entries.
+            names: Optional list to fill with the names of the other
+                entries of the directory, shards excluded.
+        """
+        with os.scandir(self.path / rel) as it:
+            for entry in it:
+                name = entry.name
+                if self.rx_fn.match(name):
+                    fp = name.split(".")[0]
+                    index[fp] = os.path.join(rel, name)
+                    if usage is not None:
+                        with contextlib.suppress(FileNotFoundError):
+                            st = entry.stat()
+                            usage.append((st.st_mtime, fp, st.st_size))
+                elif (
+                    depth < MAX_SHARD_DEPTH
+                    and self.rx_shard.match(name)
+                    and entry.is_dir()
+                ):
+                    self._scan_dir(
+                        os.path.join(rel, name), depth + 1, index, usage
+                    )
+                elif names is not None:
+                    names.append(name)
+
+    def get_file_name(
+        self, fingerprint: str, shard_depth: int, name: str | None = None
+    ) -> str:
+        """Get record file path for the layout.
+
+        Args:
+            fingerprint: Stringified fingerprint.
+            shard_depth: Number of shard directory levels.
+            name: File name. Use the compressor's suffix if not set.
+
+        Returns:
+            File path, relative to the directory.
+        """
+        shards = [fingerprint[i * 2 : i * 2 + 2] for i in range(shard_depth)]
+        return os.path.join(
+            *shards, name or f"{fingerprint}.json{self.compressor.suffix}"
+        )
+
+    def get_path(self, fingerprint: str) -> Path | None:
+        """Get path to the record file.
+
+        Args:
+            fingerprint: Stringified fingerprint.
+
+        Returns:
+            * File path, if the record exists.
+            * None otherwise.
+        """
+        fn = self.get_index().get(fingerprint)
+        if fn is None:
+            return None
+        return self.path / fn
+
+    def iter_fingerprints(self) -> Iterable[str]:
+        """Iterate over all stored fingerprints.
+
+        Returns:
+            Iterable of stringified fingerprints.
+        """
+        return iter(self.get_index())
+
+    def read(self, fingerprint: str) -> bytes | None:
+        """Read the record.
+
+        Args:
+            fingerprint: Stringified fingerprint.
+
+        Returns:
+            * Uncompressed JSON record, if found.
+            * None, if the record is not found.
+
+        Raises:
+            ValueError: If the record cannot be decompressed.
+        """
+        path = self.get_path(fingerprint)
+        if path is None:
+            return None
+        return self._read_file(path)
+
+    def _read_file(self, path: Path) -> bytes | None:
+        """Read and decompress the file.
+
+        Args:
+            path: File path.
+
+        Returns:
+            * Uncompressed content, if found.
+            * None, if the file is not found.
+
+        Raises:
+            ValueError: If the file cannot be decompressed.
+        """
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        # Detect by magic bytes to process renamed files.
+        # Dictionaries are looked up in the top directory.
+        try:
+            return Compressor.autodetect(
+                str(self.path / path.name), data
+            ).decode(data)
+        except ValueError as e:
+            msg = f"Cannot decompress file {path}: {e}"
+            raise ValueError(msg) from e
+
+    def write(self, fingerprint: str, data: bytes) -> bool:
+        """Write the record, if not exists.
+
+        Args:
+            fingerprint: Stringified fingerprint.
+            data: Uncompressed JSON record.
+
+        Returns:
+            * True, if the record has been written.
+            * False, if the record is already exists.
+        """
+        from ..codec import from_json
+
+        summary = Summary.from_info(from_json(data.decode()))
+        summary.fingerprint = fingerprint
+        return self._write(summary, data)
+
+    def write_info(self, info: ErrorInfo, data: bytes) -> bool:
+        """Write the record, if not exists.
+
+        The occurrence counter of the existing record is increased.
+        Counters are aggregated in memory and appended to the
+        summary index at most once per `flush_interval`.
+
+        Args:
+            info: ErrorInfo instance.
+            data: Uncompressed JSON record.
+
+        Returns:
+            * True, if the record has been written.
+            * False, if the record is already exists.
+        """
+        summary = Summary.from_info(info)
+        if self._write(summary, data):
+            return True
+        self._hit(summary.fingerprint, summary.ts or datetime.datetime.now())
+        return False
+
+    def hit(self, info: ErrorInfo) -> bool:
+        """Count the occurrence of the existing record.
+
+        Args:
+            info: ErrorInfo instance.
+
+        Returns:
+            * True, if the record exists and the occurrence is counted.
+            * False, if the record must be written by `write_info`.
+        """
+        fp = str(info.fingerprint)
+        if self._exists(fp):
+            self._hit(fp, info.timestamp or datetime.datetime.now())
+            return True
+        # Occurrences of the archived records are not counted
+        return self._is_archived(fp)
+
+    def _hit(self, fingerprint: str, ts: datetime.datetime) -> None:
+        """Count the occurrence of the existing record.
+
+        Pending counters are flushed by the timer, when
+        the `flush_interval` is not expired yet.
+
+        Args:
+            fingerprint: Stringified fingerprint.
+            ts: Occurrence timestamp.
+        """
+        with self._usage_lock:
+            if self._last_seen is not None and fingerprint in self._last_seen:
+                t = max(self._last_seen.pop(fingerprint), ts.timestamp())
+                self._last_seen[fingerprint] = t
+        with self._hits_lock:
+            count = (
+                self._hits[fingerprint][0] if fingerprint in self._hits else 0
+            )
+            self._hits[fingerprint] = (count + 1, ts)
+            delay = self.flush_interval - (
+                time.monotonic() - self._hits_flushed
+            )
+            if delay > 0:
+                if self._flush_timer is None:
+                    self._flush_timer = threading.Timer(delay, self.flush)
+                    self._flush_timer.daemon = True
+                    self._flush_timer.start()
+                return
+        self.flush()
+
+    def flush(self) -> None:
+        """Append pending occurrence counters to the summary index."""
+        with self._hits_lock:
+            hits, self._hits = self._hits, {}
+            self._hits_flushed = time.monotonic()
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+        if hits:
+            self._append_index(
+                *(
+                    {
+                        "fingerprint": fp,
+                        "hits": count,
+                        "last_seen": ts.isoformat(),
+                    }
+                    for fp, (count, ts) in hits.items()
+                )
+            )
+
+    def _write(self, summary: Summary, data: bytes) -> bool:
+        """Write the record and append the summary to the index.
+
+        Args:
+            summary: Record summary.
+            data: Uncompressed JSON record.
+
+        Returns:
+            * True, if the record has been written.
+            * False, if the record is already exists.
+        """
+        fp = summary.fingerprint
+        fn = self.get_file_name(fp, self.shard_depth)
+        path = self.path / fn
+        if summary.ts is None:
+            summary.ts = summary.last_seen = datetime.datetime.now()
+        if self._exists(fp) or self._is_archived(fp):
+            return False
+        if self.shard_depth:
+            path.parent.mkdir(parents=True, exist_ok=True)
+        payload = self.compressor.encode(data)
+        try:
+            self._write_file(path, payload, exclusive=True)
+        except FileExistsError:
+            return False  # Written by the concurrent writer
+        if self._index is not None:
+            self._index[fp] = fn
+        self._append_index(self._summary_to_dict(summary, fn))
+        with self._usage_lock:
+            if self._usage is not None:
+                self._usage[fp] = (time.time(), len(payload))
+                self._usage_bytes += len(payload)
+            if self._last_seen is not None:
+                self._last_seen[fp] = time.time()
+        if (
+            self.max_files is not None
+            or self.max_bytes is not None
+            or self.max_age is not None
+        ):
+            self.prune(self.max_files, self.max_bytes, self.max_age)
+        return True
+
+    def _exists(self, fingerprint: str) -> bool:
+        """Check the record file exists in any layout and format.
+
+        Args:
+            fingerprint: Stringified fingerprint.
+
+        Returns:
+            True, if the record file exists.
+        """
+        return self._probe(fingerprint) is not None
+
+    def _probe(self, fingerprint: str) -> Path | None:
+        """Find the record file by probing the layouts and formats.
+
+        The compressor's format is probed first, then the
+        formats, left by the recompression.
+
+        Args:
+            fingerprint: Stringified fingerprint.
+
+        Returns:
+            * File path, if the record exists.
+            * None otherwise.
+        """
+        for suffix in dict.fromkeys((self.compressor.suffix, *SUFFIXES)):
+            name = f"{fingerprint}.json{suffix}"
+            for depth in range(MAX_SHARD_DEPTH + 1):
+                path = self.path / self.get_file_name(fingerprint, depth, name)
+                if path.exists():
+                    return path
+        return None
+
+    def _is_archived(self, fingerprint: str) -> bool:
+        """Check the record is archived into the segment log.
+
+        Segment logs are looked up again only when
+        the directory is changed.
+
+        Args:
+            fingerprint: Stringified fingerprint.
+
+        Returns:
+            True, if the segment log contains the record.
+        """
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except OSError:
+            return False
+        if mtime != self._archive_mtime:
+            from .segment import SegmentStorage
+
+            self._archive_mtime = mtime
+            self._archive = (
+                SegmentStorage(self.path)
+                if SegmentStorage.exists(self.path)
+                else None
+            )
+        return self._archive is not None and bool(
+            self._archive.find([fingerprint])
+        )
+
+    def _write_file(
+        self, path: Path, payload: bytes, exclusive: bool = False
+    ) -> None:
+        """Atomically write the record file.
+
+        Write to the temporary file and move it into place,
+        so the readers never see the partial records.
+
+        Args:
+            path: File path.
+            payload: File content.
+            exclusive: Fail, if the file already exists.
+
+        Raises:
+            FileExistsError: If `exclusive` is set and the file exists.
+        """
+        logger.warning("Writing error info into %s", path)
+        self._replace_file(path, payload, exclusive)
+
+    def _replace_file(
+        self, path: Path, payload: bytes, exclusive: bool = False
+    ) -> None:
+        """Atomically replace the file content.
+
+        Exclusive files are published by the hard link, which
+        fails if the file exists, so only one of the concurrent
+        writers succeeds.
+
+        Args:
+            path: File path.
+            payload: File content.
+            exclusive: Fail, if the file already exists.
+
+        Raises:
+            FileExistsError: If `exclusive` is set and the file exists.
+        """
+        import tempfile
+
+        fd, tmp = tempfile.mkstemp(
+            suffix=".tmp", prefix=f".{path.name}.", dir=path.parent
+        )
+        is_moved = False
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+                f.flush()
+                self.sync_file(f.fileno())
+            os.chmod(tmp, 0o644)
+            if exclusive:
+                os.link(tmp, path)
+            else:
+                os.replace(tmp, path)
+                is_moved = True
+        finally:
+            if not is_moved:
+                with contextlib.suppress(OSError):
+                    os.unlink(tmp)
+        self.sync_dir(path.parent)
+
+    def _find_path(self, fingerprint: str) -> Path | None:
+        """Find the record file, bypassing the cached index.
+
+        Args:
+            fingerprint: Stringified fingerprint.
+
+        Returns:
+            * File path, if the record exists.
+            * None otherwise.
+        """
+        return self._probe(fingerprint) or self.get_path(fingerprint)
+
+    def get_occurrence_paths(
+        self, fingerprint: str, path: Path | None = None
+    ) -> list[Path]:
+        """Get stored occurrences of the record.
+
+        Args:
+            fingerprint: Stringified fingerprint.
+            path: Record path, if known.
+
+        Returns:
+            List of occurrence file paths, oldest first.
+        """
+        if path is None:
+            path = self.get_path(fingerprint)
+            if path is None:
+                return []
+        # Slots are filled contiguously from 0, probe them
+        # instead of listing the possibly huge directory.
+        r: list[tuple[int, int, Path]] = []
+        slot = 0
+        while True:
+            found = False
+            for suffix in SUFFIXES:
+                p = path.parent / f"{fingerprint}.{slot}.json{suffix}"
+                try:
+                    r.append((p.stat().st_mtime_ns, slot, p))
+                except FileNotFoundError:
+                    continue
+                found = True
+            if not found:
+                break
+            slot += 1
+        return [p for _, _, p in sorted(r)]
+
+    def write_occurrence(self, fingerprint: str, data: bytes) -> bool:
+        """Store the repeated occurrence of the existing record.
+
+        Occurrences are written into `<fingerprint>.<slot>.json[...]`
+        files next to the record, overwriting the oldest slot when
+        the ring is full.
+
+        Args:
+            fingerprint: Stringified fingerprint.
+            data: Uncompressed JSON record.
+
+        Returns:
+            * True, if the occurrence has been written.
+            * False, if the occurrences are not stored
+              or the record is not found.
+        """
+        if not self.occurrences:
+            return False
+        path = self._find_path(fingerprint)
+        if path is None:
+            return False
+        with self._hits_lock:
+            slot = self._slots.get(fingerprint)
+        if slot is None:
+            # Continue after the latest stored slot
+            stored = self.get_occurrence_paths(fingerprint, path)
+            slot = int(stored[-1].name.split(".")[1]) if stored else -1
+        slot = (slot + 1) % self.occurrences
+        with self._hits_lock:
+            self._slots[fingerprint] = slot
+        self._write_file(
+            path.parent / f"{fingerprint}.{slot}.json{self.compressor.suffix}",
+            self.compressor.encode(data),
+        )
+        return True
+
+    def read_occurrence(self, fingerprint: str, n: int) -> bytes | None:
+        """Read the stored occurrence.
+
+        Args:
+            fingerprint: Stringified fingerprint.
+            n: Occurrence index in chronological order. `0` - the
+                first occurrence, negative values count from the latest.
+
+        Returns:
+            * Uncompressed JSON record, if found.
+            * None, if the record or the occurrence is not found.
+
+        Raises:
+            ValueError: If the occurrence cannot be decompressed.
+        """
+        path = self.get_path(fingerprint)
+        if path is None:
+            return None
+        paths = [path, *self.get_occurrence_paths(fingerprint, path)]
+        if not -len(paths) <= n < len(paths):
+            return None
+        return self._read_file(paths[n])
+
+    def delete(self, fingerprint: str) -> bool:
+        """Delete the record along with the stored occurrences.
+
+        Args:
+            fingerprint: Stringified fingerprint.
+
+        Returns:
+            * True, if the record has been deleted.
+            * False, if the record is not found.
+        """
+        is_removed = self._unlink(fingerprint)
+        self._forget(fingerprint)
+        if not is_removed:
+            return False
+        self._append_index({"fingerprint": fingerprint, "deleted": True})
+        return True
+
+    def _forget(self, fingerprint: str) -> None:
+        """Remove the record from the cached index and accounting.
+
+        Args:
+            fingerprint: Stringified fingerprint.
+        """
+        if self._index is not None:
+            self._index.pop(fingerprint, None)
+        with self._hits_lock:
+            self._slots.pop(fingerprint, None)
+        with self._usage_lock:
+            if self._usage is not None:
+                usage = self._usage.pop(fingerprint, None)
+                if usage is not None:
+                    self._usage_bytes -= usage[1]
+            if self._last_seen is not None:
+                self._last_seen.pop(fingerprint, None)
+
+    def _unlink(self, fingerprint: str) -> bool:
+        """Remove the record files.
+
+        Args:
+            fingerprint: Stringified fingerprint.
+
+        Returns:
+            * True, if the record has been removed.
+            * False, if the record is not found.
+        """
+        path = self.get_path(fingerprint)
+        if path is None:
+            return False
+        for p in self.get_occurrence_paths(fingerprint, path):
+            with contextlib.suppress(FileNotFoundError):
+                p.unlink()
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            return False
+        return True
+
+    def delete_many(
+        self,
+        fingerprints: Iterable[str],
+        on_error: Callable[[str, Exception], None] | None = None,
+        jobs: int = 1,
+    ) -> int:
+        """Delete multiple records.
+
+        Files are removed by the pool of `jobs` threads, which
+        pays off on the network filesystems. Deleted records are
+        appended to the summary index by the single write.
+
+        Args:
+            fingerprints: Iterable of stringified fingerprints.
+            on_error: Optional callable, accepting fingerprint and
+                exception for the records, which cannot be removed.
+                Errors are raised if not set.
+            jobs: Number of threads.
+
+        Returns:
+            Number of deleted records.
+
+        Raises:
+            OSError: On remove errors and `on_error` is not set.
+        """
+
+        def unlink(fp: str) -> bool | OSError:
+            try:
+                return self._unlink(fp)
+            except OSError as e:
+                return e
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        fps = list(fingerprints)
+        self.get_index()  # Scan before starting threads
+        deleted: list[str] = []
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            for fp, r in zip(fps, pool.map(unlink, fps), strict=True):
+                if r is True:
+                    deleted.append(fp)
+                elif isinstance(r, OSError):
+                    if on_error is None:
+                        raise r
+                    on_error(fp, r)
+        for fp in deleted:
+            self._forget(fp)
+        if deleted:
+            self._append_index(
+                *({"fingerprint": fp, "deleted": True} for fp in deleted)
+            )
+        return len(deleted)
+
+    def recompress(
+        self,
+        fingerprints: Iterable[str],
+        compressor: Compressor,
+        on_error: Callable[[str, Exception], None] | None = None,
+        jobs: int = 1,
+    ) -> int:
+        """Recompress the records along with the stored occurrences.
+
+        Files are recompressed by the pool of `jobs` threads,
+        as the compressors release the GIL. Each file is atomically
+        replaced by the recompressed one with the same modification
+        time, then the old file is removed, so the record is always
+        readable. Files, already having the target suffix, are
+        skipped. New file names are appended to the summary index
+        by the single write.
+
+        Args:
+            fingerprints: Iterable of stringified fingerprints.
+            compressor: Target compressor.
+            on_error: Optional callable, accepting fingerprint and
+                exception for the records, which cannot be
+                recompressed. Errors are raised if not set.
+            jobs: Number of compressing threads.
+
+        Returns:
+            Number of recompressed records.
+
+        Raises:
+            ValueError: If the file cannot be decompressed and
+                `on_error` is not set.
+            OSError: On read or write errors and `on_error` is not set.
+        """
+
+        def convert(fp: str) -> str | None | Exception:
+            try:
+                return self._recompress(fp, compressor)
+            except (OSError, ValueError) as e:
+                return e
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        fps = list(fingerprints)
+        # Indexed summaries of the current file names
+        summaries = self.get_summaries()
+        converted: dict[str, str] = {}
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            for fp, r in zip(fps, pool.map(convert, fps), strict=True):
+                if isinstance(r, Exception):
+                    if on_error is None:
+                        raise r
+                    on_error(fp, r)
+                elif r is not None:
+                    converted[fp] = r
+        if not converted:
+            return 0
+        entries = [
+            self._summary_to_dict(summaries[fp][0], fn)
+            for fp, fn in converted.items()
+            if fp in summaries
+        ]
+        if self._index is not None:
+            self._index.update(converted)
+        with self._usage_lock:
+            self._usage = None
+            self._last_seen = None
+        if entries:
+            self._append_index(*entries)
+        return len(converted)
+
+    def _recompress(
+        self, fingerprint: str, compressor: Compressor
+    ) -> str | None:
+        """Recompress the record along with the stored occurrences.
+
+        Args:
+            fingerprint: Stringified fingerprint.
+            compressor: Target compressor.
+
+        Returns:
+            * New record file name, relative to the directory.
+            * None, if the record is not found or not changed.
+
+        Raises:
+            ValueError: If the file cannot be decompressed.
+            OSError: On read or write errors.
+        """
+        fn = self.get_index().get(fingerprint)
+        if fn is None:
+            return None
+        path = self.path / fn
+        paths = [path, *self.get_occurrence_paths(fingerprint, path)]
+        changed = [p for p in paths if self._recompress_file(p, compressor)]
+        if not changed:
+            return None
+        return os.path.join(
+            os.path.dirname(fn), f"{fingerprint}.json{compressor.suffix}"
+        )
+
+    def _recompress_file(self, path: Path, compressor: Compressor) -> bool:
+        """Atomically recompress the file, keeping its modification time.
+
+        Args:
+            path: File path.
+            compressor: Target compressor.
+
+        Returns:
+            True, if the file has been recompressed.
+
+        Raises:
+            ValueError: If the file cannot be decompressed.
+            OSError: On read or write errors.
+        """
+        stem, _, suffix = path.name.partition(".json")
+        if suffix == compressor.suffix:
+            return False
+        st = path.stat()
+        data = self._read_file(path)
+        if data is None:
+            return False
+        new_path = path.parent / f"{stem}.json{compressor.suffix}"
+        self._replace_file(new_path, compressor.encode(data))
+        os.utime(new_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        path.unlink()
+        return True
+
+    def get_usage(self) -> dict[str, tuple[float, int]]:
+        """Get disk usage accounting.
+
+        Accounting is built on the first call by the single
+        directory scan, which refreshes the fingerprint index
+        as well, and updated by writes and deletes.
+
+        Returns:
+            Dict of fingerprint -> (`mtime`, `size`), ordered
+            by modification time, oldest first.
+        """
+        with self._usage_lock:
+            if self._usage is None:
+                index: dict[str, str] = {}
+                names: list[str] = []
+                usage: list[tuple[float, str, int]] = []
+                self._scan_dir("", 0, index, usage, names)
+                usage.sort()
+                self._index = index
+                self._names = names
+                self._usage = {fp: (mtime, size) for mtime, fp, size in usage}
+                self._usage_bytes = sum(size for _, _, size in usage)
+            return self._usage
+
+    def iter_modified(
+        self,
+        fingerprints: Iterable[str],
+        on_error: Callable[[str, Exception], None] | None = None,
+        jobs: int = 1,
+    ) -> Iterable[tuple[str, datetime.datetime]]:
+        """Get the last modification times of the records.
+
+        Modification times of the record files are taken from
+        the disk usage accounting, if loaded, see `get_usage`.
+        Otherwise, only the requested files of the cached index
+        are examined, so the directory is not scanned again.
+        Times are advanced by the indexed repeated occurrences.
+        Records are not read.
+
+        Args:
+            fingerprints: Iterable of stringified fingerprints.
+            on_error: Ignored.
+            jobs: Ignored.
+
+        Returns:
+            Iterable of (`fingerprint`, `mtime`) for existing records.
+        """
+        summaries = self.get_summaries()
+        for fp in fingerprints:
+            ts = self._get_mtime(fp)
+            if ts is None:
+                continue
+            mtime = datetime.datetime.fromtimestamp(ts)
+            indexed = summaries.get(fp)
+            last_seen = indexed[0].get_mtime() if indexed else None
+            yield fp, max(mtime, last_seen) if last_seen else mtime
+
+    def _get_mtime(self, fingerprint: str) -> float | None:
+        """Get modification time of the record file.
+
+        Args:
+            fingerprint: Stringified fingerprint.
+
+        Returns:
+            * Modification time, if the record exists.
+            * None otherwise.
+        """
+        if self._usage is not None:
+            item = self._usage.get(fingerprint)
+            return item[0] if item else None
+        fn = self.get_index().get(fingerprint)
+        if fn is None:
+            return None
+        try:
+            return os.stat(self.path / fn).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def prune(
+        self,
+        max_files: int | None = None,
+        max_bytes: int | None = None,
+        max_age: datetime.timedelta | None = None,
+    ) -> int:
+        """Remove the least recently seen records, exceeding the limits.
+
+        Records are ordered by the last occurrence, i.e. the latest
+        of the file modification time and the indexed or pending
+        `last_seen`. The summary index is compacted first, when
+        the total size exceeds `max_bytes`.
+
+        Args:
+            max_files: Maximal number of records.
+            max_bytes: Maximal total size of the records, the summary
+                index, and the merge state, in bytes.
+            max_age: Maximal age of the records.
+
+        Returns:
+            Number of removed records.
+
+        Raises:
+            ValueError: On negative limits.
+        """
+        self.check_limits(max_files, max_bytes, max_age)
+        usage = self.get_usage()
+        deadline = (
+            time.time() - max_age.total_seconds()
+            if max_age is not None
+            else None
+        )
+        with self._usage_lock:
+            count = len(usage)
+            oldest = next(iter(usage.values()))[0] if usage else None
+            total = self._usage_bytes
+        if max_bytes is not None:
+            total += self._get_meta_size()
+            if total > max_bytes and self.compact_index(ratio=1):
+                total = self._usage_bytes + self._get_meta_size()
+        # Fast path, file times are the lower bound of the last occurrence
+        if not (
+            (max_files is not None and count > max_files)
+            or (max_bytes is not None and total > max_bytes)
+            or (deadline is not None and oldest and oldest < deadline)
+        ):
+            return 0
+        last_seen = self._get_last_seen()
+        victims: list[str] = []
+        with self._usage_lock:
+            count = len(usage)
+            # Least recently seen first
+            for fp, t in last_seen.items():
+                if not (
+                    (max_files is not None and count > max_files)
+                    or (max_bytes is not None and total > max_bytes)
+                    or (deadline is not None and t < deadline)
+                ):
+                    break
+                victims.append(fp)
+                count -= 1
+                total -= usage[fp][1] if fp in usage else 0
+        n = self.delete_many(victims)
+        for fp in victims:
+            # Removed by another process
+            self._forget(fp)
+        if n:
+            logger.warning("%d error info records are pruned", n)
+        return n
+
+    def _get_meta_size(self) -> int:
+        """Get total size of the summary index and the merge state.
+
+        Returns:
+            Size in bytes.
+        """
+        r = 0
+        for name in (INDEX_NAME, MERGE_STATE_NAME):
+            with contextlib.suppress(FileNotFoundError):
+                r += os.stat(self.path / name).st_size
+        return r
+
+    def _get_last_seen(self) -> dict[str, float]:
+        """Get times of the last occurrences.
+
+        Built on the first call from the summary index and the disk
+        usage accounting, and updated by writes, hits, and deletes
+        afterwards, so the index is not reloaded on every prune.
+        Must be iterated with `_usage_lock` held.
+
+        Returns:
+            Dict of fingerprint -> timestamp of the last occurrence,
+            least recently seen first.
+        """
+        with self._usage_lock:
+            if self._last_seen is not None:
+                return self._last_seen
+        summaries = self.get_summaries()
+        with self._usage_lock:
+            if self._last_seen is None:
+                r = {
+                    fp: mtime for fp, (mtime, _) in (self._usage or {}).items()
+                }
+                for fp, (summary, _) in summaries.items():
+                    mtime = summary.get_mtime()
+                    if mtime and fp in r:
+                        r[fp] = max(r[fp], mtime.timestamp())
+                with self._hits_lock:
+                    for fp, (_, ts) in self._hits.items():
+                        if fp in r:
+                            r[fp] = max(r[fp], ts.timestamp())
+                self._last_seen = dict(sorted(r.items(), key=lambda x: x[1]))
+            return self._last_seen
+
+    @staticmethod
+    def _summary_to_dict(summary: Summary, fn: str) -> dict[str, Any]:
+        """Serialize index entry.
+
+        Args:
+            summary: Record summary.
+            fn: Record file name.
+
+        Returns:
+            JSON-serializable dict.
+        """
+        return {**summary.to_dict(), "file": fn}
+
+    @staticmethod
+    def _summary_from_dict(data: dict[str, Any]) -> tuple[Summary, str]:
+        """Deserialize index entry.
+
+        Args:
+            data: Index entry.
+
+        Returns:
+            Tuple of (summary, file name).
+
+        Raises:
+            KeyError: On missed fields.
+        """
+        ts = data["ts"]
+        last_seen = data.get("last_seen")
+        return Summary(
+            fingerprint=data["fingerprint"],
+            name=data["name"],
+            version=data["version"],
+            exception=data["exception"],
+            exception_class=data["exception_class"],
+            ts=datetime.datetime.fromisoformat(ts) if ts else None,
+            place=data["place"],
+            count=data.get("count", 1),
+            last_seen=(
+                datetime.datetime.fromisoformat(last_seen)
+                if last_seen
+                else None
+            ),
+            module=data.get("module", ""),
+            hosts=data.get("hosts") or {},
+        ), data["file"]
+
+    @staticmethod
+    def _encode_entry(entry: dict[str, Any]) -> bytes:
+        """Encode index entry to the line.
+
+        Args:
+            entry: Index entry.
+
+        Returns:
+            Encoded line.
+        """
+        return json.dumps(entry, separators=(",", ":")).encode() + b"\n"
+
+    def _append_index(self, *entries: dict[str, Any]) -> None:
+        """Append entries to the summary index.
+
+        The entries are appended by the single `write()` call, so
+        concurrent writers do not interleave.
+
+        Args:
+            entries: Index entries.
+        """
+        line = b"".join(self._encode_entry(entry) for entry in entries)
+        fd = os.open(
+            self.path / INDEX_NAME,
+            os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+            0o644,
+        )
+        try:
+            os.write(fd, line)
+            size = os.fstat(fd).st_size
+        finally:
+            os.close(fd)
+        self._summaries = None
+        # Check each time the index doubles
+        if size >= (self._compact_at or INDEX_COMPACT_SIZE):
+            if self.compact_index():
+                size = os.stat(self.path / INDEX_NAME).st_size
+            self._compact_at = max(
+                INDEX_COMPACT_SIZE, size * INDEX_COMPACT_RATIO
+            )
+
+    def compact_index(self, ratio: float = INDEX_COMPACT_RATIO) -> bool:
+        """Rewrite the summary index, dropping superseded lines.
+
+        Deleted records and counter lines are folded into one
+        entry per live record. Lines, appended by the other
+        processes to the replaced index, are carried over.
+
+        Args:
+            ratio: Compact, if the number of lines exceeds
+                the number of live entries by the ratio.
+                `0` - compact unconditionally.
+
+        Returns:
+            True, if the index has been rewritten.
+        """
+        try:
+            with open(self.path / INDEX_NAME, "rb") as f:
+                summaries, pos, lines = self._read_index(f)
+                if ratio and lines <= ratio * len(summaries):
+                    return False
+                self._write_index(
+                    [
+                        self._encode_entry(self._summary_to_dict(summary, fn))
+                        for summary, fn in summaries.values()
+                    ]
+                )
+                # Appended after the read
+                f.seek(pos)
+                tail = f.read()
+        except FileNotFoundError:
+            return False
+        tail = tail[: tail.rfind(b"\n") + 1]
+        if tail:
+            fd = os.open(self.path / INDEX_NAME, os.O_WRONLY | os.O_APPEND)
+            try:
+                os.write(fd, tail)
+            finally:
+                os.close(fd)
+        return True
+
+    def _apply_entry(
+        self, summaries: dict[str, tuple[Summary, str]], entry: dict[str, Any]
+    ) -> None:
+        """Apply index entry to the summaries.
+
+        Args:
+            summaries: Dict of fingerprint -> (summary, file name).
+            entry: Index entry.
+        """
+        fp = entry["fingerprint"]
+        if entry.get("deleted"):
+            summaries.pop(fp, None)
+        elif "hits" in entry:
+            item = summaries.get(fp)
+            if item:
+                item[0].count += int(entry["hits"])
+                item[0].last_seen = datetime.datetime.fromisoformat(
+                    entry["last_seen"]
+                )
+        else:
+            summaries[fp] = self._summary_from_dict(entry)
+
+    def get_summaries(self) -> dict[str, tuple[Summary, str]]:
+        """Read the summary index.
+
+        Broken lines, like the ones truncated by crash, are skipped.
+        Incomplete last line is left for `iter_new()`.
+        Occurrence counters are applied to the summaries.
+        Loaded summaries are kept up to date by `iter_new()`.
+
+        Returns:
+            Dict of fingerprint -> (summary, file name).
+        """
+        if self._summaries is not None:
+            return self._summaries
+        r: dict[str, tuple[Summary, str]] = {}
+        ino, pos = 0, 0
+        try:
+            with open(self.path / INDEX_NAME, "rb") as f:
+                ino = os.fstat(f.fileno()).st_ino
+                r, pos, _ = self._read_index(f)
+        except FileNotFoundError:
+            pass
+        self._summaries = r
+        self._summaries_tail = (ino, pos)
+        return r
+
+    def _read_index(
+        self, f: BinaryIO
+    ) -> tuple[dict[str, tuple[Summary, str]], int, int]:
+        """Read the complete lines of the summary index.
+
+        Args:
+            f: Summary index file.
+
+        Returns:
+            Tuple of (summaries, position of the incomplete last line,
+            number of lines).
+        """
+        r: dict[str, tuple[Summary, str]] = {}
+        pos = 0
+        lines = 0
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            pos += len(line)
+            lines += 1
+            try:
+                self._apply_entry(r, json.loads(line))
+            except (ValueError, KeyError, TypeError, AttributeError):
+                continue
+        return r, pos, lines
+
+    def _read_tail(self) -> tuple[int, bytes]:
+        """Read summary index lines, appended since the last call.
+
+        Rewritten index is read from the start.
+        Incomplete last line is left for the next call.
+
+        Returns:
+            Tuple of (position of the appended lines, appended lines).
+        """
+        try:
+            st = os.stat(self.path / INDEX_NAME)
+        except FileNotFoundError:
+            return 0, b""
+        ino, pos = self._tail
+        if st.st_ino != ino or st.st_size < pos:
+            pos = 0
+        if st.st_size == pos:
+            return pos, b""
+        with open(self.path / INDEX_NAME, "rb") as f:
+            f.seek(pos)
+            data = f.read(st.st_size - pos)
+        size = data.rfind(b"\n") + 1
+        self._tail = (st.st_ino, pos + size)
+        return pos, data[:size]
+
+    def _apply_tail(self, entry: dict[str, Any], pos: int, end: int) -> None:
+        """Apply the appended index entry to the loaded indexes.
+
+        Entries, already read by `get_summaries()`, are not
+        applied to the summaries twice.
+
+        Args:
+            entry: Index entry.
+            pos: Position of the entry in the index.
+            end: Position of the next entry.
+
+        Raises:
+            KeyError: On missed fields.
+        """
+        fp = entry["fingerprint"]
+        if self._index is not None:
+            if entry.get("deleted"):
+                self._index.pop(fp, None)
+            elif "file" in entry:
+                self._index[fp] = entry["file"]
+        ino, applied = self._summaries_tail
+        if self._summaries is not None and pos >= applied:
+            self._apply_entry(self._summaries, entry)
+            self._summaries_tail = (ino, end)
+
+    def get_worker_args(self) -> dict[str, Any]:
+        """Get constructor arguments to open the storage in the workers.
+
+        Returns:
+            Dict of keyword arguments.
+        """
+        return {"compressor": self.compressor, "shard_depth": self.shard_depth}
+
+    def iter_new(
+        self, known: set[str], updated: set[str] | None = None
+    ) -> Iterable[str]:
+        """Iterate the records, which are not known yet.
+
+        New records are found by reading the summary index
+        from the last read position, so the cost depends
+        on the number of the new entries, not on the number
+        of the stored records. Deleted fingerprints are
+        removed from `known`. Read entries are applied
+        to the loaded summaries, so the counters are
+        refreshed without reading the whole index.
+        Records, missed in the index, are found by listing
+        the directories, modified since the previous call.
+
+        Args:
+            known: Set of the known fingerprints.
+            updated: Optional set, collecting the known fingerprints
+                with the rewritten records or the updated counters.
+
+        Returns:
+            Iterable of the stringified fingerprints.
+        """
+        pos, data = self._read_tail()
+        if self._summaries_tail[0] != self._tail[0]:
+            self._summaries = None  # Index is rewritten
+        for line in data.splitlines(keepends=True):
+            start, pos = pos, pos + len(line)
+            try:
+                entry = json.loads(line)
+                self._apply_tail(entry, start, pos)
+                fp = entry["fingerprint"]
+            except (ValueError, KeyError, TypeError, AttributeError):
+                continue  # Broken line
+            if entry.get("deleted"):
+                known.discard(fp)
+            elif fp in known:
+                if updated is not None:
+                    updated.add(fp)
+            elif "file" in entry:
+                known.add(fp)
+                yield fp
+        for fp in self._scan_modified():
+            if fp not in known:
+                known.add(fp)
+                yield fp
+
+    def _scan_modified(self) -> list[str]:
+        """List the directories, modified since the previous call.
+
+        Directory modification times are compared, so the unchanged
+        directories are not listed.
+
+        Returns:
+            List of the fingerprints in the modified directories.
+        """
+        r: list[str] = []
+        pending = list(self._dirs) or [""]
+        while pending:
+            rel = pending.pop()
+            try:
+                mtime = os.stat(self.path / rel).st_mtime_ns
+            except FileNotFoundError:
+                self._dirs.pop(rel, None)
+                continue
+            if self._dirs.get(rel) == mtime:
+                continue
+            self._dirs[rel] = mtime
+            depth = rel.count(os.sep) + 1 if rel else 0
+            with (
+                contextlib.suppress(FileNotFoundError),
+                os.scandir(self.path / rel) as it,
+            ):
+                for entry in it:
+                    if self.rx_fn.match(entry.name):
+                        r.append(entry.name.split(".")[0])
+                    elif (
+                        depth < MAX_SHARD_DEPTH
+                        and self.rx_shard.match(entry.name)
+                        and entry.is_dir()
+                    ):
+                        pending.append(os.path.join(rel, entry.name))
+        return r
+
+    def iter_summary(
+        self,
+        fingerprints: Iterable[str],
+        on_error: Callable[[str, Exception], None] | None = None,
+        jobs: int = 1,
+        where: SummaryFilter | None = None,
+    ) -> Iterable[Summary]:
+        """Get summaries of multiple records.
+
+        Summaries are read from the summary index. Records,
+        missed in the index, are decoded. Indexed summaries
+        are filtered without decoding, while the missed records,
+        modified before `where.since`, are skipped without reading.
+
+        Args:
+            fingerprints: Iterable of stringified fingerprints.
+            on_error: Optional callable, accepting fingerprint and
+                exception for unreadable records. Errors are raised
+                if not set.
+            jobs: Number of processes, decoding the missed records.
+            where: Optional filter.
+
+        Returns:
+            Iterable of summaries for existing and readable records,
+            matching the filter.
+        """
+        index = self.get_index()
+        summaries = self.get_summaries()
+        missed: list[str] = []
+        for fp in fingerprints:
+            fn = index.get(fp)
+            if fn is None:
+                continue
+            item = summaries.get(fp)
+            if item and item[1] == fn:
+                if where is None or where.match(item[0]):
+                    yield item[0]
+            elif self._is_modified_since(fn, where):
+                missed.append(fp)
+        if missed:
+            yield from super().iter_summary(missed, on_error, jobs, where)
+
+    def _is_modified_since(self, fn: str, where: SummaryFilter | None) -> bool:
+        """Check the record file may match the filter.
+
+        Unindexed records have no repeated occurrences,
+        so the file, modified before `where.since`, cannot match.
+
+        Args:
+            fn: Record file name.
+            where: Optional filter.
+
+        Returns:
+            False, if the file is modified before `where.since`.
+        """
+        if where is None or where.since is None:
+            return True
+        try:
+            mtime = (self.path / fn).stat().st_mtime
+        except OSError:
+            return True  # Let reader report the error
+        return mtime >= where.since.timestamp()
+
+    def reindex(self) -> int:
+        """Rebuild the summary index.
+
+        Decode all records and replace the index.
+        Occurrence counters are preserved.
+
+        Returns:
+            Number of indexed records.
+        """
+        self._index = None
+        self.flush()
+        counters = {
+            fp: (summary.count, summary.last_seen)
+            for fp, (summary, _) in self.get_summaries().items()
+        }
+        from ..codec import from_json
+
+        lines: list[bytes] = []
+        for fp, fn in sorted(self.get_index().items()):
+            try:
+                data = self.read(fp)
+            except ValueError as e:
+                logger.error("Cannot index %s: %s", fn, e)
+                continue
+            if data is None:
+                continue
+            summary = Summary.from_info(from_json(data.decode()))
+            summary.fingerprint = fp
+            if fp in counters:
+                summary.count, summary.last_seen = counters[fp]
+            lines.append(
+                self._encode_entry(self._summary_to_dict(summary, fn))
+            )
+        self._write_index(lines)
+        return len(lines)
+
+    def _write_index(self, lines: list[bytes]) -> None:
+        """Atomically replace the summary index.
+
+        Args:
+            lines: Encoded index entries.
+        """
+        self._replace_file(self.path / INDEX_NAME, b"".join(lines))
+        self._summaries = None
+
+    def migrate(self, shard_depth: int) -> int:
+        """Convert records to the given layout in place.
+
+        Records are renamed along with the stored occurrences,
+        the empty shard directories are removed,
+        and the summary index is rewritten with the new file names.
+
+        Args:
+            shard_depth: Target number of shard directory levels.
+
+        Returns:
+            Number of moved records.
+
+        Raises:
+            ValueError: On invalid `shard_depth`.
+        """
+        if not 0 <= shard_depth <= MAX_SHARD_DEPTH:
+            msg = f"shard_depth must be in range 0..{MAX_SHARD_DEPTH}"
+            raise ValueError(msg)
+        self._index = None
+        index = self.get_index()
+        moved: dict[str, str] = {}
+        for fp, fn in index.items():
+            new_fn = self.get_file_name(fp, shard_depth, os.path.basename(fn))
+            if new_fn == fn:
+                continue
+            new_path = self.path / new_fn
+            if shard_depth:
+                new_path.parent.mkdir(parents=True, exist_ok=True)
+            for p in self.get_occurrence_paths(fp, self.path / fn):
+                os.replace(p, new_path.parent / p.name)
+            os.replace(self.path / fn, new_path)
+            moved[fp] = new_fn
+            # Remove empty shard directories
+            parent = os.path.dirname(fn)
+            while parent:
+                try:
+                    os.rmdir(self.path / parent)
+                except OSError:
+                    break
+                parent = os.path.dirname(parent)
+        self._index = None
+        if moved:
+            self._write_index(
+                [
+                    self._encode_entry(
+                        self._summary_to_dict(summary, moved.get(fp, fn))
+                    )
+                    for fp, (summary, fn) in self.get_summaries().items()
+                ]
+            )
+        return len(moved)
+
+    @classmethod
+    def get_stamp(
+        cls: type["DirectoryStorage"], path: Path | str
+    ) -> list[Any]:
+        """Get the state of the error info directory.
+
+        Stamp is changed by the writes, deletes, and flushed
+        occurrence counters, as they touch the summary index
+        or the segment logs. Record files are not examined.
+
+        Args:
+            path: Directory path.
+
+        Returns:
+            JSON-serializable stamp.
+        """
+        r: list[Any] = [os.stat(path).st_mtime_ns]
+        with os.scandir(path) as it:
+            for entry in it:
+                if (
+                    not entry.name.startswith(".")
+                    and not cls.rx_fn.match(entry.name)
+                    and entry.is_file()
+                ):
+                    st = entry.stat()
+                    r.append([entry.name, st.st_size, st.st_mtime_ns])
+        return [r[0], *sorted(r[1:])]
+
+    def _read_merge_state(self) -> dict[str, Any]:
+        """Read merge state.
+
+        Returns:
+            Dict of host -> {"stamp": ..., "counts": {fingerprint: count}}.
+        """
+        try:
+            with open(self.path / MERGE_STATE_NAME, "rb") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return state if isinstance(state, dict) else {}
+
+    @staticmethod
+    def _is_preferred(source: Summary, current: Summary, policy: str) -> bool:
+        """Check the source record must replace the current one.
+
+        Args:
+            source: Summary of the source record.
+            current: Summary of the current record.
+            policy: Merge policy.
+
+        Returns:
+            True, if the source record is preferred.
+        """
+        if policy == "newest":
+            return bool(
+                source.last_seen
+                and current.last_seen
+                and source.last_seen > current.last_seen
+            )
+        return bool(source.ts and current.ts and source.ts < current.ts)
+
+    def _copy(self, storage: BaseStorage, fingerprint: str) -> str | None:
+        """Copy the record from the other storage.
+
+        Args:
+            storage: Source storage.
+            fingerprint: Stringified fingerprint.
+
+        Returns:
+            * Record file name.
+            * None, if the record cannot be read.
+        """
+        try:
+            data = storage.read(fingerprint)
+        except (ValueError, OSError) as e:
+            logger.error("Cannot read %s: %s", fingerprint, e)
+            return None
+        if data is None:
+            return None
+        fn = self.get_file_name(fingerprint, self.shard_depth)
+        path = self.path / fn
+        if self.shard_depth:
+            path.parent.mkdir(parents=True, exist_ok=True)
+        self._write_file(path, self.compressor.encode(data))
+        return fn
+
+    @classmethod
+    def _merge_summary(
+        cls: type["DirectoryStorage"],
+        host: str,
+        source: Summary,
+        current: Summary | None,
+        prev: int,
+        policy: str,
+    ) -> tuple[Summary | None, bool]:
+        """Merge the source summary into the current one.
+
+        Args:
+            host: Source host name.
+            source: Source summary.
+            current: Current summary, if the record exists.
+            prev: Occurrences of the host, merged before.
+            policy: Record selection policy.
+
+        Returns:
+            Tuple of (merged summary, copy flag). Summary is None,
+            if it is not changed. Copy flag is set, if the source
+            record must be copied.
+        """
+        if current is None:
+            return replace(source, hosts={host: source.count}), True
+        # Source counter is reset, if the source is recreated
+        delta = source.count - prev if source.count >= prev else source.count
+        is_copied = cls._is_preferred(source, current, policy)
+        if not is_copied and not delta:
+            return None, False
+        return replace(
+            source if is_copied else current,
+            count=current.count + delta,
+            ts=min(filter(None, (source.ts, current.ts)), default=None),
+            last_seen=max(
+                filter(None, (source.last_seen, current.last_seen)),
+                default=None,
+            ),
+            hosts={**current.hosts, host: source.count},
+        ), is_copied
+
+    def _copy_records(
+        self,
+        copy: list[tuple[BaseStorage, str]],
+        files: dict[str, str],
+        jobs: int,
+    ) -> list[str]:
+        """Copy records from the other storages in parallel.
+
+        Replaced files with the other names are removed.
+
+        Args:
+            copy: List of (storage, fingerprint).
+            files: Dict of fingerprint -> file name, updated in place.
+            jobs: Number of threads.
+
+        Returns:
+            List of the fingerprints, which cannot be copied.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        failed: list[str] = []
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            for (_, fp), fn in zip(
+                copy, pool.map(lambda x: self._copy(*x), copy), strict=True
+            ):
+                if fn is None:
+                    failed.append(fp)
+                    continue
+                old = files.get(fp)
+                if old and old != fn:
+                    with contextlib.suppress(FileNotFoundError):
+                        os.unlink(self.path / old)
+                files[fp] = fn
+                if self._index is not None:
+                    self._index[fp] = fn
+        return failed
+
+    def merge(
+        self,
+        host: str,
+        sources: list[BaseStorage],
+        stamp: list[Any],
+        policy: str = "oldest",
+        jobs: int = 1,
+    ) -> int | None:
+        """Merge records of the other host.
+
+        Records are deduplicated by the fingerprint. Occurrence
+        counters are summed up, while the per-host counters are kept
+        in the `hosts` field of the summary. Of the records, present
+        in both storages, the one is kept according to the `policy`:
+
+        * `oldest` - the record with the earliest first occurrence.
+        * `newest` - the record with the latest last occurrence.
+
+        Stamp and merged counters of each host are kept in the
+        merge state file. Merge of the unchanged source is skipped,
+        and the changed source adds only the new occurrences,
+        so the merge may be safely repeated.
+
+        Args:
+            host: Source host name.
+            sources: Source storages.
+            stamp: Source state, see `get_stamp`.
+            policy: Record selection policy.
+            jobs: Number of threads, copying the records.
+
+        Returns:
+            * Number of the merged records.
+            * None, if the source is already merged.
+
+        Raises:
+            ValueError: On invalid policy.
+            OSError: On write errors.
+        """
+        if policy not in MERGE_POLICIES:
+            msg = f"Invalid merge policy: {policy}"
+            raise ValueError(msg)
+        state = self._read_merge_state()
+        if state.get(host, {}).get("stamp") == stamp:
+            return None
+        merged: dict[str, int] = state.get(host, {}).get("counts", {})
+        current = self.get_summaries()
+        counts: dict[str, int] = {}
+        updated: dict[str, Summary] = {}
+        copy: list[tuple[BaseStorage, str]] = []
+        for storage in sources:
+            for s in storage.iter_summary(
+                storage.iter_fingerprints(),
+                lambda fp, e: logger.error("Cannot read %s: %s", fp, e),
+                jobs,
+            ):
+                fp = s.fingerprint
+                counts[fp] = s.count
+                item = current.get(fp)
+                summary, is_copied = self._merge_summary(
+                    host,
+                    s,
+                    item[0] if item else None,
+                    merged.get(fp, 0),
+                    policy,
+                )
+                if summary:
+                    updated[fp] = summary
+                if is_copied:
+                    copy.append((storage, fp))
+        files = {fp: item[1] for fp, item in current.items()}
+        for fp in self._copy_records(copy, files, jobs):
+            # Retry on the next merge
+            updated.pop(fp, None)
+            counts.pop(fp, None)
+        with self._usage_lock:
+            self._usage = None
+            self._last_seen = None
+        if updated:
+            self._append_index(
+                *(
+                    self._summary_to_dict(summary, files[fp])
+                    for fp, summary in updated.items()
+                )
+            )
+        state[host] = {"stamp": stamp, "counts": counts}
+        self._replace_file(
+            self.path / MERGE_STATE_NAME, json.dumps(state).encode()
+        )
+        return len(updated)
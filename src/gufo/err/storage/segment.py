@@ -0,0 +1,691 @@
+# ---------------------------------------------------------------------
+# Gufo Err: SegmentStorage
+# ---------------------------------------------------------------------
+# Copyright (C) 2022-26, Gufo Labs
+# ---------------------------------------------------------------------
+"""SegmentStorage.
+
+Records are appended to the segment log files
+`segment-<NNNNNNNN>.log`. Each record consists of the fixed-size
+header followed by the optionally compressed payload:
+
+| Offset | Size | Description                     |
+| ------ | ---- | ------------------------------- |
+| 0      | 4    | Magic, `GERS`                   |
+| 4      | 1    | Flags, `1` - tombstone          |
+| 5      | 3    | Reserved                        |
+| 8      | 16   | Fingerprint, UUID bytes         |
+| 24     | 4    | Payload length, little-endian   |
+| 28     | 4    | Payload CRC32, little-endian    |
+
+Each log is accompanied by the sidecar index
+`segment-<NNNNNNNN>.idx` of fixed-size entries:
+
+| Offset | Size | Description                     |
+| ------ | ---- | ------------------------------- |
+| 0      | 16   | Fingerprint, UUID bytes         |
+| 16     | 8    | Record offset, little-endian    |
+| 24     | 4    | Payload length, little-endian   |
+| 28     | 4    | Flags, little-endian            |
+
+The index is an optimization only: the tail of the log, not covered
+by the index, is recovered by scanning the log.
+
+Attributes:
+    DEFAULT_SEGMENT_SIZE: Default segment rotation threshold.
+    WRITE_CHUNK: Number of records per thread, compressed at once
+        by `SegmentStorage.write_many`.
+"""
+
+# Python modules
+import contextlib
+import os
+import re
+import struct
+import uuid
+import zlib
+from collections.abc import Callable, Iterable, Iterator
+from itertools import groupby, islice
+from pathlib import Path
+from typing import Any, BinaryIO, NamedTuple
+
+# Gufo Err modules
+from ..abc.storage import BaseStorage
+from ..compressor import Compressor
+from ..logger import logger
+from ..types import ErrorInfo
+
+DEFAULT_SEGMENT_SIZE = 16 * 1024 * 1024
+WRITE_CHUNK = 16
+
+MAGIC = b"GERS"
+FLAG_TOMBSTONE = 1
+HEADER = struct.Struct("<4sB3x16sII")
+INDEX_ENTRY = struct.Struct("<16sQII")
+
+
+class Location(NamedTuple):
+    """Record location.
+
+    Attributes:
+        segment: Segment number.
+        offset: Record header offset.
+        length: Payload length.
+    """
+
+    segment: int
+    offset: int
+    length: int
+
+
+class Entry(NamedTuple):
+    """Log or index entry.
+
+    Attributes:
+        fingerprint: Fingerprint UUID bytes.
+        offset: Record header offset.
+        length: Payload length.
+        flags: Record flags.
+    """
+
+    fingerprint: bytes
+    offset: int
+    length: int
+    flags: int
+
+
+class SegmentStorage(BaseStorage):
+    """Store error info records in the append-only segment log.
+
+    Records are appended to the active segment by the single
+    `write()` call on the file opened in append mode, so the
+    concurrent writers do not interleave. The active segment
+    is rotated when it grows beyond `segment_size`.
+    Deleted records are marked by tombstones. The leading segments
+    without live records are removed. Truncated tail of the
+    segment, left by the interrupted write, is ignored.
+
+    Args:
+        path: Path to directory.
+        compressor: Compressor for written records. Records are
+            read regardless of their compression.
+        segment_size: Segment rotation threshold, in bytes.
+        fsync: Durability policy, one of `never`, `file`, `directory`.
+
+    Raises:
+        ValueError: On invalid `segment_size` or `fsync`.
+    """
+
+    rx_segment = re.compile(r"^segment-(\d{8})\.log$")
+
+    def __init__(
+        self,
+        path: Path | str,
+        compressor: Compressor | None = None,
+        segment_size: int = DEFAULT_SEGMENT_SIZE,
+        fsync: str = "never",
+    ) -> None:
+        if segment_size <= 0:
+            msg = "segment_size must be positive"
+            raise ValueError(msg)
+        self.path = Path(path)
+        self.compressor = compressor or Compressor()
+        self.segment_size = segment_size
+        self.fsync = self.check_fsync(fsync)
+        self._index: dict[str, Location] = {}
+        self._live: dict[int, int] = {}
+        self._stamp: list[tuple[int, int]] | None = None
+        # Fingerprints, listed by `iter_new`
+        self._listed: set[str] = set()
+
+    @classmethod
+    def exists(
+        cls: type["SegmentStorage"],
+        path: Path | str,
+        names: Iterable[str] | None = None,
+    ) -> bool:
+        """Check if the directory contains segments.
+
+        Args:
+            path: Path to directory.
+            names: File names of the directory, if already listed.
+
+        Returns:
+            True, if any segment found.
+        """
+        if names is None:
+            names = os.listdir(path)
+        return any(cls.rx_segment.match(fn) for fn in names)
+
+    def get_log_path(self, segment: int) -> Path:
+        """Get segment log path.
+
+        Args:
+            segment: Segment number.
+
+        Returns:
+            Log path.
+        """
+        return self.path / f"segment-{segment:08d}.log"
+
+    def get_index_path(self, segment: int) -> Path:
+        """Get segment index path.
+
+        Args:
+            segment: Segment number.
+
+        Returns:
+            Index path.
+        """
+        return self.path / f"segment-{segment:08d}.idx"
+
+    def _get_stamp(self) -> list[tuple[int, int]]:
+        """Get current state of the segments.
+
+        Returns:
+            Sorted list of (segment, log size).
+        """
+        r: list[tuple[int, int]] = []
+        for fn in os.listdir(self.path):
+            match = self.rx_segment.match(fn)
+            if match:
+                segment = int(match.group(1))
+                try:
+                    size = self.get_log_path(segment).stat().st_size
+                except FileNotFoundError:
+                    continue
+                r.append((segment, size))
+        return sorted(r)
+
+    def _refresh(self) -> None:
+        """Reload the index if the segments are changed."""
+        stamp = self._get_stamp()
+        if stamp == self._stamp:
+            return
+        self._index = {}
+        self._live = {}
+        for segment, _ in stamp:
+            self._live[segment] = 0
+            for entry in self._iter_entries(segment):
+                self._apply(segment, entry)
+        self._stamp = stamp
+
+    def _apply(self, segment: int, entry: Entry) -> None:
+        """Apply log entry to the index.
+
+        Args:
+            segment: Segment number.
+            entry: Log entry.
+        """
+        fp = str(uuid.UUID(bytes=entry.fingerprint))
+        loc = self._index.get(fp)
+        if entry.flags & FLAG_TOMBSTONE:
+            if loc is not None:
+                del self._index[fp]
+                self._live[loc.segment] -= 1
+        elif loc is None:
+            self._index[fp] = Location(segment, entry.offset, entry.length)
+            self._live[segment] = self._live.get(segment, 0) + 1
+
+    def _iter_entries(self, segment: int) -> Iterable[Entry]:
+        """Iterate over segment entries.
+
+        Use the sidecar index while it covers the log contiguously,
+        then scan the rest of the log.
+
+        Args:
+            segment: Segment number.
+
+        Returns:
+            Yields log entries in order of appearance.
+        """
+        try:
+            with open(self.get_index_path(segment), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = b""
+        n = len(data) // INDEX_ENTRY.size
+        entries = sorted(
+            (
+                Entry(*INDEX_ENTRY.unpack_from(data, i * INDEX_ENTRY.size))
+                for i in range(n)
+            ),
+            key=lambda x: x.offset,
+        )
+        pos = 0
+        rest: list[Entry] = []
+        for i, entry in enumerate(entries):
+            if entry.offset != pos:
+                # Gap, possibly by concurrent writer
+                rest = entries[i:]
+                break
+            yield entry
+            pos = entry.offset + HEADER.size + entry.length
+        # Scan the rest of the log
+        try:
+            with open(self.get_log_path(segment), "rb") as f:
+                for entry in self._scan(f, pos):
+                    yield entry
+                    pos = entry.offset + HEADER.size + entry.length
+        except FileNotFoundError:
+            return
+        # Indexed records beyond the corrupted part of the log
+        for entry in rest:
+            if entry.offset >= pos:
+                yield entry
+
+    @staticmethod
+    def _scan(f: BinaryIO, pos: int) -> Iterator[Entry]:
+        """Scan log.
+
+        Stop on the end of the file or on the truncated
+        or corrupted record.
+
+        Args:
+            f: Opened log file.
+            pos: Starting position.
+
+        Returns:
+            Yields log entries.
+        """
+        size = os.fstat(f.fileno()).st_size
+        f.seek(pos)
+        while pos + HEADER.size <= size:
+            magic, flags, fp, length, _ = HEADER.unpack(f.read(HEADER.size))
+            end = pos + HEADER.size + length
+            if magic != MAGIC or end > size:
+                return
+            yield Entry(fp, pos, length, flags)
+            pos = end
+            f.seek(pos)
+
+    def _append(self, fingerprint: str, payload: bytes, flags: int) -> Path:
+        """Append record to the active segment.
+
+        Args:
+            fingerprint: Stringified fingerprint.
+            payload: Record payload.
+            flags: Record flags.
+
+        Returns:
+            Log path.
+        """
+        return self._append_many([(fingerprint, payload, flags)])
+
+    def _append_many(self, records: list[tuple[str, bytes, int]]) -> Path:
+        """Append records to the active segment by the single write.
+
+        Args:
+            records: List of (`fingerprint`, `payload`, `flags`).
+
+        Returns:
+            Log path.
+        """
+        stamp = self._stamp or []
+        if stamp:
+            segment, size = stamp[-1]
+            if size >= self.segment_size:
+                segment += 1
+        else:
+            segment = 0
+        chunks: list[bytes] = []
+        entries: list[Entry] = []
+        offset = 0
+        for fingerprint, payload, flags in records:
+            fp = uuid.UUID(fingerprint).bytes
+            chunks += [
+                HEADER.pack(
+                    MAGIC, flags, fp, len(payload), zlib.crc32(payload)
+                ),
+                payload,
+            ]
+            entries.append(Entry(fp, offset, len(payload), flags))
+            offset += HEADER.size + len(payload)
+        data = b"".join(chunks)
+        path = self.get_log_path(segment)
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+            start = os.lseek(fd, 0, os.SEEK_CUR) - len(data)
+            self.sync_file(fd)
+        finally:
+            os.close(fd)
+        if not start:
+            # New segment
+            self.sync_dir(self.path)
+        entries = [e._replace(offset=start + e.offset) for e in entries]
+        fd = os.open(
+            self.get_index_path(segment),
+            os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+            0o644,
+        )
+        try:
+            os.write(fd, b"".join(INDEX_ENTRY.pack(*e) for e in entries))
+        finally:
+            os.close(fd)
+        # Update index
+        self._live.setdefault(segment, 0)
+        for e in entries:
+            self._apply(segment, e)
+        self._stamp = self._get_stamp()
+        return path
+
+    def _reclaim(self) -> None:
+        """Remove leading segments without live records.
+
+        The active segment is never removed.
+        """
+        for segment in sorted(self._live)[:-1]:
+            if self._live[segment]:
+                break
+            for path in (
+                self.get_log_path(segment),
+                self.get_index_path(segment),
+            ):
+                with contextlib.suppress(FileNotFoundError):
+                    path.unlink()
+            del self._live[segment]
+        self._stamp = self._get_stamp()
+
+    def get_worker_args(self) -> dict[str, Any]:
+        """Get constructor arguments to open the storage in the workers.
+
+        Returns:
+            Dict of keyword arguments.
+        """
+        return {
+            "compressor": self.compressor,
+            "segment_size": self.segment_size,
+        }
+
+    def reindex(self) -> int:
+        """Rebuild the sidecar indexes by scanning the logs.
+
+        Returns:
+            Number of live records.
+        """
+        for segment, _ in self._get_stamp():
+            try:
+                with open(self.get_log_path(segment), "rb") as f:
+                    data = b"".join(
+                        INDEX_ENTRY.pack(*entry) for entry in self._scan(f, 0)
+                    )
+            except FileNotFoundError:
+                continue
+            path = self.get_index_path(segment)
+            tmp = path.with_name(f".{path.name}.tmp")
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        self._stamp = None
+        self._refresh()
+        return len(self._index)
+
+    def iter_fingerprints(self) -> Iterable[str]:
+        """Iterate over all stored fingerprints.
+
+        Returns:
+            Iterable of stringified fingerprints.
+        """
+        self._refresh()
+        return list(self._index)
+
+    def iter_new(
+        self, known: set[str], updated: set[str] | None = None
+    ) -> Iterable[str]:
+        """Iterate the records, which are not known yet.
+
+        Fingerprints, listed by the previous call and deleted
+        since, are removed from `known`.
+
+        Args:
+            known: Set of the known fingerprints.
+            updated: Optional set, ignored. Records are never changed.
+
+        Returns:
+            Iterable of the stringified fingerprints.
+        """
+        self._refresh()
+        current = set(self._index)
+        known.difference_update(self._listed - current)
+        self._listed = current
+        r = [fp for fp in self._index if fp not in known]
+        known.update(r)
+        return r
+
+    def _read_record(
+        self, f: BinaryIO, fingerprint: str, loc: Location
+    ) -> bytes:
+        """Read and verify record.
+
+        Args:
+            f: Opened log file.
+            fingerprint: Stringified fingerprint.
+            loc: Record location.
+
+        Returns:
+            Uncompressed record.
+
+        Raises:
+            ValueError: If the record is corrupted.
+        """
+        f.seek(loc.offset)
+        data = f.read(HEADER.size + loc.length)
+        path = self.get_log_path(loc.segment)
+        if len(data) != HEADER.size + loc.length:
+            msg = f"Truncated record {fingerprint} in {path}"
+            raise ValueError(msg)
+        magic, _, fp, length, crc = HEADER.unpack_from(data)
+        payload = data[HEADER.size :]
+        if (
+            magic != MAGIC
+            or fp != uuid.UUID(fingerprint).bytes
+            or length != loc.length
+            or zlib.crc32(payload) != crc
+        ):
+            msg = f"Corrupted record {fingerprint} in {path}"
+            raise ValueError(msg)
+        try:
+            return Compressor.autodetect(str(path), payload).decode(payload)
+        except ValueError as e:
+            msg = f"Cannot decompress record {fingerprint} in {path}: {e}"
+            raise ValueError(msg) from e
+
+    def read(self, fingerprint: str) -> bytes | None:
+        """Read the record.
+
+        Args:
+            fingerprint: Stringified fingerprint.
+
+        Returns:
+            * Uncompressed JSON record, if found.
+            * None, if the record is not found.
+
+        Raises:
+            ValueError: If the record is corrupted.
+        """
+        self._refresh()
+        loc = self._index.get(fingerprint)
+        if loc is None:
+            return None
+        try:
+            with open(self.get_log_path(loc.segment), "rb") as f:
+                return self._read_record(f, fingerprint, loc)
+        except FileNotFoundError:
+            return None
+
+    def iter_read(
+        self,
+        fingerprints: Iterable[str],
+        on_error: Callable[[str, Exception], None] | None = None,
+    ) -> Iterable[tuple[str, bytes]]:
+        """Read multiple records sequentially.
+
+        Records are read in order of the segments and offsets.
+
+        Args:
+            fingerprints: Iterable of stringified fingerprints.
+            on_error: Optional callable, accepting fingerprint and
+                exception for unreadable records. Errors are raised
+                if not set.
+
+        Returns:
+            Iterable of (`fingerprint`, `data`) for existing and
+            readable records.
+
+        Raises:
+            ValueError: If the record is corrupted and `on_error`
+                is not set.
+        """
+        self._refresh()
+        found = [
+            (loc, fp)
+            for fp in fingerprints
+            if (loc := self._index.get(fp)) is not None
+        ]
+        found.sort()
+        for segment, items in groupby(found, key=lambda x: x[0].segment):
+            with open(self.get_log_path(segment), "rb") as f:
+                for loc, fp in items:
+                    try:
+                        data = self._read_record(f, fp, loc)
+                    except ValueError as e:
+                        if on_error is None:
+                            raise
+                        on_error(fp, e)
+                        continue
+                    yield fp, data
+
+    def hit(self, info: ErrorInfo) -> bool:
+        """Check the record exists.
+
+        Occurrences are not counted by the segment storage.
+
+        Args:
+            info: ErrorInfo instance.
+
+        Returns:
+            * True, if the record exists.
+            * False, if the record must be written by `write_info`.
+        """
+        self._refresh()
+        return str(info.fingerprint) in self._index
+
+    def write(self, fingerprint: str, data: bytes) -> bool:
+        """Write the record, if not exists.
+
+        Args:
+            fingerprint: Stringified fingerprint.
+            data: Uncompressed JSON record.
+
+        Returns:
+            * True, if the record has been written.
+            * False, if the record is already exists.
+        """
+        self._refresh()
+        if fingerprint in self._index:
+            return False
+        path = self._append(fingerprint, self.compressor.encode(data), 0)
+        logger.warning("Writing error info into %s", path)
+        return True
+
+    def write_many(
+        self, records: Iterable[tuple[str, bytes]], jobs: int = 1
+    ) -> int:
+        """Write multiple records, if not exist.
+
+        Records are compressed by the pool of `jobs` threads,
+        as the compressors release the GIL, and appended
+        in order of appearance.
+
+        Args:
+            records: Iterable of (`fingerprint`, `data`), where
+                `data` is the uncompressed JSON record.
+            jobs: Number of compressing threads.
+
+        Returns:
+            Number of written records.
+
+        Raises:
+            OSError: On write errors.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        self._refresh()
+        jobs = max(1, jobs)
+        it = iter(records)
+        n = 0
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            while chunk := dict(islice(it, WRITE_CHUNK * jobs)):
+                fps = [fp for fp in chunk if fp not in self._index]
+                payloads = pool.map(
+                    self.compressor.encode, (chunk[fp] for fp in fps)
+                )
+                for fp, payload in zip(fps, payloads, strict=True):
+                    self._append(fp, payload, 0)
+                n += len(fps)
+        if n:
+            logger.warning(
+                "Writing %d error info records into %s", n, self.path
+            )
+        return n
+
+    def delete(self, fingerprint: str) -> bool:
+        """Delete the record.
+
+        Append the tombstone and reclaim the unused segments.
+
+        Args:
+            fingerprint: Stringified fingerprint.
+
+        Returns:
+            * True, if the record has been deleted.
+            * False, if the record is not found.
+        """
+        self._refresh()
+        if fingerprint not in self._index:
+            return False
+        self._append(fingerprint, b"", FLAG_TOMBSTONE)
+        self._reclaim()
+        return True
+
+    def delete_many(
+        self,
+        fingerprints: Iterable[str],
+        on_error: Callable[[str, Exception], None] | None = None,
+        jobs: int = 1,
+    ) -> int:
+        """Delete multiple records.
+
+        Tombstones are appended by the single write, and the unused
+        segments are reclaimed once.
+
+        Args:
+            fingerprints: Iterable of stringified fingerprints.
+            on_error: Optional callable, accepting fingerprint and
+                exception for the records, which cannot be removed.
+                Errors are raised if not set.
+            jobs: Number of parallel deletes, ignored.
+
+        Returns:
+            Number of deleted records.
+
+        Raises:
+            OSError: On write errors and `on_error` is not set.
+        """
+        self._refresh()
+        found = list(
+            dict.fromkeys(fp for fp in fingerprints if fp in self._index)
+        )
+        if not found:
+            return 0
+        try:
+            self._append_many([(fp, b"", FLAG_TOMBSTONE) for fp in found])
+        except OSError as e:
+            if on_error is None:
+                raise
+            for fp in found:
+                on_error(fp, e)
+            return 0
+        self._reclaim()
+        return len(found)
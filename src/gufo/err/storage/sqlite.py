@@ -0,0 +1,561 @@
+# ---------------------------------------------------------------------
+# Gufo Err: SqliteStorage
+# ---------------------------------------------------------------------
+# Copyright (C) 2022-26, Gufo Labs
+# ---------------------------------------------------------------------
+"""SqliteStorage.
+
+Attributes:
+    MAX_PARAMS: Maximal number of bound parameters per query.
+    BUSY_TIMEOUT: Time to wait for the database lock, in seconds.
+    ORDER_COLUMNS: Summary fields, which may be used for sorting.
+"""
+
+# Python modules
+import datetime
+import sqlite3
+import threading
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from typing import Any
+
+# Gufo Err modules
+from ..abc.storage import BaseStorage, Summary, SummaryFilter
+from ..codec import from_json
+from ..compressor import Compressor
+from ..logger import logger
+from ..types import ErrorInfo
+
+MAX_PARAMS = 500
+BUSY_TIMEOUT = 5.0
+ORDER_COLUMNS = {"ts", "last_seen", "count", "name", "exception", "place"}
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS errors (
+        fingerprint TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        version TEXT NOT NULL,
+        exception TEXT NOT NULL,
+        exception_class TEXT NOT NULL,
+        ts TEXT,
+        place TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 1,
+        last_seen TEXT,
+        module TEXT NOT NULL DEFAULT '',
+        data BLOB NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_errors_ts ON errors(ts)",
+    "CREATE INDEX IF NOT EXISTS ix_errors_name ON errors(name)",
+    """CREATE INDEX IF NOT EXISTS ix_errors_exception_class
+        ON errors(exception_class)""",
+    "CREATE INDEX IF NOT EXISTS ix_errors_last_seen ON errors(last_seen)",
+    "CREATE INDEX IF NOT EXISTS ix_errors_count ON errors(count)",
+    "CREATE INDEX IF NOT EXISTS ix_errors_module ON errors(module)",
+]
+
+SELECT_SUMMARY = (
+    "SELECT fingerprint, name, version, exception, exception_class, "
+    "ts, place, count, last_seen, module FROM errors"
+)
+
+
+def _where_sql(where: SummaryFilter | None) -> tuple[list[str], list[str]]:
+    """Build SQL conditions for the summary filter.
+
+    Conditions are written to use the column indexes.
+
+    Args:
+        where: Optional filter.
+
+    Returns:
+        Tuple of (list of conditions, parameters).
+    """
+    if where is None:
+        return [], []
+    sql: list[str] = []
+    params: list[str] = []
+    if where.name is not None:
+        sql.append("name GLOB ?")
+        params.append(where.name)
+    if where.exception is not None:
+        sql.append("exception_class GLOB ?")
+        params.append(where.exception)
+    if where.module is not None:
+        # Submodules are in range `<module>.` .. `<module>/`
+        sql.append("(module = ? OR (module >= ? AND module < ?))")
+        params += [where.module, f"{where.module}.", f"{where.module}/"]
+    if where.since is not None:
+        since = where.since.isoformat()
+        sql.append("(last_seen >= ? OR (last_seen IS NULL AND ts >= ?))")
+        params += [since, since]
+    if where.until is not None:
+        sql.append("ts <= ?")
+        params.append(where.until.isoformat())
+    return sql, params
+
+
+def _to_summary(row: tuple[Any, ...]) -> Summary:
+    """Convert `SELECT_SUMMARY` row to summary.
+
+    Args:
+        row: Resulting row.
+
+    Returns:
+        Summary instance.
+    """
+    (
+        fp,
+        name,
+        version,
+        exc,
+        exc_class,
+        ts,
+        place,
+        count,
+        last_seen,
+        module,
+    ) = row
+    return Summary(
+        fingerprint=fp,
+        name=name,
+        version=version,
+        exception=exc,
+        exception_class=exc_class,
+        ts=datetime.datetime.fromisoformat(ts) if ts else None,
+        place=place,
+        count=count,
+        last_seen=(
+            datetime.datetime.fromisoformat(last_seen) if last_seen else None
+        ),
+        module=module,
+    )
+
+
+class SqliteStorage(BaseStorage):
+    """Store error info records in the SQLite database.
+
+    Summary fields are stored in the indexed columns, while
+    the compressed record is stored in the blob. Database is
+    opened in WAL mode, so the readers do not block the writers.
+    Repeated writes of the same fingerprint increase the
+    occurrence counter.
+
+    Args:
+        path: Path to database file. Created if not exists.
+        compressor: Compressor for written records. Records are
+            read regardless of their compression.
+        read_only: Open the existing database for reading only.
+            Schema is not created, and the journal mode is not changed.
+
+    Raises:
+        ValueError: If the database cannot be opened.
+    """
+
+    counts_occurrences = True
+
+    def __init__(
+        self,
+        path: Path | str,
+        compressor: Compressor | None = None,
+        read_only: bool = False,
+    ) -> None:
+        self.path = Path(path)
+        self.compressor = compressor or Compressor()
+        # Maximal `rowid` and `last_seen`, read by `iter_new`
+        self._rowid: int | None = None
+        self._last_seen: str | None = None
+        self._lock = threading.Lock()
+        try:
+            self._conn = sqlite3.connect(
+                f"{self.path.absolute().as_uri()}?mode=ro"
+                if read_only
+                else self.path,
+                check_same_thread=False,
+                isolation_level=None,
+                timeout=BUSY_TIMEOUT,
+                uri=read_only,
+            )
+            self._conn.execute(
+                f"PRAGMA busy_timeout={int(BUSY_TIMEOUT * 1000)}"
+            )
+            if not read_only:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                for sql in SCHEMA:
+                    self._conn.execute(sql)
+        except sqlite3.Error as e:
+            msg = f"Cannot open database {path}: {e}"
+            raise ValueError(msg) from e
+
+    def close(self) -> None:
+        """Close the database."""
+        self._conn.close()
+
+    def _select(
+        self,
+        sql: str,
+        fingerprints: Iterable[str],
+        params: list[str] | None = None,
+    ) -> Iterable[tuple[Any, ...]]:
+        """Run query for the chunks of fingerprints.
+
+        Args:
+            sql: Query with `{}` placeholder for the list of parameters.
+            fingerprints: Iterable of stringified fingerprints.
+            params: Optional parameters, following the fingerprints.
+
+        Returns:
+            Yields resulting rows.
+        """
+        fps = list(fingerprints)
+        for i in range(0, len(fps), MAX_PARAMS):
+            chunk = fps[i : i + MAX_PARAMS]
+            q = sql.format(", ".join("?" * len(chunk)))
+            with self._lock:
+                rows = self._conn.execute(q, chunk + (params or [])).fetchall()
+            yield from rows
+
+    def iter_fingerprints(self) -> Iterable[str]:
+        """Iterate over all stored fingerprints.
+
+        Returns:
+            Iterable of stringified fingerprints.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT fingerprint FROM errors"
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def find(self, fingerprints: Iterable[str]) -> set[str]:
+        """Find stored fingerprints.
+
+        Args:
+            fingerprints: Iterable of stringified fingerprints.
+
+        Returns:
+            Set of the stored fingerprints.
+        """
+        return {
+            r[0]
+            for r in self._select(
+                "SELECT fingerprint FROM errors WHERE fingerprint IN ({})",
+                fingerprints,
+            )
+        }
+
+    def _decode(self, fingerprint: str, data: bytes) -> bytes:
+        """Decompress record.
+
+        Args:
+            fingerprint: Stringified fingerprint.
+            data: Compressed record.
+
+        Returns:
+            Uncompressed record.
+
+        Raises:
+            ValueError: If the record cannot be decompressed.
+        """
+        try:
+            return Compressor.autodetect(str(self.path), data).decode(data)
+        except ValueError as e:
+            msg = f"Cannot decompress record {fingerprint}: {e}"
+            raise ValueError(msg) from e
+
+    def read(self, fingerprint: str) -> bytes | None:
+        """Read the record.
+
+        Args:
+            fingerprint: Stringified fingerprint.
+
+        Returns:
+            * Uncompressed JSON record, if found.
+            * None, if the record is not found.
+
+        Raises:
+            ValueError: If the record cannot be decompressed.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM errors WHERE fingerprint = ?",
+                (fingerprint,),
+            ).fetchone()
+        if row is None:
+            return None
+        return self._decode(fingerprint, row[0])
+
+    def iter_read(
+        self,
+        fingerprints: Iterable[str],
+        on_error: Callable[[str, Exception], None] | None = None,
+    ) -> Iterable[tuple[str, bytes]]:
+        """Read multiple records.
+
+        Args:
+            fingerprints: Iterable of stringified fingerprints.
+            on_error: Optional callable, accepting fingerprint and
+                exception for unreadable records. Errors are raised
+                if not set.
+
+        Returns:
+            Iterable of (`fingerprint`, `data`) for existing and
+            readable records.
+
+        Raises:
+            ValueError: If the record is corrupted and `on_error`
+                is not set.
+        """
+        for fp, data in self._select(
+            "SELECT fingerprint, data FROM errors WHERE fingerprint IN ({})",
+            fingerprints,
+        ):
+            try:
+                yield fp, self._decode(fp, data)
+            except ValueError as e:
+                if on_error is None:
+                    raise
+                on_error(fp, e)
+
+    def iter_summary(
+        self,
+        fingerprints: Iterable[str],
+        on_error: Callable[[str, Exception], None] | None = None,
+        jobs: int = 1,
+        where: SummaryFilter | None = None,
+    ) -> Iterable[Summary]:
+        """Get summaries of multiple records.
+
+        Summaries are fetched from the indexed columns, the
+        records are not decoded. The filter is applied
+        by the query.
+
+        Args:
+            fingerprints: Iterable of stringified fingerprints.
+            on_error: Ignored.
+            jobs: Ignored.
+            where: Optional filter.
+
+        Returns:
+            Iterable of summaries for existing records,
+            matching the filter.
+        """
+        cond, params = _where_sql(where)
+        sql = SELECT_SUMMARY + " WHERE fingerprint IN ({})"
+        if cond:
+            sql += "".join(f" AND {c}" for c in cond)
+        for row in self._select(sql, fingerprints, params):
+            yield _to_summary(row)
+
+    def select_summary(
+        self,
+        where: SummaryFilter | None = None,
+        order: str | None = None,
+        reverse: bool = False,
+        limit: int | None = None,
+        on_error: Callable[[str, Exception], None] | None = None,
+        jobs: int = 1,
+    ) -> Iterable[Summary]:
+        """Get summaries of all records, matching the filter.
+
+        Filtering, sorting, and limiting are performed
+        by the single query, using the column indexes.
+
+        Args:
+            where: Optional filter.
+            order: Optional summary field to sort by,
+                one of `ORDER_COLUMNS`.
+            reverse: Sort in descending order.
+            limit: Maximal number of summaries.
+            on_error: Ignored.
+            jobs: Ignored.
+
+        Returns:
+            Iterable of summaries, matching the filter.
+
+        Raises:
+            ValueError: On invalid `order`.
+        """
+        cond, params = _where_sql(where)
+        sql = SELECT_SUMMARY
+        if cond:
+            sql += " WHERE " + " AND ".join(cond)
+        if order is not None:
+            if order not in ORDER_COLUMNS:
+                msg = f"Invalid order: {order}"
+                raise ValueError(msg)
+            sql += f" ORDER BY {order}{' DESC' if reverse else ''}"
+        args: list[Any] = list(params)
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        return [_to_summary(row) for row in rows]
+
+    def write(self, fingerprint: str, data: bytes) -> bool:
+        """Write the record, if not exists.
+
+        The occurrence counter of the existing record is increased.
+
+        Args:
+            fingerprint: Stringified fingerprint.
+            data: Uncompressed JSON record.
+
+        Returns:
+            * True, if the record has been written.
+            * False, if the record is already exists.
+        """
+        return self.write_info(from_json(data.decode()), data)
+
+    def write_info(self, info: ErrorInfo, data: bytes) -> bool:
+        """Write the record, if not exists.
+
+        Avoid decoding of the record, when
+        [ErrorInfo][gufo.err.ErrorInfo] is already known.
+
+        Args:
+            info: ErrorInfo instance.
+            data: Uncompressed JSON record.
+
+        Returns:
+            * True, if the record has been written.
+            * False, if the record is already exists.
+        """
+        s = Summary.from_info(info)
+        ts = s.ts or datetime.datetime.now()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = self._conn.execute(
+                    "UPDATE errors SET count = count + 1, last_seen = ? "
+                    "WHERE fingerprint = ?",
+                    (ts.isoformat(), s.fingerprint),
+                )
+                is_new = cursor.rowcount == 0
+                if is_new:
+                    self._conn.execute(
+                        "INSERT INTO errors(fingerprint, name, version, "
+                        "exception, exception_class, ts, place, last_seen, "
+                        "module, data) VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            s.fingerprint,
+                            s.name,
+                            s.version,
+                            s.exception,
+                            s.exception_class,
+                            ts.isoformat(),
+                            s.place,
+                            ts.isoformat(),
+                            s.module,
+                            self.compressor.encode(data),
+                        ),
+                    )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        if is_new:
+            logger.warning(
+                "Writing error info %s into %s", s.fingerprint, self.path
+            )
+        return is_new
+
+    def hit(self, info: ErrorInfo) -> bool:
+        """Count the occurrence of the existing record.
+
+        Args:
+            info: ErrorInfo instance.
+
+        Returns:
+            * True, if the record exists and the occurrence is counted.
+            * False, if the record must be written by `write_info`.
+        """
+        ts = info.timestamp or datetime.datetime.now()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE errors SET count = count + 1, last_seen = ? "
+                "WHERE fingerprint = ?",
+                (ts.isoformat(), str(info.fingerprint)),
+            )
+        return cursor.rowcount > 0
+
+    def get_worker_args(self) -> dict[str, Any]:
+        """Get constructor arguments to open the storage in the workers.
+
+        Workers open the database in the read-only mode.
+
+        Returns:
+            Dict of keyword arguments.
+        """
+        return {"compressor": self.compressor, "read_only": True}
+
+    def iter_new(
+        self, known: set[str], updated: set[str] | None = None
+    ) -> Iterable[str]:
+        """Iterate the records, which are not known yet.
+
+        The first call lists all the records. Later calls select
+        only the rows, inserted or occurred since the previous call,
+        by the `rowid` and the `last_seen` index.
+
+        Args:
+            known: Set of the known fingerprints.
+            updated: Optional set, collecting the known fingerprints,
+                occurred since the previous call.
+
+        Returns:
+            Iterable of the stringified fingerprints.
+        """
+        with self._lock:
+            if self._rowid is None:
+                rows = self._conn.execute(
+                    "SELECT rowid, fingerprint, last_seen FROM errors"
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT rowid, fingerprint, last_seen FROM errors "
+                    "WHERE rowid > ? OR last_seen >= ?",
+                    (self._rowid, self._last_seen or ""),
+                ).fetchall()
+        if self._rowid is None:
+            updated = None
+        r: list[str] = []
+        for rowid, fp, last_seen in rows:
+            self._rowid = max(self._rowid or 0, rowid)
+            if last_seen and last_seen > (self._last_seen or ""):
+                self._last_seen = last_seen
+            if fp not in known:
+                known.add(fp)
+                r.append(fp)
+            elif updated is not None:
+                updated.add(fp)
+        if self._rowid is None:
+            self._rowid = 0  # Empty database
+        return r
+
+    def reindex(self) -> int:
+        """Rebuild the database indexes.
+
+        Returns:
+            Number of records.
+        """
+        with self._lock:
+            self._conn.execute("REINDEX errors")
+            row = self._conn.execute("SELECT COUNT(*) FROM errors").fetchone()
+        return int(row[0])
+
+    def delete(self, fingerprint: str) -> bool:
+        """Delete the record.
+
+        Args:
+            fingerprint: Stringified fingerprint.
+
+        Returns:
+            * True, if the record has been deleted.
+            * False, if the record is not found.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM errors WHERE fingerprint = ?", (fingerprint,)
+            )
+        return cursor.rowcount > 0
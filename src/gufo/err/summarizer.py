@@ -0,0 +1,241 @@
+# ---------------------------------------------------------------------
+# Gufo Err: Value summarizer
+# ---------------------------------------------------------------------
+# Copyright (C) 2022-26, Gufo Labs
+# ---------------------------------------------------------------------
+"""Type-aware value summarizer.
+
+Converting arbitrary objects via `str()`, `repr()`, or `pformat()`
+may be very expensive for large containers, ORM objects, and
+array-like values. `Summarizer` maps types to cheap summarizing
+functions and is shared between the codec and the formatters.
+
+Attributes:
+    summarizer: Default Summarizer instance.
+"""
+
+# Python modules
+import reprlib
+from collections import deque
+from collections.abc import Callable
+from typing import Any
+
+DEFAULT_MAX_ITEMS = 5
+DEFAULT_MAX_BYTES = 32
+DEFAULT_MAX_REPR = 256
+
+SummaryFunc = Callable[[Any], str]
+
+
+class Summarizer:
+    """Registry of type-aware summarizers.
+
+    Summarizers are looked up by the value's type, walking the MRO,
+    so registering a base class covers all its descendants.
+    Lookup results are cached per type.
+
+    Types may be registered either directly or by their
+    fully-qualified name (like `numpy.ndarray`), which allows
+    to support optional third-party types without importing them.
+
+    Args:
+        max_items: Show up to `max_items` items of containers.
+        max_bytes: Show up to `max_bytes` of binary data.
+        max_repr: Container representation budget. Nested strings
+            are shortened only when the representation exceeds
+            `max_repr` characters.
+
+    Examples:
+        ``` py
+        from gufo.err.summarizer import summarizer
+
+        summarizer.register("myapp.models.Order", lambda x: f"<Order {x.id}>")
+        ```
+    """
+
+    def __init__(
+        self,
+        max_items: int = DEFAULT_MAX_ITEMS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_repr: int = DEFAULT_MAX_REPR,
+    ) -> None:
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.max_repr = max_repr
+        self._handlers: dict[type | str, SummaryFunc] = {}
+        self._cache: dict[type, SummaryFunc | None] = {}
+        # Strings are bounded by the whole budget
+        self._repr = self._get_repr(max_items, max_repr)
+        # Strings are shortened to fit the budget
+        self._short_repr = self._get_repr(max_items, 40)
+
+    @staticmethod
+    def _get_repr(max_items: int, max_string: int) -> reprlib.Repr:
+        """Get bounded repr.
+
+        Args:
+            max_items: Show up to `max_items` items of containers.
+            max_string: Show up to `max_string` characters of strings
+                and other objects.
+
+        Returns:
+            Repr instance.
+        """
+        r = reprlib.Repr()
+        r.maxlevel = 2
+        r.maxtuple = max_items
+        r.maxlist = max_items
+        r.maxarray = max_items
+        r.maxdict = max_items
+        r.maxset = max_items
+        r.maxfrozenset = max_items
+        r.maxdeque = max_items
+        r.maxstring = max_string
+        r.maxother = max_string
+        return r
+
+    def register(self, kls: type | str, fn: SummaryFunc) -> None:
+        """Register summarizer for type.
+
+        Args:
+            kls: Type or fully-qualified type name.
+            fn: Callable accepting the value and returning its summary.
+        """
+        self._handlers[kls] = fn
+        self._cache.clear()
+
+    def get_handler(self, kls: type) -> SummaryFunc | None:
+        """Get summarizer for type.
+
+        Args:
+            kls: Value type.
+
+        Returns:
+            * Summarizing callable, if registered for type or its bases.
+            * None otherwise.
+        """
+        try:
+            return self._cache[kls]
+        except KeyError:
+            pass
+        handler: SummaryFunc | None = None
+        for t in kls.__mro__:
+            handler = self._handlers.get(t) or self._handlers.get(
+                f"{t.__module__}.{t.__qualname__}"
+            )
+            if handler:
+                break
+        self._cache[kls] = handler
+        return handler
+
+    def summarize(self, x: Any) -> str | None:  # noqa: ANN401
+        """Summarize value.
+
+        Args:
+            x: Value.
+
+        Returns:
+            * Value summary, if summarizer is registered for its type.
+            * None, if no summarizer found or summarizer failed.
+        """
+        handler = self.get_handler(type(x))
+        if not handler:
+            return None
+        try:
+            return handler(x)
+        except Exception:  # noqa: BLE001
+            return None
+
+    def summarize_container(self, x: Any) -> str:  # noqa: ANN401
+        """Summarize sized container.
+
+        Small containers are shown as is, large ones are prepended
+        with the type and the length. Nested strings are shortened,
+        if the representation exceeds `max_repr`.
+
+        Args:
+            x: Container.
+
+        Returns:
+            Bounded representation.
+        """
+        r = self._repr.repr(x)
+        if len(r) > self.max_repr:
+            r = self._short_repr.repr(x)
+        n = len(x)
+        if n <= self.max_items:
+            return r
+        return f"{type(x).__name__}(len={n}) {r}"
+
+    def summarize_bytes(self, x: bytes | bytearray) -> str:
+        """Summarize binary data.
+
+        Args:
+            x: Binary data.
+
+        Returns:
+            Bounded representation.
+        """
+        n = len(x)
+        if n <= self.max_bytes:
+            return repr(x)
+        return f"{type(x).__name__}(len={n}) {x[: self.max_bytes]!r}..."
+
+    @staticmethod
+    def summarize_buffer(x: memoryview) -> str:
+        """Summarize memoryview.
+
+        Args:
+            x: Buffer.
+
+        Returns:
+            Shape and item format.
+        """
+        return (
+            f"memoryview(format={x.format!r}, shape={x.shape}, "
+            f"nbytes={x.nbytes})"
+        )
+
+    @staticmethod
+    def summarize_array(x: Any) -> str:  # noqa: ANN401
+        """Summarize array-like objects (numpy-like).
+
+        Args:
+            x: Array.
+
+        Returns:
+            Shape and dtype.
+        """
+        return f"{type(x).__name__}(shape={x.shape}, dtype={x.dtype})"
+
+    @staticmethod
+    def summarize_model(x: Any) -> str:  # noqa: ANN401
+        """Summarize ORM model instance by primary key.
+
+        Args:
+            x: Model instance.
+
+        Returns:
+            Model name and primary key.
+        """
+        return f"<{type(x).__name__} pk={x.pk!r}>"
+
+
+def _setup_defaults(s: Summarizer) -> None:
+    """Register default summarizers.
+
+    Args:
+        s: Summarizer instance.
+    """
+    for kls in (list, tuple, set, frozenset, dict, deque):
+        s.register(kls, s.summarize_container)
+    s.register(bytes, s.summarize_bytes)
+    s.register(bytearray, s.summarize_bytes)
+    s.register(memoryview, s.summarize_buffer)
+    s.register("array.array", s.summarize_container)
+    s.register("numpy.ndarray", s.summarize_array)
+    s.register("django.db.models.base.Model", s.summarize_model)
+
+
+summarizer = Summarizer()
+_setup_defaults(summarizer)
@@ -143,6 +143,14 @@ class ExceptionStub(Exception):
         self.kls = kls
         self.args = args
 
+    def __reduce__(self) -> tuple[type["ExceptionStub"], tuple[Any, ...]]:
+        """Support pickling.
+
+        Returns:
+            Tuple of (class, constructor arguments).
+        """
+        return self.__class__, (self.kls, self.args)
+
     def __str__(self) -> str:
         """Format exception to string.
 
@@ -6,16 +6,24 @@
 # ---------------------------------------------------------------------
 
 # Python modules
+import gzip
+import json
 import os
 import tempfile
+import time
 from collections import defaultdict
 
 # Third-party modules
 import pytest
 
 # Gufo Err modules
-from gufo.err import Err, __version__
+from gufo.err import Err, __version__, cli
 from gufo.err.cli import Cli, ExitCode
+from gufo.err.codec import from_json
+from gufo.err.compressor import DICT_SUFFIX, HAS_ZSTD, Compressor
+from gufo.err.storage.directory import INDEX_NAME, DirectoryStorage
+
+from .util import age, age_index, fail, get_records, hit, populate
 
 FAKE_UUID = "e5d2e3e0-d6b9-415f-ba09-5eadbe4b38ad"
 
@@ -60,6 +68,11 @@ def crashinfo():
         yield tmpdir
 
 
+def ls(path) -> list[str]:
+    """List error info files."""
+    return [fn for fn in os.listdir(path) if DirectoryStorage.rx_fn.match(fn)]
+
+
 def test_help_short() -> None:
     with pytest.raises(SystemExit):
         Cli().run(["-h"])
@@ -79,7 +92,7 @@ def test_version(capsys) -> None:
 
 def test_crashinfo_setup(crashinfo) -> None:
     assert os.path.exists(crashinfo)
-    lst = os.listdir(crashinfo)
+    lst = ls(crashinfo)
     # Check length
     assert len(lst) == 4
     # Check suffixes
@@ -92,6 +105,17 @@ def test_crashinfo_setup(crashinfo) -> None:
     assert r.get("json.xz") == 1
 
 
+def test_get_index(tmp_path) -> None:
+    for fn in [
+        f"{FAKE_UUID}.json.zst",
+        "README",
+        "e5d2e3e0.json",
+        f"{FAKE_UUID}.json.rar",
+    ]:
+        (tmp_path / fn).touch()
+    assert Cli.get_index(str(tmp_path)) == {FAKE_UUID: f"{FAKE_UUID}.json.zst"}
+
+
 def test_list_invalid(capsys) -> None:
     path = "/nonexistend/directory"
     r = Cli().run(["-p", path, "list"])
@@ -112,7 +136,7 @@ def test_list(capsys, crashinfo) -> None:
     assert "fmt-gz" in out
     assert "fmt-bz2" in out
     assert "fmt-xz" in out
-    assert "test_cli.py:57" in out
+    assert "test_cli.py:65" in out
     # assert out == ""
 
 
@@ -128,12 +152,12 @@ def test_list_all(capsys, crashinfo) -> None:
     assert "fmt-gz" in out
     assert "fmt-bz2" in out
     assert "fmt-xz" in out
-    assert "test_cli.py:57" in out
+    assert "test_cli.py:65" in out
     # assert out == ""
 
 
 def test_list_two(capsys, crashinfo) -> None:
-    all_fp = [fn.split(".")[0] for fn in os.listdir(crashinfo)]
+    all_fp = [fn.split(".")[0] for fn in ls(crashinfo)]
     include = all_fp[:2]
     exclude = all_fp[2:]
     r = Cli().run(["-p", crashinfo, "list", *include])
@@ -174,13 +198,13 @@ def test_view_invalid_args(crashinfo) -> None:
 
 
 def test_view(capsys, crashinfo) -> None:
-    all_fp = [fn.split(".")[0] for fn in os.listdir(crashinfo)]
+    all_fp = [fn.split(".")[0] for fn in ls(crashinfo)]
     r = Cli().run(["-p", crashinfo, "view", *all_fp])
     assert r == ExitCode.OK
 
 
 def test_view_terse(capsys, crashinfo) -> None:
-    all_fp = [fn.split(".")[0] for fn in os.listdir(crashinfo)]
+    all_fp = [fn.split(".")[0] for fn in ls(crashinfo)]
     r = Cli().run(["-p", crashinfo, "view", "-f", "terse", *all_fp])
     assert r == ExitCode.OK
     out = capsys.readouterr().out
@@ -193,7 +217,7 @@ def test_view_terse(capsys, crashinfo) -> None:
 
 
 def test_view_extend(capsys, crashinfo) -> None:
-    all_fp = [fn.split(".")[0] for fn in os.listdir(crashinfo)]
+    all_fp = [fn.split(".")[0] for fn in ls(crashinfo)]
     r = Cli().run(["-p", crashinfo, "view", "--format", "extend", *all_fp])
     assert r == ExitCode.OK
     out = capsys.readouterr().out
@@ -206,7 +230,7 @@ def test_view_extend(capsys, crashinfo) -> None:
 
 
 def test_view_all(capsys, crashinfo):
-    all_fp = [fn.split(".")[0] for fn in os.listdir(crashinfo)]
+    all_fp = [fn.split(".")[0] for fn in ls(crashinfo)]
     r = Cli().run(["-p", crashinfo, "view", "all"])
     assert r == ExitCode.OK
     out = capsys.readouterr().out
@@ -215,7 +239,7 @@ def test_view_all(capsys, crashinfo):
 
 
 def test_view_all_star(capsys, crashinfo):
-    all_fp = [fn.split(".")[0] for fn in os.listdir(crashinfo)]
+    all_fp = [fn.split(".")[0] for fn in ls(crashinfo)]
     r = Cli().run(["-p", crashinfo, "view", "*"])
     assert r == ExitCode.OK
     out = capsys.readouterr().out
@@ -224,7 +248,7 @@ def test_view_all_star(capsys, crashinfo):
 
 
 def test_view_two(capsys, crashinfo) -> None:
-    all_fp = [fn.split(".")[0] for fn in os.listdir(crashinfo)]
+    all_fp = [fn.split(".")[0] for fn in ls(crashinfo)]
     include = all_fp[:2]
     exclude = all_fp[2:]
     r = Cli().run(["-p", crashinfo, "view", *include])
@@ -267,6 +291,29 @@ def test_rcol(t: str, w: int, exp: str) -> None:
     assert r == exp
 
 
+@pytest.mark.parametrize(
+    ("s", "exp"),
+    [
+        ("30", 30),
+        ("30s", 30),
+        ("15m", 900),
+        ("1.5h", 5400),
+        ("7d", 604800),
+        ("2w", 1209600),
+    ],
+)
+def test_parse_duration(s: str, exp: int) -> None:
+    assert Cli.parse_duration(s).total_seconds() == exp
+
+
+@pytest.mark.parametrize(
+    "s", ["", "d", "1y", "x1d", "-1d", "-0.5", "nan", "inf", "infd", "1e300w"]
+)
+def test_parse_duration_invalid(s: str) -> None:
+    with pytest.raises(ValueError):
+        Cli.parse_duration(s)
+
+
 def test_clear_empty(crashinfo) -> None:
     r = Cli().run(["-p", crashinfo, "clear"])
     assert r == ExitCode.OK
@@ -290,29 +337,486 @@ def test_clear_invalid(capsys, crashinfo) -> None:
     assert out == f"Error: {path} is not exists\n"
 
 
+def test_view_renamed(capsys, tmp_path) -> None:
+    populate(str(tmp_path), 1, error_info_compress="xz")
+    fn = ls(tmp_path)[0]
+    fp = fn.split(".")[0]
+    os.rename(tmp_path / fn, tmp_path / f"{fp}.json.gz")
+    r = Cli().run(["-p", str(tmp_path), "view", fp])
+    assert r == ExitCode.OK
+    assert "RuntimeError: oops 0" in capsys.readouterr().out
+
+
+def test_train_dict_no_zstd(monkeypatch, tmp_path) -> None:
+    monkeypatch.setattr("gufo.err.cli.HAS_ZSTD", False)
+    r = Cli().run(["-p", str(tmp_path), "train-dict"])
+    assert r == ExitCode.INVALID_ARGS
+
+
+def test_train_dict_no_samples(tmp_path) -> None:
+    if not HAS_ZSTD:
+        pytest.skip("zstd is missed")
+    r = Cli().run(["-p", str(tmp_path), "train-dict"])
+    assert r == ExitCode.CANNOT_READ
+
+
+@pytest.mark.skipif(not HAS_ZSTD, reason="zstd is missed")
+def test_train_dict(capsys, tmp_path) -> None:
+    src = tmp_path / "src"
+    src.mkdir()
+    populate(str(src), 50, error_info_compress="zst")
+    r = Cli().run(["-p", str(src), "train-dict", "--size", "4096"])
+    assert r == ExitCode.OK
+    dicts = [fn for fn in os.listdir(src) if fn.endswith(DICT_SUFFIX)]
+    assert len(dicts) == 1
+    dict_path = src / dicts[0]
+    assert str(dict_path) in capsys.readouterr().out
+    # Write using dictionary
+    dst = tmp_path / "dst"
+    dst.mkdir()
+    populate(
+        str(dst),
+        3,
+        error_info_compress="zst",
+        error_info_compress_dict=str(dict_path),
+    )
+    assert len(ls(dst)) == 3
+    # Cannot read without dictionary
+    r = Cli().run(["-p", str(dst), "view", "all"])
+    assert r == ExitCode.CANNOT_READ
+    # Read with dictionary
+    (dst / dicts[0]).write_bytes(dict_path.read_bytes())
+    r = Cli().run(["-p", str(dst), "list"])
+    assert r == ExitCode.OK
+    out = capsys.readouterr().out
+    assert "svc-2" in out
+
+
+def test_migrate_invalid(capsys, tmp_path) -> None:
+    populate(str(tmp_path), 1)
+    r = Cli().run(["-p", str(tmp_path), "migrate", "-d", "10"])
+    assert r == ExitCode.INVALID_ARGS
+
+
+@pytest.mark.parametrize(
+    "args", [[], ["--max-age", "x"], ["--max-files", "-1"]]
+)
+def test_prune_invalid(tmp_path, args) -> None:
+    populate(str(tmp_path), 1)
+    r = Cli().run(["-p", str(tmp_path), "prune", *args])
+    assert r == ExitCode.INVALID_ARGS
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["compact", "-c", "rar"],
+        ["compact", "-c", "gz", "-l", "100"],
+        ["compact", "--older-than", "x"],
+        ["compact", "-j", "-1"],
+        ["--db", "errors.db", "compact", "--archive"],
+    ],
+)
+def test_compact_invalid(tmp_path, args) -> None:
+    r = Cli().run(["-p", str(tmp_path), *args])
+    assert r == ExitCode.INVALID_ARGS
+
+
+def test_jobs(capsys, tmp_path) -> None:
+    populate(str(tmp_path), 5)
+    os.unlink(tmp_path / INDEX_NAME)
+    for cmd in ("list", "view"):
+        r = Cli().run(["-p", str(tmp_path), cmd, "-j", "1", "all"])
+        assert r == ExitCode.OK
+        out = capsys.readouterr().out
+        r = Cli().run(["-p", str(tmp_path), cmd, "-j", "2", "all"])
+        assert r == ExitCode.OK
+        # Records have no timestamps, compare the fingerprints only
+        assert [
+            line.split(" ")[0] for line in capsys.readouterr().out.splitlines()
+        ] == [line.split(" ")[0] for line in out.splitlines()]
+        r = Cli().run(["-p", str(tmp_path), cmd, "-j", "-1", "all"])
+        assert r == ExitCode.INVALID_ARGS
+        assert "Invalid number of jobs" in capsys.readouterr().out
+
+
+def test_list_filter(capsys, tmp_path) -> None:
+    populate(str(tmp_path), 5)
+    prefix = str(tmp_path)
+
+    def names(*args: str) -> list[str]:
+        r = Cli().run(["-p", prefix, "list", *args])
+        assert r == ExitCode.OK
+        lines = capsys.readouterr().out.splitlines()[2:]
+        return [
+            next(t for t in line.split() if t.startswith("svc-"))
+            for line in lines
+        ]
+
+    assert names("--name", "svc-[13]", "-s", "name") == ["svc-1", "svc-3"]
+    assert names("-s", "name", "-r", "-n", "2") == ["svc-4", "svc-3"]
+    assert names("-s", "name", "--limit", "2") == ["svc-0", "svc-1"]
+    assert names("-s", "name", "-n", "0") == []
+    assert names("--since", "1h", "--until", "0") == names()
+    assert len(names()) == 5
+    assert names("--since", "2100-01-01") == []
+    assert names("--exception", "KeyError") == []
+    assert names("--module", fail.__module__, "-s", "count") != []
+
+
+@pytest.mark.parametrize(
+    "args", [["-n", "-1"], ["--since", "x"], ["--until", "2020-13-01"]]
+)
+def test_list_filter_invalid(capsys, tmp_path, args) -> None:
+    populate(str(tmp_path), 1)
+    r = Cli().run(["-p", str(tmp_path), "list", *args])
+    assert r == ExitCode.INVALID_ARGS
+
+
+def test_watch(capsys, tmp_path, monkeypatch) -> None:
+    populate(str(tmp_path), 2)
+    ticks = []
+
+    def sleep(interval: float) -> None:
+        ticks.append(interval)
+        if len(ticks) == 1:
+            populate(str(tmp_path), 3)
+        elif len(ticks) > 2:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(time, "sleep", sleep)
+    r = Cli().run(["-p", str(tmp_path), "watch", "-i", "0.5"])
+    assert r == ExitCode.OK
+    out = capsys.readouterr().out
+    assert "RuntimeError: oops 2" in out
+    assert "oops 0" not in out
+    assert "oops 1" not in out
+    assert ticks == [0.5, 0.5, 0.5]
+
+
+def test_watch_repeated(capsys, tmp_path, monkeypatch) -> None:
+    records = get_records(str(tmp_path / "records"), 2)
+    path = tmp_path / "dst"
+    path.mkdir()
+    hit(path, records, 1)
+    ticks = []
+
+    def sleep(interval: float) -> None:
+        ticks.append(interval)
+        if len(ticks) == 1:
+            hit(path, records[1:], 2)
+        elif len(ticks) > 2:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(time, "sleep", sleep)
+    r = Cli().run(["-p", str(path), "watch", "-i", "0.5"])
+    assert r == ExitCode.OK
+    out = capsys.readouterr().out
+    assert records[0][0] not in out
+    (line,) = out.splitlines()
+    assert line.startswith(f"{records[1][0]} RuntimeError: oops ")
+    assert "repeated 2 times, 3 total" in line
+
+
+@pytest.mark.parametrize("args", [["-i", "0"], ["-f", "unknown"]])
+def test_watch_invalid(tmp_path, args) -> None:
+    r = Cli().run(["-p", str(tmp_path), "watch", *args])
+    assert r == ExitCode.INVALID_ARGS
+
+
+def test_export(capsys, tmp_path) -> None:
+    fps = populate(str(tmp_path), 3)
+    r = Cli().run(["-p", str(tmp_path), "export"])
+    assert r == ExitCode.OK
+    out = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)["fingerprint"] for line in out] == fps
+    assert all(json.loads(line)["$type"] == "errorinfo" for line in out)
+    r = Cli().run(["-p", str(tmp_path), "export", "-s", "--name", "svc-1"])
+    assert r == ExitCode.OK
+    (line,) = capsys.readouterr().out.splitlines()
+    summary = json.loads(line)
+    assert summary["name"] == "svc-1"
+    assert summary["exception"] == "RuntimeError: oops 1"
+    assert summary["count"] == 1
+
+
+def test_export_file(tmp_path, monkeypatch) -> None:
+    (tmp_path / "err").mkdir()
+    fps = populate(str(tmp_path / "err"), 3)
+    # Compress each line separately
+    monkeypatch.setattr(cli, "EXPORT_CHUNK", 1)
+    out = tmp_path / "export.ndjson.gz"
+    r = Cli().run(["-p", str(tmp_path / "err"), "export", "-o", str(out)])
+    assert r == ExitCode.OK
+    data = out.read_bytes()
+    assert data.count(b"\x1f\x8b") >= 3
+    lines = gzip.decompress(data).splitlines()
+    assert [json.loads(line)["fingerprint"] for line in lines] == fps
+
+
+def test_export_errors(capsys, tmp_path) -> None:
+    (fp,) = populate(str(tmp_path), 1)
+    missed = "e5d2e3e0-d6b9-415f-ba09-5eadbe4b38ad"
+    r = Cli().run(["-p", str(tmp_path), "export", fp, missed])
+    assert r == ExitCode.CANNOT_READ
+    captured = capsys.readouterr()
+    assert json.loads(captured.out)["fingerprint"] == fp
+    assert f"ERROR: {missed} is not found" in captured.err
+    r = Cli().run(["-p", str(tmp_path), "export", "-c", "rar"])
+    assert r == ExitCode.INVALID_ARGS
+
+
+def test_merge(capsys, tmp_path) -> None:
+    records = get_records(str(tmp_path / "records"), 3)
+    fps = [fp for fp, _ in records]
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    hit(tmp_path / "a", records[:2], 2)
+    hit(tmp_path / "b", records[1:], 3)
+    dst = str(tmp_path / "dst")
+    args = ["merge", str(tmp_path / "a"), f"host-b={tmp_path / 'b'}", dst]
+    r = Cli().run(args)
+    assert r == ExitCode.OK
+    out = capsys.readouterr().out
+    assert "2 records are merged from a\n" in out
+    assert "2 records are merged from host-b\n" in out
+    assert sorted(DirectoryStorage(dst).iter_fingerprints()) == sorted(fps)
+
+    def get_counts() -> dict[str, tuple[int, dict[str, int]]]:
+        return {
+            fp: (s.count, s.hosts)
+            for fp, (s, _) in DirectoryStorage(dst).get_summaries().items()
+        }
+
+    assert get_counts() == {
+        fps[0]: (2, {"a": 2}),
+        fps[1]: (5, {"a": 2, "host-b": 3}),
+        fps[2]: (3, {"host-b": 3}),
+    }
+    # Unchanged sources are skipped
+    r = Cli().run(args)
+    assert r == ExitCode.OK
+    out = capsys.readouterr().out
+    assert out == "a is already merged\nhost-b is already merged\n"
+    # Only new occurrences are merged
+    hit(tmp_path / "a", records[1:2], 1)
+    r = Cli().run(args)
+    assert r == ExitCode.OK
+    assert "1 records are merged from a\n" in capsys.readouterr().out
+    assert get_counts()[fps[1]] == (6, {"a": 3, "host-b": 3})
+
+
+def test_merge_invalid(capsys, tmp_path) -> None:
+    r = Cli().run(["merge", str(tmp_path)])
+    assert r == ExitCode.INVALID_ARGS
+    r = Cli().run(["merge", str(tmp_path / "none"), str(tmp_path / "dst")])
+    assert r == ExitCode.NOT_EXISTS
+    with pytest.raises(ValueError):
+        DirectoryStorage(tmp_path).merge("h", [], [], policy="random")
+
+
+def test_merge_hosts(capsys, tmp_path) -> None:
+    records = get_records(str(tmp_path / "records"), 2)
+    srcs = [tmp_path / "hosts" / h / "var" / "err" for h in ("a", "b")]
+    for src, record in zip(srcs, records, strict=True):
+        src.mkdir(parents=True)
+        hit(src, [record], 1)
+    dst = str(tmp_path / "dst")
+    # Both sources default to the `err` host
+    r = Cli().run(["merge", *map(str, srcs), dst])
+    assert r == ExitCode.INVALID_ARGS
+    assert "Duplicated host names: err" in capsys.readouterr().out
+    assert not os.path.exists(dst)
+    # Paths with `=`
+    src = tmp_path / "x=y"
+    srcs[1].rename(src)
+    r = Cli().run(["merge", f"a={srcs[0]}", str(src), dst])
+    assert r == ExitCode.OK
+    out = capsys.readouterr().out
+    assert "1 records are merged from a\n" in out
+    assert "1 records are merged from x=y\n" in out
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        ("web1=/var/err", ("web1", "/var/err")),
+        ("/var/err", ("err", "/var/err")),
+        ("/data/a=b/err", ("err", "/data/a=b/err")),
+        ("=err", ("=err", "=err")),
+    ],
+)
+def test_parse_source(source, expected) -> None:
+    assert Cli.parse_source(source) == expected
+
+
+def test_clear_scan(capsys, tmp_path, monkeypatch) -> None:
+    fps = populate(str(tmp_path), 3)
+    age(tmp_path, fps)
+    age_index(tmp_path)
+    calls: list[str] = []
+    listdir, scandir = os.listdir, os.scandir
+
+    def trace(fn, name):
+        def inner(path):
+            calls.append(name)
+            return fn(path)
+
+        return inner
+
+    monkeypatch.setattr(os, "listdir", trace(listdir, "listdir"))
+    monkeypatch.setattr(os, "scandir", trace(scandir, "scandir"))
+    r = Cli().run(
+        ["-p", str(tmp_path), "clear", "--older-than", "90m", "--dry-run"]
+    )
+    assert r == ExitCode.OK
+    out = capsys.readouterr().out
+    assert out == f"{fps[0]}\n{fps[1]}\n2 records would be removed\n"
+    # Single directory scan
+    assert calls == ["scandir"]
+
+
+@pytest.mark.parametrize("age", ["-1d", "inf", "nan", "1e300w", "99999999d"])
+def test_clear_invalid_age(capsys, tmp_path, age) -> None:
+    fps = populate(str(tmp_path), 1)
+    r = Cli().run(["-p", str(tmp_path), "clear", f"--older-than={age}"])
+    assert r == ExitCode.INVALID_ARGS
+    assert f"ERROR: Invalid duration: {age}" in capsys.readouterr().out
+    assert list(DirectoryStorage(tmp_path).iter_fingerprints()) == fps
+
+
+def test_clear_select(capsys, tmp_path) -> None:
+    fps = populate(str(tmp_path), 3)
+    age(tmp_path, fps)
+    age_index(tmp_path)
+    # Recent occurrence of the old record
+    storage = DirectoryStorage(
+        tmp_path, compressor=Compressor("gz"), flush_interval=0
+    )
+    data = storage.read(fps[0])
+    assert data
+    storage.write_info(from_json(data.decode()), data)
+    prefix = str(tmp_path)
+    r = Cli().run(["-p", prefix, "clear", "--older-than", "90m", "--dry-run"])
+    assert r == ExitCode.OK
+    assert capsys.readouterr().out == f"{fps[1]}\n1 records would be removed\n"
+    assert sorted(DirectoryStorage(tmp_path).iter_fingerprints()) == fps
+    # Filters
+    r = Cli().run(["-p", prefix, "clear", "--exception", "KeyError"])
+    assert r == ExitCode.OK
+    assert sorted(DirectoryStorage(tmp_path).iter_fingerprints()) == fps
+    r = Cli().run(
+        ["-p", prefix, "clear", "--older-than", "30m", "--name", "svc-*"]
+    )
+    assert r == ExitCode.OK
+    assert sorted(DirectoryStorage(tmp_path).iter_fingerprints()) == [fps[0]]
+    # Narrow the expressions
+    r = Cli().run(["-p", prefix, "clear", "--since", "1h", "-j", "2", "all"])
+    assert r == ExitCode.OK
+    assert list(DirectoryStorage(tmp_path).iter_fingerprints()) == []
+
+
+@pytest.mark.parametrize(
+    "args", [["--older-than", "x"], ["--since", "x"], ["-j", "-1"]]
+)
+def test_clear_invalid_args(tmp_path, args) -> None:
+    populate(str(tmp_path), 1)
+    r = Cli().run(["-p", str(tmp_path), "clear", *args])
+    assert r == ExitCode.INVALID_ARGS
+    assert len(list(DirectoryStorage(tmp_path).iter_fingerprints())) == 1
+
+
+def test_resolve_prefix() -> None:
+    index = ["ab01", "ab02", "ac01"]
+    assert Cli.resolve_prefix("ab0", index[2:]) == "ab0"
+    assert Cli.resolve_prefix("ab01", index) == "ab01"
+    assert Cli.resolve_prefix("ac", index) == "ac01"
+    assert Cli.resolve_prefix("ad", index) == "ad"
+    with pytest.raises(SyntaxError, match="ab01, ab02"):
+        Cli.resolve_prefix("ab", index)
+
+
+def test_prefix(capsys, monkeypatch, tmp_path) -> None:
+    fps = populate(str(tmp_path), 3)
+    prefix = str(tmp_path)
+    r = Cli().run(["-p", prefix, "view", "-f", "terse", fps[0][:8].upper()])
+    assert r == ExitCode.OK
+    assert "RuntimeError: oops" in capsys.readouterr().out
+    r = Cli().run(["-p", prefix, "view", fps[0][:3]])
+    assert r == ExitCode.SYNTAX
+    r = Cli().run(["-p", prefix, "view", "zzzzzz"])
+    assert r == ExitCode.SYNTAX
+    # Single directory scan
+    scandir = os.scandir
+    calls = []
+
+    def counted(path):
+        calls.append(path)
+        return scandir(path)
+
+    monkeypatch.setattr(os, "scandir", counted)
+    missed = next(
+        p for p in ("0000", "ffff") if not any(fp.startswith(p) for fp in fps)
+    )
+    r = Cli().run(
+        ["-p", prefix, "clear", fps[1][:6], f"{fps[2][:13]}", missed]
+    )
+    assert r == ExitCode.CANNOT_READ
+    assert f"ERROR: {missed} is not found" in capsys.readouterr().out
+    assert len(calls) == 1
+    assert list(DirectoryStorage(tmp_path).iter_fingerprints()) == fps[:1]
+
+
+def test_lazy_imports() -> None:
+    import subprocess
+    import sys
+
+    lazy = [
+        "gufo.err.codec",
+        "gufo.err.formatter.loader",
+        "gufo.err.grep",
+        "gufo.err.server",
+        "gufo.err.stats",
+        "gufo.err.storage.directory",
+        "gufo.err.storage.segment",
+        "gufo.err.storage.sqlite",
+        "concurrent.futures.process",
+        "http.server",
+        "json",
+        "multiprocessing",
+        "sqlite3",
+    ]
+    code = (
+        "import sys, gufo.err.cli; "
+        f"print([m for m in {lazy} if m in sys.modules])"
+    )
+    out = subprocess.check_output([sys.executable, "-c", code], text=True)
+    assert out == "[]\n"
+
+
 # Keep this test as latest in the modules
 def test_clear(crashinfo) -> None:
-    def ls():
-        return [fn.split(".")[0] for fn in os.listdir(crashinfo)]
+    def ls_fp():
+        return [fn.split(".")[0] for fn in ls(crashinfo)]
 
     # Delete one
-    all_fp = ls()
+    all_fp = ls_fp()
     assert len(all_fp) == 4
     to_delete = all_fp[0]
     r = Cli().run(["-p", crashinfo, "clear", to_delete])
     assert r == ExitCode.OK
-    all_fp = ls()
+    all_fp = ls_fp()
     assert to_delete not in all_fp
     assert len(all_fp) == 3
     # Delete two
     to_delete = all_fp[:2]
     r = Cli().run(["-p", crashinfo, "clear", *to_delete])
     assert r == ExitCode.OK
-    all_fp = ls()
+    all_fp = ls_fp()
     for fp in to_delete:
         assert fp not in all_fp
     assert len(all_fp) == 1
     # Delete all
     r = Cli().run(["-p", crashinfo, "clear", "all"])
     assert r == ExitCode.OK
-    assert not ls()
+    assert not ls_fp()
@@ -130,6 +130,105 @@ SAMPLE = ErrorInfo(
 )
 
 SAMPLE_DICT: dict[str, Any] = {
+    "$type": "errorinfo",
+    "$version": "1.1",
+    "fingerprint": "be8ccd86-3661-434c-8569-40dd65d9860a",
+    "name": "oops",
+    "timestamp": "2022-03-22T07:21:29.215827+01:00",
+    "version": "1.0",
+    "root_module": "tests",
+    "exception": {"class": "RuntimeError", "args": ["oops"]},
+    "stack": [
+        {
+            "name": "test_iter_frames",
+            "module": "tests.test_frames",
+            "locals": {},
+            "source": {
+                "file_name": "tests/test_frames.py",
+                "current_line": 125,
+                "first_line": 118,
+                "last_line": 129,
+            },
+        },
+        {
+            "name": "entry",
+            "module": "tests.sample.trace",
+            "locals": {"s": 3},
+            "source": {
+                "file_name": "tests/sample/trace.py",
+                "current_line": 14,
+                "first_line": 7,
+                "last_line": 14,
+            },
+        },
+        {
+            "name": "to_oops",
+            "module": "tests.sample.trace",
+            "locals": {"x": 2},
+            "source": {
+                "file_name": "tests/sample/trace.py",
+                "current_line": 8,
+                "first_line": 1,
+                "last_line": 14,
+            },
+        },
+        {
+            "name": "oops",
+            "module": "tests.sample.trace",
+            "locals": {},
+            "source": {
+                "file_name": "tests/sample/trace.py",
+                "current_line": 2,
+                "first_line": 1,
+                "last_line": 9,
+            },
+        },
+    ],
+    "sources": {
+        "tests/test_frames.py": [
+            {
+                "first_line": 118,
+                "lines": [
+                    "",
+                    "",
+                    "def test_iter_frames():",
+                    '    """',
+                    "    Call the function which raises an exception",
+                    '    """',
+                    "    try:",
+                    "        entry()",
+                    '        assert False, "No trace"',
+                    "    except RuntimeError:",
+                    "        frames = list(iter_frames(exc_traceback()))",
+                    "        assert frames == SAMPLE_FRAMES",
+                ],
+            }
+        ],
+        "tests/sample/trace.py": [
+            {
+                "first_line": 1,
+                "lines": [
+                    "def oops():",
+                    '    raise RuntimeError("oops")',
+                    "",
+                    "",
+                    "def to_oops():",
+                    "    x = 1",
+                    "    x += 1",
+                    "    oops()",
+                    "",
+                    "",
+                    "def entry():",
+                    "    s = 2",
+                    "    s += 1",
+                    "    to_oops()",
+                ],
+            }
+        ],
+    },
+}
+
+SAMPLE_DICT_1_0: dict[str, Any] = {
     "$type": "errorinfo",
     "$version": "1.0",
     "fingerprint": "be8ccd86-3661-434c-8569-40dd65d9860a",
@@ -253,6 +352,51 @@ def test_from_dict():
     assert out == SAMPLE
 
 
+def test_from_dict_1_0():
+    out = from_dict(SAMPLE_DICT_1_0)
+    out.exception = SAMPLE.exception
+    assert out == SAMPLE
+
+
+def test_to_dict_merge_sources():
+    si1 = SourceInfo(
+        file_name="x.py", first_line=1, current_line=2, lines=["1", "2", "3"]
+    )
+    si2 = SourceInfo(
+        file_name="x.py", first_line=3, current_line=4, lines=["3", "4"]
+    )
+    si3 = SourceInfo(
+        file_name="x.py", first_line=10, current_line=10, lines=["10"]
+    )
+    info = ErrorInfo(
+        name="oops",
+        version="1.0",
+        fingerprint=SAMPLE.fingerprint,
+        exception=RuntimeError("oops"),
+        stack=[
+            FrameInfo(name="f1", module="x", source=si1, locals={}),
+            FrameInfo(name="f2", module="x", source=si3, locals={}),
+            FrameInfo(name="f3", module="x", source=si2, locals={}),
+        ],
+    )
+    out = to_dict(info)
+    assert out["sources"] == {
+        "x.py": [
+            {"first_line": 1, "lines": ["1", "2", "3", "4"]},
+            {"first_line": 10, "lines": ["10"]},
+        ]
+    }
+    r = from_dict(out)
+    assert [fi.source for fi in r.stack] == [si1, si3, si2]
+
+
+def test_from_dict_missed_source():
+    data = to_dict(SAMPLE)
+    data["sources"] = {}
+    with pytest.raises(ValueError):
+        from_dict(data)
+
+
 def test_from_json():
     src = to_json(SAMPLE)
     out = from_json(src)
@@ -8,7 +8,12 @@
 import pytest
 
 # Gufo Labs Modules
-from gufo.err.compressor import Compressor
+from gufo.err.compressor import (
+    HAS_ZSTD,
+    Compressor,
+    get_dict_path,
+    train_dict,
+)
 
 
 def test_invalid_format():
@@ -23,6 +28,7 @@ def test_invalid_format():
         ("/a/b/c/xxx.json.gz", "gz"),
         ("/a/b/c/xxx.json.bz2", "bz2"),
         ("/a/b/c/xxx.json.xz", "xz"),
+        ("/a/b/c/xxx.json.zst", "zst" if HAS_ZSTD else None),
         ("/a/b/c/xxx.json.rar", None),
     ],
 )
@@ -64,6 +70,11 @@ def test_autodetect(path: str, expected: str) -> None:
             "xz",
             b"12345",
         ),
+        pytest.param(
+            "zst",
+            b"12345",
+            marks=pytest.mark.skipif(not HAS_ZSTD, reason="zstd is missed"),
+        ),
     ],
 )
 def test_compressor(fmt: str, data: bytes):
@@ -71,3 +82,152 @@ def test_compressor(fmt: str, data: bytes):
     c_data = c.encode(data)
     s_data = c.decode(c_data)
     assert s_data == data
+
+
+@pytest.mark.parametrize(
+    "fmt",
+    [
+        "gz",
+        "bz2",
+        "xz",
+        pytest.param(
+            "zst",
+            marks=pytest.mark.skipif(not HAS_ZSTD, reason="zstd is missed"),
+        ),
+    ],
+)
+@pytest.mark.parametrize("damage", ["truncate", "corrupt"])
+def test_corrupted(fmt: str, damage: str) -> None:
+    c = Compressor(format=fmt)
+    data = bytearray(c.encode(b"12345" * 100))
+    if damage == "truncate":
+        data = data[: len(data) // 2]
+    else:
+        for i in range(10, len(data) - 10):
+            data[i] ^= 0xFF
+    with pytest.raises(ValueError):
+        c.decode(bytes(data))
+
+
+def test_level_unsupported() -> None:
+    with pytest.raises(ValueError):
+        Compressor(format=None, level=1)
+
+
+@pytest.mark.parametrize(
+    ("fmt", "level"),
+    [
+        ("gz", 0),
+        ("gz", 1),
+        ("gz", 9),
+        ("bz2", 1),
+        ("bz2", 9),
+        ("xz", 0),
+        ("xz", 9),
+    ],
+)
+def test_level(fmt: str, level: int) -> None:
+    data = b"12345" * 100
+    c = Compressor(format=fmt, level=level)
+    assert c.decode(c.encode(data)) == data
+
+
+def test_pickle() -> None:
+    import pickle
+
+    data = b"12345" * 100
+    c = pickle.loads(pickle.dumps(Compressor(format="gz", level=1)))  # noqa: S301
+    assert c.suffix == ".gz"
+    assert c.decode(c.encode(data)) == data
+
+
+@pytest.mark.parametrize(
+    ("fmt", "level"), [("gz", -1), ("gz", 10), ("bz2", 0), ("xz", 10)]
+)
+def test_invalid_level(fmt: str, level: int) -> None:
+    with pytest.raises(ValueError):
+        Compressor(format=fmt, level=level)
+
+
+@pytest.mark.parametrize(
+    "fmt",
+    [
+        None,
+        "gz",
+        "bz2",
+        "xz",
+        pytest.param(
+            "zst",
+            marks=pytest.mark.skipif(not HAS_ZSTD, reason="zstd is missed"),
+        ),
+    ],
+)
+def test_get_data_format(fmt: str | None) -> None:
+    data = Compressor(format=fmt).encode(b'{"$type": "errorinfo"}')
+    assert Compressor.get_data_format(data) == fmt
+    # Renamed file
+    c = Compressor.autodetect("/a/b/c/xxx.json.bz2", data)
+    assert c.decode(data) == b'{"$type": "errorinfo"}'
+
+
+@pytest.mark.skipif(not HAS_ZSTD, reason="zstd is missed")
+@pytest.mark.parametrize("level", [1, 3, 19])
+def test_zst_level(level: int) -> None:
+    data = b"12345" * 100
+    c = Compressor(format="zst", level=level)
+    assert c.suffix == ".zst"
+    assert c.decode(c.encode(data)) == data
+
+
+def get_dict_samples() -> list[bytes]:
+    return [
+        (
+            f'{{"$type": "errorinfo", "name": "service{i}", '
+            f'"fingerprint": "{i:08d}-0000-0000-0000-000000000000", '
+            f'"stack": [{{"name": "fn{i % 7}", "module": "app.mod{i % 5}"}}]}}'
+        ).encode()
+        for i in range(200)
+    ]
+
+
+@pytest.mark.parametrize("fmt", [None, "gz", "bz2", "xz"])
+def test_dictionary_unsupported(fmt: str | None) -> None:
+    with pytest.raises(ValueError):
+        Compressor(format=fmt, dictionary=b"")
+
+
+@pytest.mark.skipif(not HAS_ZSTD, reason="zstd is missed")
+def test_dictionary(tmp_path) -> None:
+    samples = get_dict_samples()
+    dict_id, content = train_dict(samples, 4096)
+    assert dict_id
+    c = Compressor(format="zst", level=3, dictionary=content)
+    data = samples[10]
+    c_data = c.encode(data)
+    assert len(c_data) < len(Compressor(format="zst").encode(data))
+    assert c.decode(c_data) == data
+    # Plain decoder cannot decompress
+    with pytest.raises(ValueError):
+        Compressor(format="zst").decode(c_data)
+    # Missed dictionary
+    path = tmp_path / "sample.json.zst"
+    path.write_bytes(c_data)
+    with pytest.raises(ValueError):
+        Compressor.autodetect(str(path)).decode(c_data)
+    # Dictionary lookup
+    with open(get_dict_path(str(tmp_path), dict_id), "wb") as f:
+        f.write(content)
+    assert Compressor.autodetect(str(path)).decode(c_data) == data
+    # Not using dictionary
+    assert (
+        Compressor.autodetect(str(path)).decode(
+            Compressor(format="zst").encode(data)
+        )
+        == data
+    )
+
+
+@pytest.mark.skipif(not HAS_ZSTD, reason="zstd is missed")
+def test_train_dict_failed() -> None:
+    with pytest.raises(ValueError):
+        train_dict([b"1", b"2"], 4096)
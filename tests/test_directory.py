@@ -0,0 +1,878 @@
+# ---------------------------------------------------------------------
+# Gufo Err: test DirectoryStorage
+# ---------------------------------------------------------------------
+# Copyright (C) 2022-26, Gufo Labs
+# ---------------------------------------------------------------------
+
+# Python modules
+import datetime
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Third-party modules
+import pytest
+
+# Gufo Err modules
+from gufo.err import Err
+from gufo.err.abc.storage import SummaryFilter
+from gufo.err.cli import Cli, ExitCode
+from gufo.err.codec import from_json
+from gufo.err.compressor import Compressor
+from gufo.err.middleware.errorinfo import ErrorInfoMiddleware
+from gufo.err.storage.directory import INDEX_NAME, DirectoryStorage
+
+from .util import age, age_index, fail, get_records, hit, populate
+
+
+def test_index(tmp_path) -> None:
+    fps = populate(str(tmp_path), 3)
+    assert (tmp_path / INDEX_NAME).exists()
+    storage = DirectoryStorage(tmp_path)
+    summaries = storage.get_summaries()
+    assert sorted(summaries) == fps
+    for fp in fps:
+        summary, fn = summaries[fp]
+        assert summary.fingerprint == fp
+        assert summary.exception.startswith("RuntimeError: oops ")
+        assert "util.py:" in summary.place
+        assert fn == f"{fp}.json.gz"
+
+
+def test_list_from_index(tmp_path) -> None:
+    fps = populate(str(tmp_path), 3)
+    # Corrupt records, list must not decode them
+    for fp in fps:
+        (tmp_path / f"{fp}.json.gz").write_bytes(b"")
+    storage = DirectoryStorage(tmp_path)
+    assert sorted(s.fingerprint for s in storage.iter_summary(fps)) == fps
+
+
+def test_list_not_indexed(tmp_path) -> None:
+    fps = populate(str(tmp_path), 3)
+    os.unlink(tmp_path / INDEX_NAME)
+    storage = DirectoryStorage(tmp_path)
+    assert storage.get_summaries() == {}
+    assert sorted(s.fingerprint for s in storage.iter_summary(fps)) == fps
+
+
+def test_delete(tmp_path) -> None:
+    fps = populate(str(tmp_path), 3)
+    storage = DirectoryStorage(tmp_path)
+    assert storage.delete(fps[0]) is True
+    assert sorted(DirectoryStorage(tmp_path).get_summaries()) == fps[1:]
+
+
+def test_delete_many(tmp_path) -> None:
+    fps = populate(str(tmp_path), 3)
+    missed = "e5d2e3e0-d6b9-415f-ba09-5eadbe4b38ad"
+    storage = DirectoryStorage(tmp_path)
+    assert storage.delete_many([*fps[:2], missed], jobs=2) == 2
+    assert sorted(storage.iter_fingerprints()) == fps[2:]
+    storage = DirectoryStorage(tmp_path)
+    assert sorted(storage.iter_fingerprints()) == fps[2:]
+    assert sorted(storage.get_summaries()) == fps[2:]
+
+
+def test_broken_index(tmp_path) -> None:
+    fps = populate(str(tmp_path), 2)
+    with open(tmp_path / INDEX_NAME, "ab") as f:
+        f.write(b'{"fingerprint": "trunc')
+    assert sorted(DirectoryStorage(tmp_path).get_summaries()) == fps
+
+
+def test_reindex(capsys, tmp_path) -> None:
+    fps = populate(str(tmp_path), 3)
+    # Stale entries
+    os.unlink(tmp_path / f"{fps[0]}.json.gz")
+    with open(tmp_path / INDEX_NAME, "ab") as f:
+        f.write(b"garbage\n")
+    r = Cli().run(["-p", str(tmp_path), "reindex"])
+    assert r == ExitCode.OK
+    assert f"2 records are indexed in {tmp_path}" in capsys.readouterr().out
+    assert len((tmp_path / INDEX_NAME).read_bytes().splitlines()) == 2
+    assert sorted(DirectoryStorage(tmp_path).get_summaries()) == fps[1:]
+
+
+@pytest.mark.parametrize("shard_depth", [-1, 5])
+def test_invalid_shard_depth(tmp_path, shard_depth) -> None:
+    with pytest.raises(ValueError):
+        DirectoryStorage(tmp_path, shard_depth=shard_depth)
+
+
+def test_sharded(capsys, tmp_path) -> None:
+    fps = populate(str(tmp_path), 3, error_info_shard_depth=2)
+    for fp in fps:
+        assert (tmp_path / fp[:2] / fp[2:4] / f"{fp}.json.gz").exists()
+    storage = DirectoryStorage(tmp_path)
+    assert storage.get_index()[fps[0]] == os.path.join(
+        fps[0][:2], fps[0][2:4], f"{fps[0]}.json.gz"
+    )
+    assert storage.read(fps[0]) is not None
+    # List
+    r = Cli().run(["-p", str(tmp_path), "list"])
+    assert r == ExitCode.OK
+    out = capsys.readouterr().out
+    for i in range(3):
+        assert f"svc-{i}" in out
+    # View
+    r = Cli().run(["-p", str(tmp_path), "view", "-f", "terse", fps[0]])
+    assert r == ExitCode.OK
+    assert "RuntimeError: oops" in capsys.readouterr().out
+    # Clear
+    r = Cli().run(["-p", str(tmp_path), "clear", fps[0]])
+    assert r == ExitCode.OK
+    assert sorted(DirectoryStorage(tmp_path).iter_fingerprints()) == fps[1:]
+
+
+def test_no_duplicates(tmp_path) -> None:
+    fps = populate(str(tmp_path), 1)
+    storage = DirectoryStorage(
+        tmp_path, Compressor(format="gz"), shard_depth=2
+    )
+    data = storage.read(fps[0])
+    assert data
+    assert storage.write(fps[0], data) is False
+    assert not (tmp_path / fps[0][:2]).exists()
+
+
+def test_migrate(capsys, tmp_path) -> None:
+    fps = populate(str(tmp_path), 3)
+    r = Cli().run(["-p", str(tmp_path), "migrate", "-d", "2"])
+    assert r == ExitCode.OK
+    assert f"3 records are migrated in {tmp_path}" in capsys.readouterr().out
+    for fp in fps:
+        assert (tmp_path / fp[:2] / fp[2:4] / f"{fp}.json.gz").exists()
+    summaries = DirectoryStorage(tmp_path).get_summaries()
+    assert summaries[fps[0]][1] == os.path.join(
+        fps[0][:2], fps[0][2:4], f"{fps[0]}.json.gz"
+    )
+    # Already migrated
+    assert DirectoryStorage(tmp_path).migrate(2) == 0
+    # Back to the flat layout
+    r = Cli().run(["-p", str(tmp_path), "migrate", "-d", "0"])
+    assert r == ExitCode.OK
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        [INDEX_NAME, *(f"{fp}.json.gz" for fp in fps)]
+    )
+    assert sorted(DirectoryStorage(tmp_path).get_summaries()) == fps
+
+
+def test_invalid_fsync(tmp_path) -> None:
+    with pytest.raises(ValueError):
+        DirectoryStorage(tmp_path, fsync="always")
+
+
+@pytest.mark.parametrize(
+    ("fsync", "expected"), [("never", 0), ("file", 1), ("directory", 2)]
+)
+def test_fsync(tmp_path, monkeypatch, fsync, expected) -> None:
+    calls = []
+    monkeypatch.setattr(os, "fsync", calls.append)
+    err = Err().setup(
+        format=None, error_info_path=str(tmp_path), error_info_fsync=fsync
+    )
+    try:
+        fail(1)
+    except RuntimeError:
+        err.process()
+    assert len(calls) == expected
+    assert len(list(DirectoryStorage(tmp_path).iter_fingerprints())) == 1
+
+
+def test_atomic_write(tmp_path, monkeypatch) -> None:
+    fps = populate(str(tmp_path), 1)
+    data = DirectoryStorage(tmp_path).read(fps[0])
+    assert data
+    os.unlink(tmp_path / f"{fps[0]}.json.gz")
+    os.unlink(tmp_path / INDEX_NAME)
+
+    def broken(data: bytes) -> bytes:
+        raise OSError
+
+    storage = DirectoryStorage(tmp_path)
+    monkeypatch.setattr(storage.compressor, "encode", broken)
+    with pytest.raises(OSError):
+        storage.write(fps[0], data)
+    # Neither partial record nor temporary file is left
+    assert os.listdir(tmp_path) == []
+    # Temporary files are ignored
+    (tmp_path / f".{fps[0]}.json.x.tmp").write_bytes(b"")
+    assert list(DirectoryStorage(tmp_path).iter_fingerprints()) == []
+
+
+def test_compact_index(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr("gufo.err.storage.directory.INDEX_COMPACT_SIZE", 4096)
+    records = get_records(str(tmp_path / "records"), 3)
+    storage = DirectoryStorage(tmp_path, flush_interval=0)
+    n = 200
+    for _ in range(n):
+        for _, data in records[:2]:
+            storage.write_info(from_json(data.decode()), data)
+        fp, data = records[2]
+        storage.write(fp, data)
+        storage.delete(fp)
+    lines = (tmp_path / INDEX_NAME).read_bytes().splitlines()
+    assert len(lines) < 100
+    summaries = DirectoryStorage(tmp_path).get_summaries()
+    assert sorted(summaries) == sorted(fp for fp, _ in records[:2])
+    for summary, _ in summaries.values():
+        assert summary.count == n
+
+
+def test_compact_index_tail(tmp_path) -> None:
+    fps = populate(str(tmp_path), 2)
+    storage = DirectoryStorage(tmp_path)
+    assert storage.compact_index() is False
+    storage.delete(fps[0])
+    with open(tmp_path / INDEX_NAME, "rb") as f:
+        _, _, lines = storage._read_index(f)
+    assert lines == 3
+    # Concurrent append after the read
+    other = DirectoryStorage(tmp_path)
+    read_index = storage._read_index
+
+    def append(f):
+        r = read_index(f)
+        other.delete(fps[1])
+        return r
+
+    storage._read_index = append
+    assert storage.compact_index(ratio=0) is True
+    lines = (tmp_path / INDEX_NAME).read_bytes().splitlines()
+    assert len(lines) == 2
+    assert DirectoryStorage(tmp_path).get_summaries() == {}
+
+
+def test_concurrent_write(tmp_path, monkeypatch) -> None:
+    ((fp, data),) = get_records(str(tmp_path / "src"), 1)
+    info = from_json(data.decode())
+    first = DirectoryStorage(tmp_path, flush_interval=0)
+    second = DirectoryStorage(tmp_path, flush_interval=0)
+    # Both writers have passed the existence check
+    monkeypatch.setattr(second, "_exists", lambda fp: False)
+    assert first.write_info(info, data) is True
+    assert second.write_info(info, data) is False
+    assert not [fn for fn in os.listdir(tmp_path) if fn.endswith(".tmp")]
+    entries = [
+        json.loads(line)
+        for line in (tmp_path / INDEX_NAME).read_bytes().splitlines()
+    ]
+    assert [e.get("hits") for e in entries] == [None, 1]
+    summary, _ = DirectoryStorage(tmp_path).get_summaries()[fp]
+    assert summary.count == 2
+
+
+def test_concurrent_writers(tmp_path) -> None:
+    ((fp, data),) = get_records(str(tmp_path / "src"), 1)
+    info = from_json(data.decode())
+    n = 8
+    barrier = threading.Barrier(n)
+
+    def write(_: int) -> bool:
+        storage = DirectoryStorage(tmp_path, flush_interval=0)
+        barrier.wait()
+        return storage.write_info(info, data)
+
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        r = list(pool.map(write, range(n)))
+    assert r.count(True) == 1
+    summaries = DirectoryStorage(tmp_path).get_summaries()
+    assert list(summaries) == [fp]
+    assert summaries[fp][0].count == n
+
+
+@pytest.mark.parametrize(
+    "limits",
+    [
+        {"max_files": -1},
+        {"max_bytes": -1},
+        {"max_age": datetime.timedelta(-1)},
+    ],
+)
+def test_invalid_limits(tmp_path, limits) -> None:
+    with pytest.raises(ValueError):
+        DirectoryStorage(tmp_path, **limits)
+
+
+def test_segment_limits(tmp_path) -> None:
+    with pytest.raises(ValueError):
+        ErrorInfoMiddleware(tmp_path, storage="segment", max_files=10)
+
+
+def test_max_files(tmp_path, monkeypatch) -> None:
+    records = get_records(str(tmp_path / "src"), 4)
+    path = tmp_path / "dst"
+    path.mkdir()
+    storage = DirectoryStorage(path, max_files=2)
+    scans = []
+    scandir = os.scandir
+
+    def counted(p):
+        scans.append(p)
+        return scandir(p)
+
+    monkeypatch.setattr(os, "scandir", counted)
+    for fp, data in records:
+        assert storage.write(fp, data) is True
+    # Directory is scanned only once
+    assert len(scans) == 1
+    # Oldest records are evicted
+    fps = [fp for fp, _ in records]
+    assert sorted(DirectoryStorage(path).iter_fingerprints()) == sorted(
+        fps[2:]
+    )
+    assert sorted(DirectoryStorage(path).get_summaries()) == sorted(fps[2:])
+
+
+def test_max_files_last_seen(tmp_path, monkeypatch) -> None:
+    records = get_records(str(tmp_path / "src"), 6)
+    path = tmp_path / "dst"
+    path.mkdir()
+    storage = DirectoryStorage(path, max_files=3, flush_interval=3600)
+    loads = []
+    get_summaries = storage.get_summaries
+
+    def counted():
+        loads.append(1)
+        return get_summaries()
+
+    monkeypatch.setattr(storage, "get_summaries", counted)
+    fps = [fp for fp, _ in records]
+    for fp, data in records:
+        assert storage.write(fp, data) is True
+        # The first record is hit on every write
+        first = records[0][1]
+        storage.write_info(from_json(first.decode()), first)
+    # Summary index is loaded only once
+    assert len(loads) == 1
+    assert sorted(DirectoryStorage(path).iter_fingerprints()) == sorted(
+        [fps[0], *fps[4:]]
+    )
+
+
+def test_max_bytes(tmp_path) -> None:
+    records = get_records(str(tmp_path / "src"), 3)
+    path = tmp_path / "dst"
+    path.mkdir()
+    storage = DirectoryStorage(path, max_bytes=1)
+    for fp, data in records:
+        assert storage.write(fp, data) is True
+    assert list(DirectoryStorage(path).iter_fingerprints()) == []
+
+
+def test_max_age(tmp_path) -> None:
+    fps = populate(str(tmp_path), 3)
+    age(tmp_path, fps[:2])
+    age_index(tmp_path)
+    storage = DirectoryStorage(tmp_path)
+    assert storage.prune(max_age=datetime.timedelta(minutes=90)) == 1
+    assert sorted(DirectoryStorage(tmp_path).iter_fingerprints()) == fps[1:]
+
+
+def test_prune(capsys, tmp_path) -> None:
+    fps = populate(str(tmp_path), 3)
+    age(tmp_path, fps)
+    age_index(tmp_path)
+    r = Cli().run(["-p", str(tmp_path), "prune", "--max-files", "1"])
+    assert r == ExitCode.OK
+    assert f"2 records are pruned in {tmp_path}" in capsys.readouterr().out
+    assert list(DirectoryStorage(tmp_path).iter_fingerprints()) == fps[2:]
+    r = Cli().run(["-p", str(tmp_path), "prune", "--max-age", "1m"])
+    assert r == ExitCode.OK
+    assert list(DirectoryStorage(tmp_path).iter_fingerprints()) == []
+
+
+def test_prune_last_seen(tmp_path) -> None:
+    fps = populate(str(tmp_path), 3)
+    age(tmp_path, fps)
+    age_index(tmp_path)
+    # The oldest record is hit recently
+    storage = DirectoryStorage(tmp_path, flush_interval=3600)
+    data = storage.read(fps[0])
+    assert data
+    storage.write_info(from_json(data.decode()), data)
+    assert storage.prune(max_files=1) == 2
+    assert list(DirectoryStorage(tmp_path).iter_fingerprints()) == fps[:1]
+
+
+def test_prune_meta(tmp_path) -> None:
+    fps = populate(str(tmp_path), 2)
+    age(tmp_path, fps)
+    age_index(tmp_path)
+    storage = DirectoryStorage(tmp_path)
+    records = sum(size for _, size in storage.get_usage().values())
+    index = tmp_path / INDEX_NAME
+    size = index.stat().st_size
+    # Superseded lines are compacted
+    assert storage.prune(max_bytes=records + size // 2 + 200) == 0
+    assert len(index.read_bytes().splitlines()) == 2
+    # The index is accounted
+    size = index.stat().st_size
+    assert storage.prune(max_bytes=records + size - 1) == 1
+    assert list(DirectoryStorage(tmp_path).iter_fingerprints()) == fps[1:]
+
+
+def test_count(capsys, tmp_path) -> None:
+    mw = ErrorInfoMiddleware(tmp_path, compress="gz")
+    err = Err().setup(name="svc", format=None, middleware=[mw])
+    for _ in range(3):
+        try:
+            fail(1)
+        except RuntimeError:
+            err.process()
+    (fp,) = DirectoryStorage(tmp_path).iter_fingerprints()
+    # Counters are aggregated in memory
+    summary, _ = DirectoryStorage(tmp_path).get_summaries()[fp]
+    assert summary.count == 1
+    mw.storage.flush()
+    summary, _ = DirectoryStorage(tmp_path).get_summaries()[fp]
+    assert summary.count == 3
+    assert summary.ts
+    assert summary.last_seen
+    assert summary.last_seen > summary.ts
+    # Counters survive reindex
+    assert DirectoryStorage(tmp_path).reindex() == 1
+    summary, _ = DirectoryStorage(tmp_path).get_summaries()[fp]
+    assert summary.count == 3
+    # List
+    populate(str(tmp_path), 1)
+    r = Cli().run(["-p", str(tmp_path), "list", "--sort", "count", "-r"])
+    assert r == ExitCode.OK
+    lines = capsys.readouterr().out.splitlines()
+    assert "Count" in lines[0]
+    assert lines[2].startswith(fp)
+    assert lines[2].split()[5] == "3"
+    assert lines[3].split()[5] == "1"
+
+
+def test_flush_interval(tmp_path) -> None:
+    records = get_records(str(tmp_path / "src"), 1)
+    path = tmp_path / "dst"
+    path.mkdir()
+    (fp, data) = records[0]
+    info = from_json(data.decode())
+    storage = DirectoryStorage(path, flush_interval=0)
+    assert storage.write_info(info, data) is True
+    assert storage.write_info(info, data) is False
+    summary, _ = DirectoryStorage(path).get_summaries()[fp]
+    assert summary.count == 2
+
+
+def test_flush_timer(tmp_path) -> None:
+    records = get_records(str(tmp_path / "src"), 1)
+    path = tmp_path / "dst"
+    path.mkdir()
+    (fp, data) = records[0]
+    info = from_json(data.decode())
+    storage = DirectoryStorage(path, flush_interval=0.05)
+    assert storage.write_info(info, data) is True
+    assert storage.hit(info) is True
+    assert storage.hit(info) is True
+    # Flushed without the further hits
+    for _ in range(100):
+        summary, _ = DirectoryStorage(path).get_summaries()[fp]
+        if summary.count == 3:
+            break
+        time.sleep(0.01)
+    assert summary.count == 3
+
+
+def test_serialize_once(tmp_path, monkeypatch) -> None:
+    from gufo.err.middleware import errorinfo
+
+    calls = []
+    orig = errorinfo.to_json
+
+    def to_json(info) -> str:
+        calls.append(info.fingerprint)
+        return orig(info)
+
+    monkeypatch.setattr(errorinfo, "to_json", to_json)
+    fp = repeat(tmp_path, 3)
+    assert len(calls) == 1
+    # Stored occurrences are serialized
+    calls.clear()
+    repeat(tmp_path, 2, occurrences=2)
+    assert len(calls) == 2
+    assert len(DirectoryStorage(tmp_path).get_occurrence_paths(fp)) == 2
+
+
+def test_flush_on_exit(tmp_path) -> None:
+    import gc
+    import weakref
+
+    from gufo.err.middleware import errorinfo
+
+    mw = ErrorInfoMiddleware(tmp_path)
+    assert mw.storage in errorinfo._storages
+    ref = weakref.ref(mw.storage)
+    del mw
+    gc.collect()
+    # Storage is not pinned by the exit handler
+    assert ref() is None
+    fp = repeat(tmp_path, 3)
+    errorinfo._flush_storages()
+    summary, _ = DirectoryStorage(tmp_path).get_summaries()[fp]
+    assert summary.count == 3
+
+
+def repeat(path, n: int, **kwargs: float) -> str:
+    mw = ErrorInfoMiddleware(path, compress="gz", **kwargs)
+    err = Err().setup(name="svc", format=None, middleware=[mw])
+    for i in range(n):
+        try:
+            fail(i)
+        except RuntimeError:
+            err.process()
+    (fp,) = DirectoryStorage(path).iter_fingerprints()
+    return fp
+
+
+@pytest.mark.parametrize("rate", [0.0, 1.5])
+def test_invalid_occurrence_rate(tmp_path, rate) -> None:
+    with pytest.raises(ValueError):
+        ErrorInfoMiddleware(tmp_path, occurrences=2, occurrence_rate=rate)
+
+
+def test_occurrences(capsys, tmp_path) -> None:
+    fp = repeat(tmp_path, 4, occurrences=2)
+    storage = DirectoryStorage(tmp_path)
+    assert sorted(p.name for p in storage.get_occurrence_paths(fp)) == [
+        f"{fp}.0.json.gz",
+        f"{fp}.1.json.gz",
+    ]
+
+    def exc(n: int) -> str | None:
+        data = storage.read_occurrence(fp, n)
+        return str(from_json(data.decode()).exception) if data else None
+
+    assert exc(0) == "RuntimeError: oops 0"
+    assert exc(1) == "RuntimeError: oops 2"
+    assert exc(2) == "RuntimeError: oops 3"
+    assert exc(-1) == "RuntimeError: oops 3"
+    assert exc(-3) == "RuntimeError: oops 0"
+    assert exc(3) is None
+    assert exc(-4) is None
+    # View
+    r = Cli().run(["-p", str(tmp_path), "view", "-f", "terse", "-o", "-1", fp])
+    assert r == ExitCode.OK
+    assert "oops 3" in capsys.readouterr().out
+    r = Cli().run(["-p", str(tmp_path), "view", "-o", "5", fp])
+    assert r == ExitCode.CANNOT_READ
+    assert f"{fp} has no occurrence 5" in capsys.readouterr().out
+    # Migrate
+    assert storage.migrate(1) == 1
+    assert (tmp_path / fp[:2] / f"{fp}.1.json.gz").exists()
+    # Delete
+    assert DirectoryStorage(tmp_path).delete(fp) is True
+    assert list(tmp_path.rglob("*.json.gz")) == []
+
+
+def test_recompress(capsys, tmp_path) -> None:
+    fps = populate(str(tmp_path), 3)
+    age(tmp_path, fps)
+    age_index(tmp_path)
+    mtime = os.stat(tmp_path / f"{fps[0]}.json.gz").st_mtime_ns
+    r = Cli().run(["-p", str(tmp_path), "compact", "--older-than", "150m"])
+    assert r == ExitCode.OK
+    assert capsys.readouterr().out == "1 records are recompressed\n"
+    assert not (tmp_path / f"{fps[0]}.json.gz").exists()
+    path = tmp_path / f"{fps[0]}.json.xz"
+    assert os.stat(path).st_mtime_ns == mtime
+    assert (tmp_path / f"{fps[1]}.json.gz").exists()
+    # Index is updated
+    storage = DirectoryStorage(tmp_path)
+    assert storage.get_index()[fps[0]] == path.name
+    assert storage.get_summaries()[fps[0]][1] == path.name
+    info = from_json(storage.read(fps[0]).decode())
+    assert str(info.fingerprint) == fps[0]
+    # Records in the target format are skipped
+    r = Cli().run(["-p", str(tmp_path), "compact", "-j", "2"])
+    assert r == ExitCode.OK
+    assert capsys.readouterr().out == "2 records are recompressed\n"
+    assert DirectoryStorage(tmp_path).recompress(fps, Compressor("xz")) == 0
+    assert sorted(p.name for p in tmp_path.glob("*.json.*")) == sorted(
+        f"{fp}.json.xz" for fp in fps
+    )
+
+
+def test_recompress_occurrences(tmp_path) -> None:
+    fp = repeat(tmp_path, 4, occurrences=2)
+    storage = DirectoryStorage(tmp_path)
+    assert storage.recompress([fp], Compressor("bz2"), jobs=2) == 1
+    assert sorted(p.name for p in tmp_path.glob("*.json.*")) == [
+        f"{fp}.0.json.bz2",
+        f"{fp}.1.json.bz2",
+        f"{fp}.json.bz2",
+    ]
+
+    def exc(n: int) -> str:
+        data = storage.read_occurrence(fp, n)
+        assert data
+        return str(from_json(data.decode()).exception)
+
+    assert [exc(n) for n in range(3)] == [
+        "RuntimeError: oops 0",
+        "RuntimeError: oops 2",
+        "RuntimeError: oops 3",
+    ]
+    _, fn = DirectoryStorage(tmp_path).get_summaries()[fp]
+    assert fn == f"{fp}.json.bz2"
+
+
+def test_recompress_error(tmp_path) -> None:
+    fps = populate(str(tmp_path), 2)
+    (tmp_path / f"{fps[0]}.json.gz").write_bytes(b"broken")
+    storage = DirectoryStorage(tmp_path)
+    errors: list[str] = []
+    n = storage.recompress(
+        fps, Compressor("xz"), lambda fp, e: errors.append(fp)
+    )
+    assert n == 1
+    assert errors == [fps[0]]
+    with pytest.raises(ValueError):
+        storage.recompress(fps, Compressor("xz"))
+
+
+def test_archive(capsys, tmp_path) -> None:
+    fps = populate(str(tmp_path), 3)
+    age(tmp_path, fps)
+    age_index(tmp_path)
+    prefix = str(tmp_path)
+    r = Cli().run(
+        ["-p", prefix, "compact", "--archive", "--older-than", "90m"]
+    )
+    assert r == ExitCode.OK
+    assert capsys.readouterr().out == "2 records are archived\n"
+    assert sorted(DirectoryStorage(tmp_path).iter_fingerprints()) == fps[2:]
+    assert list(tmp_path.glob("segment-*.log"))
+    # Archived records are read transparently
+    r = Cli().run(["-p", prefix, "view", "-f", "terse", "all"])
+    assert r == ExitCode.OK
+    out = capsys.readouterr().out
+    for i in range(3):
+        assert f"oops {i}" in out
+    # Archived records are skipped
+    r = Cli().run(["-p", prefix, "compact", "--archive", "-j", "2"])
+    assert r == ExitCode.OK
+    assert capsys.readouterr().out == "1 records are archived\n"
+    assert list(DirectoryStorage(tmp_path).iter_fingerprints()) == []
+    r = Cli().run(["-p", prefix, "list"])
+    assert r == ExitCode.OK
+    out = capsys.readouterr().out
+    for fp in fps:
+        assert fp in out
+
+
+def test_write_after_compact(capsys, tmp_path) -> None:
+    records = get_records(str(tmp_path / "records"), 2)
+    path = tmp_path / "dst"
+    path.mkdir()
+    hit(path, records, 3)
+    fps = [fp for fp, _ in records]
+    prefix = str(path)
+    r = Cli().run(["-p", prefix, "compact", "-c", "xz", fps[0]])
+    assert r == ExitCode.OK
+    r = Cli().run(["-p", prefix, "compact", "--archive", fps[1]])
+    assert r == ExitCode.OK
+    capsys.readouterr()
+    summary, _ = DirectoryStorage(path).get_summaries()[fps[0]]
+    ts, place = summary.ts, summary.place
+    # Writer with the other format
+    hit(path, records, 2)
+    names = [
+        p.name for p in path.iterdir() if DirectoryStorage.rx_fn.match(p.name)
+    ]
+    assert names == [f"{fps[0]}.json.xz"]
+    summaries = DirectoryStorage(path).get_summaries()
+    assert list(summaries) == [fps[0]]
+    summary, fn = summaries[fps[0]]
+    assert fn == f"{fps[0]}.json.xz"
+    assert summary.count == 5
+    assert summary.ts == ts
+    assert summary.place == place
+    # Archived record is not written again
+    storage = DirectoryStorage(path)
+    assert storage.hit(from_json(records[1][1].decode())) is True
+    assert list(storage.iter_fingerprints()) == [fps[0]]
+
+
+def test_occurrence_rate(tmp_path) -> None:
+    fp = repeat(tmp_path, 4, occurrences=2, occurrence_rate=1e-9)
+    assert DirectoryStorage(tmp_path).get_occurrence_paths(fp) == []
+
+
+def test_truncated(tmp_path) -> None:
+    fps = populate(str(tmp_path), 2)
+    path = tmp_path / f"{fps[0]}.json.gz"
+    path.write_bytes(path.read_bytes()[:40])
+    os.unlink(tmp_path / INDEX_NAME)
+    storage = DirectoryStorage(tmp_path)
+    with pytest.raises(ValueError):
+        storage.read(fps[0])
+    errors: list[str] = []
+    summaries = list(
+        storage.iter_summary(fps, lambda fp, e: errors.append(fp))
+    )
+    assert [s.fingerprint for s in summaries] == fps[1:]
+    assert errors == fps[:1]
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_iter_info(tmp_path, jobs) -> None:
+    fps = populate(str(tmp_path), 5)
+    (tmp_path / f"{fps[1]}.json.gz").write_bytes(b"broken")
+    errors = []
+    r = list(
+        DirectoryStorage(tmp_path).iter_info(
+            fps, lambda fp, e: errors.append(fp), jobs=jobs
+        )
+    )
+    assert [fp for fp, _ in r] == [fp for fp in fps if fp != fps[1]]
+    assert [str(info.fingerprint) for _, info in r] == [fp for fp, _ in r]
+    assert errors == [fps[1]]
+
+
+def test_summary_filter(tmp_path) -> None:
+    fps = populate(str(tmp_path), 3)
+    storage = DirectoryStorage(tmp_path)
+    now = datetime.datetime.now()
+    hour = datetime.timedelta(hours=1)
+
+    def names(**kwargs: object) -> list[str]:
+        where = SummaryFilter(**kwargs)  # type: ignore[arg-type]
+        return sorted(s.name for s in storage.iter_summary(fps, where=where))
+
+    assert names() == ["svc-0", "svc-1", "svc-2"]
+    assert names(name="svc-1") == ["svc-1"]
+    assert names(name="svc-[02]") == ["svc-0", "svc-2"]
+    assert names(exception="Runtime*") == ["svc-0", "svc-1", "svc-2"]
+    assert names(exception="KeyError") == []
+    assert names(module=fail.__module__) == ["svc-0", "svc-1", "svc-2"]
+    assert names(module=fail.__module__[:-1]) == []
+    assert names(since=now - hour, until=now + hour) == [
+        "svc-0",
+        "svc-1",
+        "svc-2",
+    ]
+    assert names(since=now + hour) == []
+    assert names(until=now - hour) == []
+
+
+def test_summary_filter_not_indexed(tmp_path, monkeypatch) -> None:
+    fps = populate(str(tmp_path), 3)
+    os.unlink(tmp_path / INDEX_NAME)
+    storage = DirectoryStorage(tmp_path)
+    since = datetime.datetime.now() + datetime.timedelta(hours=1)
+    # Records, modified before `since`, must not be read
+    monkeypatch.setattr(storage, "read", None)
+    assert list(storage.iter_summary(fps, where=SummaryFilter(since))) == []
+
+
+def test_iter_new(tmp_path) -> None:
+    fps = populate(str(tmp_path), 2)
+    storage = DirectoryStorage(tmp_path)
+    known: set[str] = set()
+    assert sorted(storage.iter_new(known)) == fps
+    assert list(storage.iter_new(known)) == []
+    # Incomplete line is left for the next call,
+    # while the record is found by the directory listing
+    populate(str(tmp_path), 3)
+    index = tmp_path / INDEX_NAME
+    data = index.read_bytes()
+    index.write_bytes(data[:-2])
+    (fp,) = storage.iter_new(known)
+    assert fp not in fps
+    index.write_bytes(data)
+    updated: set[str] = set()
+    assert list(storage.iter_new(known, updated)) == []
+    assert updated == {fp}
+    assert storage.read(fp)
+    # Deleted records are forgotten
+    assert DirectoryStorage(tmp_path).delete(fp) is True
+    assert list(storage.iter_new(known)) == []
+    assert sorted(known) == fps
+    # Rewritten index is read from the start
+    DirectoryStorage(tmp_path).reindex()
+    known.clear()
+    assert sorted(storage.iter_new(known)) == fps
+
+
+def test_iter_new_unindexed(tmp_path) -> None:
+    (fp, data), (fp1, data1), (fp2, data2) = get_records(
+        str(tmp_path / "src"), 3
+    )
+    path = tmp_path / "dst"
+    path.mkdir()
+    storage = DirectoryStorage(path)
+    assert storage.write(fp, data) is True
+    known: set[str] = set()
+    assert list(storage.iter_new(known)) == [fp]
+    # Records, missed in the index, are found in the modified directories
+    (path / f"{fp1}.json").write_bytes(data1)
+    shard = path / fp2[:2]
+    shard.mkdir()
+    assert list(storage.iter_new(known)) == [fp1]
+    (shard / f"{fp2}.json").write_bytes(data2)
+    assert list(storage.iter_new(known)) == [fp2]
+    assert list(storage.iter_new(known)) == []
+
+
+def test_iter_new_updated(tmp_path) -> None:
+    ((fp, data),) = get_records(str(tmp_path / "src"), 1)
+    path = tmp_path / "dst"
+    path.mkdir()
+    info = from_json(data.decode())
+    writer = DirectoryStorage(path, flush_interval=0)
+    assert writer.write_info(info, data) is True
+    storage = DirectoryStorage(path)
+    known: set[str] = set()
+    updated: set[str] = set()
+    assert list(storage.iter_new(known, updated)) == [fp]
+    assert storage.get_summaries()[fp][0].count == 1
+    # Counters are applied to the loaded summaries
+    assert writer.write_info(info, data) is False
+    assert list(storage.iter_new(known, updated)) == []
+    assert updated == {fp}
+    assert storage.get_summaries()[fp][0].count == 2
+    # Entries, read by get_summaries(), are not applied twice
+    storage = DirectoryStorage(path)
+    assert storage.get_summaries()[fp][0].count == 2
+    assert list(storage.iter_new(set())) == [fp]
+    assert storage.get_summaries()[fp][0].count == 2
+
+
+@pytest.mark.parametrize(("policy", "host"), [("oldest", 0), ("newest", 1)])
+def test_merge_policy(tmp_path, policy, host) -> None:
+    records = get_records(str(tmp_path / "records"), 1)
+    srcs = [tmp_path / "a", tmp_path / "b"]
+    for i, src in enumerate(srcs):
+        src.mkdir()
+        hit(src, records, 1)
+        if i:
+            time.sleep(0.01)
+        # Mark the record
+        storage = DirectoryStorage(src)
+        ((summary, fn),) = storage.get_summaries().values()
+        summary.version = f"v{i}"
+        storage._append_index(storage._summary_to_dict(summary, fn))
+    dst = DirectoryStorage(tmp_path / "dst", compressor=Compressor("xz"))
+    (tmp_path / "dst").mkdir()
+    for i, src in enumerate(srcs):
+        stamp = DirectoryStorage.get_stamp(src)
+        n = dst.merge(f"h{i}", [DirectoryStorage(src)], stamp, policy=policy)
+        assert n == 1
+    ((summary, fn),) = DirectoryStorage(dst.path).get_summaries().values()
+    assert summary.version == f"v{host}"
+    assert summary.hosts == {"h0": 1, "h1": 1}
+    assert summary.count == 2
+    assert fn.endswith(".json.xz")
+    assert len(os.listdir(tmp_path / "dst")) == 3
+
+
+def test_merge_invalid_policy(tmp_path) -> None:
+    with pytest.raises(ValueError):
+        DirectoryStorage(tmp_path).merge("h", [], [], policy="random")
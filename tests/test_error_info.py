@@ -12,13 +12,20 @@ import pytest
 # Gufo Labs modules
 from gufo.err import Err
 from gufo.err.codec import from_json
-from gufo.err.compressor import Compressor
+from gufo.err.compressor import HAS_ZSTD, Compressor
+from gufo.err.middleware.errorinfo import ErrorInfoMiddleware
+from gufo.err.storage.directory import INDEX_NAME
 
 from .util import log_capture
 
 rx_log_path = re.compile(r"Writing error info into (\S+)")
 
 
+def ls(path):
+    """List error info files."""
+    return [p for p in path.listdir() if p.basename != INDEX_NAME]
+
+
 def test_unwritable_path():
     with pytest.raises(ValueError):
         Err().setup(error_info_path="/a/b/c/d")
@@ -31,7 +38,12 @@ def test_invalid_compress(tmpdir):
         )
 
 
-@pytest.mark.parametrize("compress", [None, "gz", "bz2", "xz"])
+zst = pytest.param(
+    "zst", marks=pytest.mark.skipif(not HAS_ZSTD, reason="zstd is missed")
+)
+
+
+@pytest.mark.parametrize("compress", [None, "gz", "bz2", "xz", zst])
 def test_compress(tmpdir, compress):
     err_info_path = tmpdir.mkdir("errinfo")
     # Setup
@@ -57,8 +69,8 @@ def test_compress(tmpdir, compress):
     else:
         assert ei_file.endswith(f".json.{compress}")
     # Check crashinfo is written
-    assert len(err_info_path.listdir()) == 1
-    ei_path = err_info_path.listdir()[0]
+    assert len(ls(err_info_path)) == 1
+    ei_path = ls(err_info_path)[0]
     # Compare to logged
     assert ei_path == ei_file
     # Check compressor suffix
@@ -93,3 +105,65 @@ def test_seen(tmpdir, compress):
             output = buffer.getvalue()
     # Check error info
     assert "is already registered" in output
+
+
+@pytest.mark.skipif(not HAS_ZSTD, reason="zstd is missed")
+def test_compress_level(tmpdir):
+    err_info_path = tmpdir.mkdir("errinfo")
+    mw = ErrorInfoMiddleware(
+        path=err_info_path, compress="zst", compress_level=19
+    )
+    err = Err().setup(format=None, middleware=[mw])
+    try:
+        msg = "oops"
+        raise RuntimeError(msg)
+    except RuntimeError:
+        err.process()
+    ei_path = ls(err_info_path)[0]
+    assert ei_path.basename.endswith(".json.zst")
+    with open(ei_path, "rb") as f:
+        ei = from_json(mw.compressor.decode(f.read()).decode())
+    assert ei_path.basename.startswith(str(ei.fingerprint))
+
+
+def test_compress_level_unsupported(tmpdir):
+    with pytest.raises(ValueError):
+        ErrorInfoMiddleware(
+            path=tmpdir.mkdir("errinfo"), compress=None, compress_level=1
+        )
+
+
+@pytest.mark.parametrize(("compress", "level"), [("gz", 1), ("xz", 0)])
+def test_setup_compress_level(tmpdir, compress, level):
+    err_info_path = tmpdir.mkdir("errinfo")
+    err = Err().setup(
+        format=None,
+        error_info_path=err_info_path,
+        error_info_compress=compress,
+        error_info_compress_level=level,
+    )
+    try:
+        msg = "oops"
+        raise RuntimeError(msg)
+    except RuntimeError:
+        err.process()
+    ei_path = ls(err_info_path)[0]
+    with open(ei_path, "rb") as f:
+        data = Compressor(format=compress).decode(f.read())
+    assert from_json(data.decode()).exception.args == ("oops",)
+
+
+def test_setup_invalid_compress_level(tmpdir):
+    with pytest.raises(ValueError):
+        Err().setup(
+            error_info_path=tmpdir.mkdir("errinfo"),
+            error_info_compress="gz",
+            error_info_compress_level=42,
+        )
+
+
+def test_invalid_storage(tmpdir):
+    with pytest.raises(ValueError):
+        Err().setup(
+            error_info_path=tmpdir.mkdir("errinfo"), error_info_storage="rar"
+        )
@@ -0,0 +1,167 @@
+# ---------------------------------------------------------------------
+# Gufo Err: test Grep
+# ---------------------------------------------------------------------
+# Copyright (C) 2022-26, Gufo Labs
+# ---------------------------------------------------------------------
+
+# Python modules
+import json
+import pickle
+
+# Third-party modules
+import pytest
+
+# Gufo Err modules
+from gufo.err import Err
+from gufo.err.cli import Cli, ExitCode
+from gufo.err.grep import Grep
+from gufo.err.storage.directory import DirectoryStorage
+
+RECORD = {
+    "$type": "errorinfo",
+    "$version": "1.1",
+    "name": "svc",
+    "version": "",
+    "fingerprint": "be8ccd86-3661-434c-8569-40dd65d9860a",
+    "exception": {"class": "KeyError", "args": ["Échec", 42]},
+    "stack": [
+        {
+            "name": "place_order",
+            "module": "shop.orders",
+            "locals": {"order_id": 123, "flag": True, "note": 'say "hi"'},
+            "source": {
+                "file_name": "/app/shop/orders.py",
+                "first_line": 1,
+                "current_line": 2,
+                "last_line": 2,
+            },
+        }
+    ],
+    "sources": {
+        "/app/shop/orders.py": [
+            {"first_line": 1, "lines": ["def place_order():", "    x[k]"]}
+        ]
+    },
+}
+DATA = json.dumps(RECORD).encode()
+
+
+@pytest.mark.parametrize(
+    ("pattern", "kwargs", "expected"),
+    [
+        ("KeyError", {}, ("exception", "KeyError")),
+        ("Échec", {}, ("exception", "Échec")),
+        ("échec", {"ignore_case": True}, ("exception", "Échec")),
+        ("42", {"scopes": ["exception"]}, ("exception", "42")),
+        ("shop.", {"fixed": True}, ("module", "shop.orders")),
+        (r"shop\.o", {}, ("module", "shop.orders")),
+        ("orders.py", {"scopes": ["file"]}, ("file", "/app/shop/orders.py")),
+        ("x[k]", {"fixed": True}, ("source", "    x[k]")),
+        ("order_id=123", {}, ("locals", "order_id=123")),
+        ("flag=true", {}, ("locals", "flag=true")),
+        ('"hi"', {}, ("locals", 'note=say "hi"')),
+        ("ORDER_ID=1", {"ignore_case": True}, ("locals", "order_id=123")),
+        ("order_id=124", {}, None),
+        ("KeyError", {"scopes": ["locals"]}, None),
+        (
+            "^def",
+            {"scopes": ["locals", "source"]},
+            ("source", "def place_order():"),
+        ),
+    ],
+)
+def test_match(pattern, kwargs, expected) -> None:
+    assert Grep(pattern, **kwargs)(DATA) == expected
+
+
+def test_prefilter() -> None:
+    # Rejected without decoding
+    assert Grep("order_id=123")(b"not a json") is None
+    with pytest.raises(ValueError):
+        Grep("order")(b"order [")
+    with pytest.raises(ValueError):
+        Grep("order.*")(b"not a json")
+
+
+def test_format_1_0() -> None:
+    record = dict(RECORD)
+    del record["sources"]
+    record["stack"] = [
+        {**RECORD["stack"][0], "source": {"lines": ["return x[k]"]}}
+    ]
+    data = json.dumps(record).encode()
+    assert Grep("return", scopes=["source"])(data) == ("source", "return x[k]")
+
+
+@pytest.mark.parametrize(
+    ("pattern", "kwargs"), [("x", {"scopes": ["stack"]}), ("(", {})]
+)
+def test_invalid(pattern, kwargs) -> None:
+    with pytest.raises(ValueError):
+        Grep(pattern, **kwargs)
+
+
+def test_pickle() -> None:
+    grep = pickle.loads(  # noqa: S301
+        pickle.dumps(Grep("shop.+", ignore_case=True))
+    )
+    assert grep(DATA) == ("module", "shop.orders")
+
+
+def place_order(order_id: int) -> None:
+    msg = f"Cannot place order {order_id}"
+    raise RuntimeError(msg)
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_cli(capsys, tmp_path, jobs) -> None:
+    for i in range(3):
+        err = Err().setup(
+            name=f"svc-{i}", format=None, error_info_path=str(tmp_path)
+        )
+        try:
+            place_order(i + 120)
+        except RuntimeError:
+            err.process()
+    fps = {
+        s.name: s.fingerprint
+        for s in DirectoryStorage(tmp_path).iter_summary(
+            DirectoryStorage(tmp_path).iter_fingerprints()
+        )
+    }
+    prefix = str(tmp_path)
+    r = Cli().run(
+        [
+            "-p",
+            prefix,
+            "grep",
+            "-j",
+            str(jobs),
+            "--in",
+            "locals",
+            "order_id=121",
+        ]
+    )
+    assert r == ExitCode.OK
+    assert capsys.readouterr().out == f"{fps['svc-1']} locals: order_id=121\n"
+    r = Cli().run(
+        ["-p", prefix, "grep", "-j", str(jobs), "-l", "ORDER 12[02]"]
+    )
+    assert r == ExitCode.OK
+    assert capsys.readouterr().out == ""
+    r = Cli().run(
+        ["-p", prefix, "grep", "-j", str(jobs), "-l", "-i", "ORDER 12[02]"]
+    )
+    assert r == ExitCode.OK
+    assert capsys.readouterr().out.split() == sorted(
+        [fps["svc-0"], fps["svc-2"]]
+    )
+    # Unreadable record, decoded for the regular expression
+    (tmp_path / f"{fps['svc-0']}.json").write_bytes(b"garbage")
+    r = Cli().run(["-p", prefix, "grep", "-j", str(jobs), "place_orde."])
+    assert r == ExitCode.CANNOT_READ
+    out = capsys.readouterr().out
+    assert f"{fps['svc-1']} source: " in out
+    assert f"{fps['svc-0']} source: " not in out
+    r = Cli().run(["-p", prefix, "grep", "("])
+    assert r == ExitCode.INVALID_ARGS
@@ -0,0 +1,286 @@
+# ---------------------------------------------------------------------
+# Gufo Err: test SegmentStorage
+# ---------------------------------------------------------------------
+# Copyright (C) 2022-26, Gufo Labs
+# ---------------------------------------------------------------------
+
+# Python modules
+import os
+import uuid
+
+# Third-party modules
+import pytest
+
+# Gufo Err modules
+from gufo.err import BaseMiddleware, Err
+from gufo.err.cli import Cli, ExitCode
+from gufo.err.codec import to_json
+from gufo.err.compressor import Compressor
+from gufo.err.storage.segment import HEADER, SegmentStorage
+from gufo.err.types import ErrorInfo
+
+
+def get_fp(n: int) -> str:
+    return str(uuid.UUID(int=n + 1))
+
+
+def get_data(n: int) -> bytes:
+    return b'{"n": %d, "data": "%s"}' % (n, b"x" * n)
+
+
+def get_info(i: int) -> ErrorInfo:
+    mw = Capture()
+    err = Err().setup(name=f"svc-{i}", format=None, middleware=[mw])
+    try:
+        msg = f"oops {i}"
+        raise RuntimeError(msg)
+    except RuntimeError:
+        err.process()
+    assert mw.info
+    return mw.info
+
+
+class Capture(BaseMiddleware):
+    def __init__(self) -> None:
+        super().__init__()
+        self.info: ErrorInfo | None = None
+
+    def process(self, info: ErrorInfo) -> None:
+        self.info = info
+
+
+def populate(storage: SegmentStorage, n: int) -> None:
+    for i in range(n):
+        assert storage.write(get_fp(i), get_data(i)) is True
+
+
+def test_invalid_segment_size(tmp_path) -> None:
+    with pytest.raises(ValueError):
+        SegmentStorage(tmp_path, segment_size=0)
+
+
+def test_invalid_fsync(tmp_path) -> None:
+    with pytest.raises(ValueError):
+        SegmentStorage(tmp_path, fsync="always")
+
+
+@pytest.mark.parametrize(
+    ("fsync", "expected"), [("never", 0), ("file", 2), ("directory", 3)]
+)
+def test_fsync(tmp_path, monkeypatch, fsync, expected) -> None:
+    calls = []
+    monkeypatch.setattr(os, "fsync", calls.append)
+    populate(SegmentStorage(tmp_path, fsync=fsync), 2)
+    assert len(calls) == expected
+
+
+def test_exists(tmp_path) -> None:
+    assert SegmentStorage.exists(tmp_path) is False
+    populate(SegmentStorage(tmp_path), 1)
+    assert SegmentStorage.exists(tmp_path) is True
+
+
+@pytest.mark.parametrize("compress", [None, "gz", "bz2", "xz"])
+def test_write_read(tmp_path, compress) -> None:
+    storage = SegmentStorage(tmp_path, Compressor(format=compress))
+    populate(storage, 10)
+    assert storage.write(get_fp(1), get_data(1)) is False
+    # Read by fresh instance
+    storage = SegmentStorage(tmp_path)
+    assert sorted(storage.iter_fingerprints()) == sorted(
+        get_fp(i) for i in range(10)
+    )
+    for i in range(10):
+        assert storage.read(get_fp(i)) == get_data(i)
+    assert storage.read(get_fp(100)) is None
+
+
+def test_iter_read(tmp_path) -> None:
+    storage = SegmentStorage(tmp_path, segment_size=256)
+    populate(storage, 20)
+    fps = [get_fp(i) for i in range(20)]
+    r = dict(storage.iter_read([*reversed(fps), get_fp(100)]))
+    assert r == {get_fp(i): get_data(i) for i in range(20)}
+
+
+@pytest.mark.parametrize("jobs", [1, 4])
+def test_write_many(tmp_path, jobs) -> None:
+    storage = SegmentStorage(tmp_path, Compressor(format="xz"), 256)
+    populate(storage, 5)
+    records = [(get_fp(i), get_data(i)) for i in range(100)]
+    assert storage.write_many(records, jobs) == 95
+    assert storage.write_many(records, jobs) == 0
+    # Read by fresh instance
+    storage = SegmentStorage(tmp_path)
+    assert dict(storage.iter_read(fp for fp, _ in records)) == dict(records)
+
+
+def test_iter_info(tmp_path) -> None:
+    storage = SegmentStorage(tmp_path)
+    fps = []
+    for i in range(3):
+        info = get_info(i)
+        fps.append(str(info.fingerprint))
+        storage.write(fps[-1], to_json(info).encode())
+    fps.reverse()
+    r = list(SegmentStorage(tmp_path).iter_info([*fps, get_fp(100)], jobs=2))
+    assert [fp for fp, _ in r] == fps
+    assert [str(info.fingerprint) for _, info in r] == fps
+
+
+def test_rotate(tmp_path) -> None:
+    storage = SegmentStorage(tmp_path, segment_size=256)
+    populate(storage, 20)
+    logs = [fn for fn in os.listdir(tmp_path) if fn.endswith(".log")]
+    assert len(logs) > 1
+    assert "segment-00000000.idx" in os.listdir(tmp_path)
+
+
+def test_delete(tmp_path) -> None:
+    storage = SegmentStorage(tmp_path, segment_size=256)
+    populate(storage, 20)
+    assert storage.delete(get_fp(100)) is False
+    assert storage.delete(get_fp(5)) is True
+    assert storage.delete(get_fp(5)) is False
+    storage = SegmentStorage(tmp_path)
+    assert storage.read(get_fp(5)) is None
+    assert len(list(storage.iter_fingerprints())) == 19
+    # Deleted record may be written again
+    assert storage.write(get_fp(5), get_data(5)) is True
+    assert storage.read(get_fp(5)) == get_data(5)
+
+
+def test_delete_many(tmp_path, monkeypatch) -> None:
+    storage = SegmentStorage(tmp_path, segment_size=256)
+    populate(storage, 20)
+    reclaims = []
+    reclaim = storage._reclaim
+
+    def counted() -> None:
+        reclaims.append(1)
+        reclaim()
+
+    monkeypatch.setattr(storage, "_reclaim", counted)
+    fps = [get_fp(i) for i in range(10)]
+    assert storage.delete_many([*fps, get_fp(100)]) == 10
+    # Tombstones are reclaimed once
+    assert len(reclaims) == 1
+    assert storage.delete_many(fps) == 0
+    logs = [fn for fn in os.listdir(tmp_path) if fn.endswith(".log")]
+    assert "segment-00000000.log" not in logs
+    storage = SegmentStorage(tmp_path)
+    assert sorted(storage.iter_fingerprints()) == sorted(
+        get_fp(i) for i in range(10, 20)
+    )
+
+
+def test_reclaim(tmp_path) -> None:
+    storage = SegmentStorage(tmp_path, segment_size=256)
+    populate(storage, 20)
+    n_logs = len([fn for fn in os.listdir(tmp_path) if fn.endswith(".log")])
+    for i in range(10):
+        storage.delete(get_fp(i))
+    logs = [fn for fn in os.listdir(tmp_path) if fn.endswith(".log")]
+    assert "segment-00000000.log" not in logs
+    assert len(logs) < n_logs
+    storage = SegmentStorage(tmp_path)
+    assert sorted(storage.iter_fingerprints()) == sorted(
+        get_fp(i) for i in range(10, 20)
+    )
+
+
+def test_missed_index(tmp_path) -> None:
+    storage = SegmentStorage(tmp_path)
+    populate(storage, 5)
+    storage.delete(get_fp(1))
+    os.unlink(storage.get_index_path(0))
+    storage = SegmentStorage(tmp_path)
+    assert sorted(storage.iter_fingerprints()) == sorted(
+        get_fp(i) for i in (0, 2, 3, 4)
+    )
+    assert storage.read(get_fp(4)) == get_data(4)
+
+
+def test_truncated_log(tmp_path) -> None:
+    storage = SegmentStorage(tmp_path)
+    populate(storage, 3)
+    os.unlink(storage.get_index_path(0))
+    path = storage.get_log_path(0)
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 1)
+    storage = SegmentStorage(tmp_path)
+    assert sorted(storage.iter_fingerprints()) == sorted(
+        get_fp(i) for i in range(2)
+    )
+
+
+def test_corrupted(tmp_path) -> None:
+    storage = SegmentStorage(tmp_path)
+    populate(storage, 3)
+    with open(storage.get_log_path(0), "r+b") as f:
+        f.seek(HEADER.size)
+        f.write(b"!")
+    storage = SegmentStorage(tmp_path)
+    with pytest.raises(ValueError):
+        storage.read(get_fp(0))
+    errors = []
+    r = dict(
+        storage.iter_read(
+            [get_fp(i) for i in range(3)],
+            lambda fp, e: errors.append(fp),
+        )
+    )
+    assert errors == [get_fp(0)]
+    assert r == {get_fp(i): get_data(i) for i in (1, 2)}
+
+
+def test_cli(capsys, tmp_path) -> None:
+    for i in range(3):
+        err = Err().setup(
+            name=f"svc-{i}",
+            format=None,
+            error_info_path=str(tmp_path),
+            error_info_compress="gz",
+            error_info_storage="segment",
+        )
+        try:
+            msg = f"oops {i}"
+            raise RuntimeError(msg)
+        except RuntimeError:
+            err.process()
+    assert os.listdir(tmp_path)
+    assert all(fn.startswith("segment-") for fn in os.listdir(tmp_path))
+    fps = list(SegmentStorage(tmp_path).iter_fingerprints())
+    assert len(fps) == 3
+    # List
+    r = Cli().run(["-p", str(tmp_path), "list"])
+    assert r == ExitCode.OK
+    out = capsys.readouterr().out
+    for i in range(3):
+        assert f"svc-{i}" in out
+    # View
+    r = Cli().run(["-p", str(tmp_path), "view", "-f", "terse", fps[0]])
+    assert r == ExitCode.OK
+    assert "RuntimeError: oops" in capsys.readouterr().out
+    # Clear
+    r = Cli().run(["-p", str(tmp_path), "clear", fps[0]])
+    assert r == ExitCode.OK
+    assert sorted(SegmentStorage(tmp_path).iter_fingerprints()) == sorted(
+        fps[1:]
+    )
+    r = Cli().run(["-p", str(tmp_path), "view", fps[0]])
+    assert r == ExitCode.CANNOT_READ
+
+
+def test_reindex(tmp_path) -> None:
+    storage = SegmentStorage(tmp_path, segment_size=256)
+    populate(storage, 10)
+    storage.delete(get_fp(9))
+    for fn in os.listdir(tmp_path):
+        if fn.endswith(".idx"):
+            os.unlink(tmp_path / fn)
+    assert SegmentStorage(tmp_path).reindex() == 9
+    assert any(fn.endswith(".idx") for fn in os.listdir(tmp_path))
+    assert sorted(SegmentStorage(tmp_path).iter_fingerprints()) == sorted(
+        get_fp(i) for i in range(9)
+    )
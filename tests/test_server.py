@@ -0,0 +1,222 @@
+# ---------------------------------------------------------------------
+# Gufo Err: test HTTP viewer
+# ---------------------------------------------------------------------
+# Copyright (C) 2022-26, Gufo Labs
+# ---------------------------------------------------------------------
+
+# Python modules
+import json
+import threading
+from collections.abc import Iterator
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+# Third-party modules
+import pytest
+
+# Gufo Err modules
+from gufo.err import Err
+from gufo.err.cli import Cli, ExitCode
+from gufo.err.server import ErrorIndex, ErrorServer
+from gufo.err.storage.directory import DirectoryStorage
+from gufo.err.storage.segment import SegmentStorage
+
+
+def fail(i: int) -> None:
+    msg = f"oops {i}"
+    raise RuntimeError(msg)
+
+
+def populate(path: str, start: int, n: int) -> None:
+    for i in range(start, start + n):
+        err = Err().setup(
+            name=f"svc-{i}",
+            format=None,
+            error_info_path=path,
+            error_info_compress="gz",
+        )
+        try:
+            fail(i)
+        except RuntimeError:
+            err.process()
+
+
+@pytest.fixture
+def index(tmp_path) -> ErrorIndex:
+    populate(str(tmp_path), 0, 2)
+    return ErrorIndex(Cli.get_storages(str(tmp_path)), interval=0)
+
+
+@pytest.fixture
+def url(index) -> Iterator[str]:
+    server = ErrorServer(("127.0.0.1", 0), index)
+    thread = threading.Thread(
+        target=server.serve_forever,
+        kwargs={"poll_interval": 0.01},
+        daemon=True,
+    )
+    thread.start()
+    host, port = server.server_address[:2]
+    yield f"http://{host!s}:{port}"
+    server.shutdown()
+    server.server_close()
+
+
+def get(url: str) -> tuple[str, str]:
+    with urlopen(url) as resp:  # noqa: S310
+        return resp.headers["Content-Type"], resp.read().decode()
+
+
+def test_invalid_index(tmp_path) -> None:
+    with pytest.raises(ValueError):
+        ErrorIndex([], cache_size=0)
+    with pytest.raises(ValueError):
+        ErrorIndex([], interval=-1)
+
+
+def test_refresh(tmp_path, index) -> None:
+    assert index.refresh() == 2
+    assert sorted(s.name for s in index.get_summaries()) == ["svc-0", "svc-1"]
+    populate(str(tmp_path), 2, 1)
+    assert index.refresh() == 1
+    assert len(index.get_summaries()) == 3
+    # Deleted records are dropped
+    fp = next(
+        s.fingerprint for s in index.get_summaries() if s.name == "svc-0"
+    )
+    assert DirectoryStorage(tmp_path).delete(fp) is True
+    assert index.refresh() == 0
+    assert sorted(s.name for s in index.get_summaries()) == ["svc-1", "svc-2"]
+    assert index.get_info(fp) is None
+
+
+def test_refresh_archived(capsys, tmp_path) -> None:
+    populate(str(tmp_path), 0, 2)
+    r = Cli().run(["-p", str(tmp_path), "compact", "--archive"])
+    assert r == ExitCode.OK
+    capsys.readouterr()
+    index = ErrorIndex(Cli.get_storages(str(tmp_path)), interval=0)
+    assert index.refresh() == 2
+    # Records, deleted from the segment log, are dropped
+    fp = next(
+        s.fingerprint for s in index.get_summaries() if s.name == "svc-0"
+    )
+    assert SegmentStorage(tmp_path).delete(fp) is True
+    assert index.refresh() == 0
+    assert [s.name for s in index.get_summaries()] == ["svc-1"]
+    assert index.get_info(fp) is None
+
+
+def test_refresh_interval(tmp_path) -> None:
+    populate(str(tmp_path), 0, 1)
+    index = ErrorIndex(Cli.get_storages(str(tmp_path)), interval=3600)
+    assert index.refresh() == 1
+    populate(str(tmp_path), 1, 1)
+    assert index.refresh() == 0
+    assert index.refresh(force=True) == 1
+
+
+def test_cache(index, monkeypatch) -> None:
+    index.cache_size = 1
+    fps = [s.fingerprint for s in index.get_summaries()]
+    (storage,) = index.storages
+    info = index.get_info(fps[0])
+    assert info is not None
+    assert str(info.fingerprint) == fps[0]
+    # Cached records are not read again
+    monkeypatch.setattr(storage, "read", None)
+    assert index.get_info(fps[0]) is info
+    monkeypatch.undo()
+    # The least recently used record is evicted
+    assert index.get_info(fps[1]) is not None
+    assert index.get_info(fps[0]) is not info
+
+
+def test_decode_unlocked(index, monkeypatch) -> None:
+    fp = index.get_summaries()[0].fingerprint
+    (storage,) = index.storages
+    iter_info = storage.iter_info
+    locked = []
+
+    def checked(fps, on_error):
+        locked.append(index._lock.locked())
+        return iter_info(fps, on_error)
+
+    monkeypatch.setattr(storage, "iter_info", checked)
+    assert index.get_info(fp) is not None
+    # Records are decoded outside the lock
+    assert locked == [False]
+
+
+def test_list(url) -> None:
+    ctype, body = get(url)
+    assert ctype == "text/html; charset=utf-8"
+    assert "svc-0" in body
+    assert "RuntimeError: oops 1" in body
+    ctype, body = get(f"{url}/list?format=json&sort=name&reverse")
+    assert ctype == "application/json; charset=utf-8"
+    items = json.loads(body)
+    assert [item["name"] for item in items] == ["svc-1", "svc-0"]
+    assert items[0]["count"] == 1
+    _, body = get(f"{url}/list?format=json&name=svc-0&limit=5")
+    assert [item["name"] for item in json.loads(body)] == ["svc-0"]
+
+
+def test_view(url) -> None:
+    _, body = get(f"{url}/list?format=json&name=svc-1")
+    (item,) = json.loads(body)
+    ctype, body = get(f"{url}/view/{item['fingerprint']}")
+    assert ctype == "text/plain; charset=utf-8"
+    assert "RuntimeError: oops 1" in body
+    _, terse = get(f"{url}/view/{item['fingerprint']}?format=terse")
+    assert "RuntimeError: oops 1" in terse
+    assert terse != body
+
+
+def test_stats(url) -> None:
+    ctype, body = get(f"{url}/stats?limit=1")
+    assert ctype == "application/json; charset=utf-8"
+    stats = json.loads(body)
+    assert stats["records"] == 2
+    assert stats["exception"] == [
+        {"key": "RuntimeError", "records": 2, "occurrences": 2}
+    ]
+    assert len(stats["service"]) == 1
+
+
+@pytest.mark.parametrize(
+    ("path", "code"),
+    [
+        ("/unknown", 404),
+        ("/view", 404),
+        ("/view/e5d2e3e0-d6b9-415f-ba09-5eadbe4b38ad", 404),
+        ("/view/x?format=unknown", 400),
+        ("/list?format=xml", 400),
+        ("/list?sort=unknown", 400),
+        ("/list?limit=-1", 400),
+        ("/stats?limit=x", 400),
+        ("/stats?since=x", 400),
+    ],
+)
+def test_invalid(url, path, code) -> None:
+    with pytest.raises(HTTPError) as e:
+        get(f"{url}{path}")
+    assert e.value.code == code
+
+
+def test_serve(capsys, tmp_path, monkeypatch) -> None:
+    populate(str(tmp_path), 0, 1)
+
+    def serve_forever(self) -> None:
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(ErrorServer, "serve_forever", serve_forever)
+    r = Cli().run(["-p", str(tmp_path), "serve", "--port", "0"])
+    assert r == ExitCode.OK
+    assert capsys.readouterr().out.startswith("Serving on http://127.0.0.1:")
+
+
+@pytest.mark.parametrize("args", [["--cache-size", "0"], ["-i", "-1"]])
+def test_serve_invalid(tmp_path, args) -> None:
+    r = Cli().run(["-p", str(tmp_path), "serve", *args])
+    assert r == ExitCode.INVALID_ARGS
@@ -0,0 +1,317 @@
+# ---------------------------------------------------------------------
+# Gufo Err: test SqliteStorage
+# ---------------------------------------------------------------------
+# Copyright (C) 2022-26, Gufo Labs
+# ---------------------------------------------------------------------
+
+# Python modules
+import datetime
+import sqlite3
+
+# Third-party modules
+import pytest
+
+# Gufo Err modules
+from gufo.err import BaseMiddleware, Err
+from gufo.err.abc.storage import SummaryFilter
+from gufo.err.cli import Cli, ExitCode
+from gufo.err.codec import to_json
+from gufo.err.compressor import Compressor
+from gufo.err.middleware.sqlite import SqliteErrorInfoMiddleware
+from gufo.err.storage.sqlite import SqliteStorage
+from gufo.err.types import ErrorInfo
+
+from .util import log_capture
+
+
+def fail(i: int) -> None:
+    msg = f"oops {i}"
+    raise RuntimeError(msg)
+
+
+class Capture(BaseMiddleware):
+    def __init__(self) -> None:
+        super().__init__()
+        self.info: ErrorInfo | None = None
+
+    def process(self, info: ErrorInfo) -> None:
+        self.info = info
+
+
+def get_info(i: int) -> ErrorInfo:
+    mw = Capture()
+    err = Err().setup(
+        name=f"svc-{i}", version="1.0", format=None, middleware=[mw]
+    )
+    try:
+        fail(i)
+    except RuntimeError:
+        err.process()
+    assert mw.info
+    return mw.info
+
+
+def populate(path: str, n: int, compress: str | None = "gz") -> list[str]:
+    mw = SqliteErrorInfoMiddleware(path, compress=compress)
+    for i in range(n):
+        err = Err().setup(name=f"svc-{i}", format=None, middleware=[mw])
+        try:
+            fail(i)
+        except RuntimeError:
+            err.process()
+    return sorted(mw.storage.iter_fingerprints())
+
+
+def test_not_writable() -> None:
+    with pytest.raises(ValueError):
+        SqliteErrorInfoMiddleware("/a/b/c/err.db")
+
+
+def test_invalid_db(tmp_path) -> None:
+    path = tmp_path / "err.db"
+    path.write_bytes(b"x" * 1024)
+    with pytest.raises(ValueError):
+        SqliteStorage(path)
+
+
+def test_wal(tmp_path) -> None:
+    path = tmp_path / "err.db"
+    SqliteStorage(path).close()
+    with sqlite3.connect(path) as conn:
+        mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    assert mode == "wal"
+
+
+@pytest.mark.parametrize("compress", [None, "gz", "xz"])
+def test_write_read(tmp_path, compress) -> None:
+    storage = SqliteStorage(tmp_path / "err.db", Compressor(format=compress))
+    info = get_info(1)
+    fp = str(info.fingerprint)
+    data = to_json(info).encode()
+    assert storage.write(fp, data) is True
+    assert storage.write_info(info, data) is False
+    assert list(storage.iter_fingerprints()) == [fp]
+    assert storage.find([fp, "e5d2e3e0-d6b9-415f-ba09-5eadbe4b38ad"]) == {fp}
+    assert storage.read(fp) == data
+    assert dict(storage.iter_read([fp])) == {fp: data}
+    assert storage.read("e5d2e3e0-d6b9-415f-ba09-5eadbe4b38ad") is None
+
+
+def test_summary(tmp_path) -> None:
+    storage = SqliteStorage(tmp_path / "err.db")
+    info = get_info(1)
+    fp = str(info.fingerprint)
+    data = to_json(info).encode()
+    for _ in range(3):
+        storage.write_info(info, data)
+    (s,) = storage.iter_summary([fp])
+    assert s.fingerprint == fp
+    assert s.name == "svc-1"
+    assert s.version == "1.0"
+    assert s.exception == "RuntimeError: oops 1"
+    assert s.exception_class == "RuntimeError"
+    assert s.ts is not None
+    assert "test_sqlite.py:" in s.place
+    assert s.count == 3
+    assert s.last_seen
+    assert s.last_seen > s.ts
+
+
+@pytest.mark.parametrize(
+    ("where", "expected"),
+    [
+        (SummaryFilter(), [0, 1, 2]),
+        (SummaryFilter(name="svc-[12]"), [1, 2]),
+        (SummaryFilter(exception="*Error"), [0, 1, 2]),
+        (SummaryFilter(exception="KeyError"), []),
+        (SummaryFilter(module=__name__), [0, 1, 2]),
+        (SummaryFilter(module=__name__[:-1]), []),
+        (SummaryFilter(since=datetime.datetime(2000, 1, 1)), [0, 1, 2]),
+        (SummaryFilter(since=datetime.datetime(2100, 1, 1)), []),
+        (SummaryFilter(until=datetime.datetime(2000, 1, 1)), []),
+    ],
+)
+def test_summary_filter(tmp_path, where, expected) -> None:
+    fps = populate(str(tmp_path / "err.db"), 3)
+    storage = SqliteStorage(tmp_path / "err.db")
+    r = sorted(s.name for s in storage.iter_summary(fps, where=where))
+    assert r == [f"svc-{i}" for i in expected]
+    r = sorted(s.name for s in storage.select_summary(where))
+    assert r == [f"svc-{i}" for i in expected]
+    assert all(s.module == __name__ for s in storage.iter_summary(fps))
+
+
+@pytest.mark.parametrize(
+    ("order", "reverse", "limit", "expected"),
+    [
+        (None, False, None, [0, 1, 2, 3]),
+        ("count", False, None, [0, 1, 2, 3]),
+        ("count", True, 2, [3, 2]),
+        ("last_seen", True, 1, [3]),
+        ("name", False, 3, [0, 1, 2]),
+    ],
+)
+def test_select_summary(tmp_path, order, reverse, limit, expected) -> None:
+    storage = SqliteStorage(tmp_path / "err.db")
+    for i in range(4):
+        info = get_info(i)
+        data = to_json(info).encode()
+        for _ in range(i + 1):
+            storage.write_info(info, data)
+    r = [
+        s.name
+        for s in storage.select_summary(
+            order=order, reverse=reverse, limit=limit
+        )
+    ]
+    if order is None:
+        r.sort()
+    assert r == [f"svc-{i}" for i in expected]
+
+
+def test_select_summary_index(tmp_path) -> None:
+    storage = SqliteStorage(tmp_path / "err.db")
+    with pytest.raises(ValueError):
+        storage.select_summary(order="data")
+    plan = storage._conn.execute(
+        "EXPLAIN QUERY PLAN SELECT fingerprint FROM errors "
+        "ORDER BY last_seen DESC LIMIT 10"
+    ).fetchall()
+    assert "ix_errors_last_seen" in str(plan)
+
+
+def test_locked(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr("gufo.err.storage.sqlite.BUSY_TIMEOUT", 0.05)
+    db = tmp_path / "err.db"
+    mw = SqliteErrorInfoMiddleware(db)
+    err = Err().setup(name="svc", format=None, middleware=[mw])
+    conn = sqlite3.connect(db, isolation_level=None)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        with log_capture() as buffer:
+            try:
+                fail(1)
+            except RuntimeError:
+                err.process()
+        assert "Cannot write error" in buffer.getvalue()
+        assert "middleware failed" not in buffer.getvalue()
+    finally:
+        conn.execute("ROLLBACK")
+        conn.close()
+    # Written after the lock is released
+    try:
+        fail(1)
+    except RuntimeError:
+        err.process()
+    assert len(list(mw.storage.iter_fingerprints())) == 1
+
+
+def test_delete(tmp_path) -> None:
+    fps = populate(str(tmp_path / "err.db"), 3)
+    storage = SqliteStorage(tmp_path / "err.db")
+    assert storage.delete(fps[0]) is True
+    assert storage.delete(fps[0]) is False
+    assert sorted(storage.iter_fingerprints()) == fps[1:]
+
+
+def test_cli(capsys, tmp_path) -> None:
+    db = str(tmp_path / "err.db")
+    fps = populate(db, 3)
+    assert len(fps) == 3
+    # List
+    r = Cli().run(["--db", db, "list"])
+    assert r == ExitCode.OK
+    out = capsys.readouterr().out
+    for i in range(3):
+        assert f"svc-{i}" in out
+    assert "RuntimeError: oops 1" in out
+    # View
+    r = Cli().run(["--db", db, "view", "-f", "terse", fps[0]])
+    assert r == ExitCode.OK
+    assert fps[0] in capsys.readouterr().out
+    # Clear
+    r = Cli().run(["--db", db, "clear", fps[0]])
+    assert r == ExitCode.OK
+    r = Cli().run(["--db", db, "view", fps[0]])
+    assert r == ExitCode.CANNOT_READ
+    r = Cli().run(["--db", db, "list", *fps])
+    assert r == ExitCode.CANNOT_READ
+
+
+def test_cli_not_exists(capsys, tmp_path) -> None:
+    db = str(tmp_path / "err.db")
+    r = Cli().run(["--db", db, "list"])
+    assert r == ExitCode.NOT_EXISTS
+    assert capsys.readouterr().out == f"Error: {db} is not exists\n"
+
+
+def test_reindex(tmp_path) -> None:
+    db = str(tmp_path / "err.db")
+    populate(db, 3)
+    assert SqliteStorage(db).reindex() == 3
+
+
+def test_read_only(tmp_path) -> None:
+    db = str(tmp_path / "err.db")
+    fps = populate(db, 3)
+    storage = SqliteStorage(db, read_only=True)
+    assert storage.get_worker_args()["read_only"] is True
+    with pytest.raises(sqlite3.OperationalError):
+        storage.delete(fps[0])
+    # Workers open the database read-only
+    r = list(SqliteStorage(db).iter_info(fps, jobs=2))
+    assert [fp for fp, _ in r] == fps
+    with pytest.raises(ValueError):
+        SqliteStorage(tmp_path / "missed.db", read_only=True)
+
+
+def test_hit(tmp_path) -> None:
+    db = str(tmp_path / "err.db")
+    storage = SqliteStorage(db)
+    info = get_info(1)
+    assert storage.hit(info) is False
+    assert storage.write_info(info, b"{}") is True
+    assert storage.hit(info) is True
+    (s,) = storage.iter_summary([str(info.fingerprint)])
+    assert s.count == 2
+
+
+def test_iter_new(tmp_path) -> None:
+    db = str(tmp_path / "err.db")
+    fps = populate(db, 2)
+    storage = SqliteStorage(db)
+    known: set[str] = set()
+    updated: set[str] = set()
+    assert sorted(storage.iter_new(known, updated)) == fps
+    assert updated == set()
+    assert list(storage.iter_new(known, updated)) == []
+    # New and repeated errors only are selected
+    queries: list[str] = []
+    storage._conn.set_trace_callback(queries.append)
+    (fp,) = set(populate(db, 3)) - set(fps)
+    updated.clear()
+    assert list(storage.iter_new(known, updated)) == [fp]
+    assert updated == set(fps)
+    assert any("WHERE rowid >" in q for q in queries)
+
+
+def test_watch_repeated(capsys, tmp_path, monkeypatch) -> None:
+    import time
+
+    db = str(tmp_path / "err.db")
+    populate(db, 2)
+    ticks = []
+
+    def sleep(interval: float) -> None:
+        ticks.append(interval)
+        if len(ticks) == 1:
+            populate(db, 1)
+        elif len(ticks) > 2:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(time, "sleep", sleep)
+    r = Cli().run(["--db", db, "watch", "-i", "0.5"])
+    assert r == ExitCode.OK
+    out = capsys.readouterr().out
+    assert "oops 1" not in out
+    assert "RuntimeError: oops 0: repeated 1 times, 2 total" in out
@@ -0,0 +1,121 @@
+# ---------------------------------------------------------------------
+# Gufo Err: test Stats
+# ---------------------------------------------------------------------
+# Copyright (C) 2022-26, Gufo Labs
+# ---------------------------------------------------------------------
+
+# Python modules
+import datetime
+import json
+
+# Gufo Err modules
+from gufo.err import Err
+from gufo.err.abc.storage import Summary
+from gufo.err.cli import Cli, ExitCode
+from gufo.err.stats import Stats
+
+
+def get_summary(
+    name: str, exc: str, hour: int, count: int = 1, version: str = ""
+) -> Summary:
+    return Summary(
+        fingerprint=f"{name}-{exc}-{hour}",
+        name=name,
+        version=version,
+        exception=f"{exc}: oops",
+        exception_class=exc,
+        ts=datetime.datetime(2026, 1, 1, hour, 30),
+        place="app.py:1",
+        count=count,
+        module="app" if hour else "",
+    )
+
+
+def get_stats() -> Stats:
+    return Stats().update(
+        [
+            get_summary("svc", "KeyError", 1, 5, version="1.0"),
+            get_summary("svc", "ValueError", 2, 1, version="1.0"),
+            get_summary("db", "KeyError", 0, 2),
+            get_summary("db", "TypeError", 2, 7),
+        ]
+    )
+
+
+def test_totals() -> None:
+    stats = get_stats()
+    assert stats.records == 4
+    assert stats.occurrences == 15
+
+
+def test_top() -> None:
+    stats = get_stats()
+    assert stats.top("exception") == [
+        ("KeyError", 2, 7),
+        ("TypeError", 1, 7),
+        ("ValueError", 1, 1),
+    ]
+    assert stats.top("exception", 1) == [("KeyError", 2, 7)]
+    assert stats.top("service") == [("db", 2, 9), ("svc/1.0", 2, 6)]
+    assert stats.top("module") == [("app", 3, 13), ("unknown", 1, 2)]
+
+
+def test_hours() -> None:
+    stats = get_stats()
+    assert stats.top("hour") == [
+        ("2026-01-01T00:00", 1, 2),
+        ("2026-01-01T01:00", 1, 5),
+        ("2026-01-01T02:00", 2, 8),
+    ]
+    assert stats.top("hour", 2) == [
+        ("2026-01-01T01:00", 1, 5),
+        ("2026-01-01T02:00", 2, 8),
+    ]
+    assert stats.top("hour", 0) == []
+    assert stats.top("hour", 10) == stats.top("hour")
+
+
+def test_to_dict() -> None:
+    r = get_stats().to_dict(1)
+    assert r["records"] == 4
+    assert r["occurrences"] == 15
+    assert r["exception"] == [
+        {"key": "KeyError", "records": 2, "occurrences": 7}
+    ]
+    assert len(r["hour"]) == 1
+
+
+def test_cli(capsys, tmp_path) -> None:
+    for i in range(3):
+        err = Err().setup(
+            name=f"svc-{i % 2}", format=None, error_info_path=str(tmp_path)
+        )
+        try:
+            msg = f"oops {i}"
+            raise (RuntimeError if i else KeyError)(msg)
+        except Exception:
+            err.process()
+    prefix = str(tmp_path)
+    r = Cli().run(["-p", prefix, "stats", "-f", "json"])
+    assert r == ExitCode.OK
+    data = json.loads(capsys.readouterr().out)
+    assert data["records"] == 3
+    assert [x["key"] for x in data["exception"]] == [
+        "RuntimeError",
+        "KeyError",
+    ]
+    assert [x["key"] for x in data["service"]] == [
+        "svc-0/unknown",
+        "svc-1/unknown",
+    ]
+    assert data["module"] == [
+        {"key": __name__, "records": 3, "occurrences": 3}
+    ]
+    r = Cli().run(["-p", prefix, "stats", "--exception", "KeyError"])
+    assert r == ExitCode.OK
+    out = capsys.readouterr().out
+    assert out.startswith("Records: 1, occurrences: 1\n")
+    assert "Exception" in out
+    assert "RuntimeError" not in out
+    r = Cli().run(["-p", prefix, "stats", "-n", "-1"])
+    assert r == ExitCode.INVALID_ARGS
@@ -0,0 +1,89 @@
+# ---------------------------------------------------------------------
+# Gufo Err: test Summarizer
+# ---------------------------------------------------------------------
+# Copyright (C) 2022-26, Gufo Labs
+# ---------------------------------------------------------------------
+
+# Python modules
+import array
+from collections import OrderedDict
+
+# Third-party modules
+import pytest
+
+# Gufo Err modules
+from gufo.err.summarizer import Summarizer, summarizer
+
+
+class Model:
+    pk = 42
+
+
+class Order(Model):
+    pass
+
+
+class Broken:
+    pass
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        (1, None),
+        ("abc", None),
+        (object, None),
+        ({}, "{}"),
+        ([1, 2, 3], "[1, 2, 3]"),
+        ((1, 2), "(1, 2)"),
+        (list(range(1000)), "list(len=1000) [0, 1, 2, 3, 4, ...]"),
+        ({"a": 1}, "{'a': 1}"),
+        (b"12345", "b'12345'"),
+        (b"x" * 100, "bytes(len=100) b'" + "x" * 32 + "'..."),
+        (
+            memoryview(b"1234"),
+            "memoryview(format='B', shape=(4,), nbytes=4)",
+        ),
+        (array.array("i", [1, 2]), "array('i', [1, 2])"),
+    ],
+)
+def test_summarize(value: object, expected: str | None) -> None:
+    assert summarizer.summarize(value) == expected
+
+
+def test_nested_string() -> None:
+    d = {"key": "x" * 100}
+    assert summarizer.summarize(d) == repr(d)
+    # Strings are shortened to fit the budget
+    d = {str(i): "x" * 100 for i in range(3)}
+    r = summarizer.summarize(d)
+    assert r is not None
+    assert len(r) < Summarizer().max_repr
+    assert "..." in r
+
+
+def test_subclass() -> None:
+    d = OrderedDict((str(i), i) for i in range(10))
+    r = summarizer.summarize(d)
+    assert r is not None
+    assert r.startswith("OrderedDict(len=10) ")
+
+
+def test_register_type() -> None:
+    s = Summarizer()
+    assert s.summarize(Order()) is None
+    s.register(Model, s.summarize_model)
+    assert s.summarize(Order()) == "<Order pk=42>"
+    assert s.get_handler(Order) is s.get_handler(Model)
+
+
+def test_register_name() -> None:
+    s = Summarizer()
+    s.register(f"{__name__}.Model", s.summarize_model)
+    assert s.summarize(Order()) == "<Order pk=42>"
+
+
+def test_failed() -> None:
+    s = Summarizer()
+    s.register(Broken, s.summarize_model)
+    assert s.summarize(Broken()) is None
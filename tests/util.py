@@ -5,13 +5,18 @@
 # ---------------------------------------------------------------------
 
 # Python modules
+import datetime
+import os
+import time
 from collections.abc import Generator
 from contextlib import contextmanager
 from io import StringIO
 from logging import StreamHandler
 
 # Gufolabs modules
-from gufo.err import logger
+from gufo.err import Err, logger
+from gufo.err.codec import from_json
+from gufo.err.storage.directory import DirectoryStorage
 
 
 @contextmanager
@@ -21,3 +26,59 @@ def log_capture() -> Generator[StringIO, None, None]:
     logger.addHandler(handler)
     yield buffer
     logger.removeHandler(handler)
+
+
+def fail(i: int) -> None:
+    msg = f"oops {i}"
+    raise RuntimeError(msg)
+
+
+def populate(path: str, n: int, **kwargs: str | int) -> list[str]:
+    """Write `svc-<i>` errors, return sorted fingerprints."""
+    kwargs.setdefault("error_info_compress", "gz")
+    for i in range(n):
+        err = Err().setup(
+            name=f"svc-{i}", format=None, error_info_path=path, **kwargs
+        )
+        try:
+            fail(i)
+        except RuntimeError:
+            err.process()
+    return sorted(DirectoryStorage(path).iter_fingerprints())
+
+
+def get_records(path: str, n: int) -> list[tuple[str, bytes]]:
+    """Get (fingerprint, data) of `n` errors, written into `path`."""
+    os.mkdir(path)
+    populate(path, n)
+    storage = DirectoryStorage(path)
+    r = list(storage.iter_read(sorted(storage.iter_fingerprints())))
+    for fp, _ in r:
+        storage.delete(fp)
+    return r
+
+
+def hit(path, records: list[tuple[str, bytes]], n: int) -> None:
+    """Write each record `n` times."""
+    storage = DirectoryStorage(path, flush_interval=0)
+    for _, data in records:
+        info = from_json(data.decode())
+        for _ in range(n):
+            storage.write_info(info, data)
+
+
+def age(path, fps: list[str]) -> None:
+    """Set mtimes in order of fps, oldest first."""
+    now = time.time()
+    for i, fp in enumerate(reversed(fps)):
+        mtime = now - 3600 * (i + 1)
+        os.utime(path / f"{fp}.json.gz", (mtime, mtime))
+
+
+def age_index(path) -> None:
+    """Set indexed timestamps to the record mtimes."""
+    storage = DirectoryStorage(path)
+    for summary, fn in storage.get_summaries().values():
+        mtime = (path / fn).stat().st_mtime
+        summary.ts = summary.last_seen = datetime.datetime.fromtimestamp(mtime)
+        storage._append_index(storage._summary_to_dict(summary, fn))